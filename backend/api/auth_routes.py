@@ -44,6 +44,18 @@ class SignUpRequest(BaseModel):
     )
 
 
+def _warm_user_caches(user_id: str):
+    """Preload per-user retrieval caches so the first chat turn is fast."""
+    try:
+        from core.factories.vector_store_factory import VectorStoreFactory
+
+        store = VectorStoreFactory.get_vector_store()
+        if hasattr(store, "warm_bm25_cache"):
+            store.warm_bm25_cache(user_id=str(user_id))
+    except Exception as e:
+        logger.warning(f"Failed to warm retrieval caches: {str(e)}")
+
+
 @auth_router.post("/signup", status_code=status.HTTP_201_CREATED)
 async def signup(request: SignUpRequest):
     try:
@@ -81,6 +93,7 @@ async def signin(request: SignInRequest):
                 detail="Invalid authentication response from server"
             )
 
+        _warm_user_caches(result["user"]["id"])
         return result
     except ValueError as e:
         logger.error(f"Signin error: {str(e)}")
@@ -1,8 +1,11 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
+from api.middleware.auth import get_current_user
+from core.factories.vector_store_factory import VectorStoreFactory
 from services.embeddings.embedding_service import EmbeddingService
+from tasks.embedding_tasks import celery, embed_all_documents_task
 
 embedding_route = APIRouter()
 
@@ -11,15 +14,27 @@ embedding_service = EmbeddingService()
 
 
 @embedding_route.post("/embed/documents")
-async def embed_documents():
-    """Embed all documents in the database into the vector store."""
+async def embed_documents(batch_size: int = Query(50, ge=1, le=1000)):
+    """Queue embedding of the documents that are new or changed."""
     try:
-        langchain_documents = embedding_service.embed_all_documents()
-        return langchain_documents
+        task = embed_all_documents_task.delay(batch_size)
+        return {"task_id": task.id, "status_url": f"embed/tasks/{task.id}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@embedding_route.get("/embed/tasks/{task_id}")
+async def get_embedding_task_status(task_id: str):
+    """Check status and progress of an embedding task"""
+    result = celery.AsyncResult(task_id)
+    return {
+        "task_id": task_id,
+        "status": result.status,
+        "progress": result.info if result.status == "PROGRESS" else None,
+        "result": result.result if result.ready() else None,
+    }
+
+
 @embedding_route.post("/embed/document/{doc_id}")
 async def embed_document(doc_id: str):
     """Embed a specific document into the vector store."""
@@ -43,6 +58,23 @@ async def get_embedded_documents():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@embedding_route.get("/embedded_chunks")
+async def get_embedded_chunks(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """Page through the current user's chunks (keyset pagination on chunk id)."""
+    try:
+        store = VectorStoreFactory.get_vector_store()
+        docs, next_cursor = store.get_documents_page(
+            user_id=current_user["id"], limit=limit, after_id=cursor
+        )
+        return {"chunks": docs, "next_cursor": next_cursor}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @embedding_route.delete("/embed/document/chunk")
 async def delete_document_chunk(chunk_ids: List[str]):
     """Delete a list of document chunks from the vector store."""
@@ -42,6 +42,7 @@ def get_celery_config():
         "worker_shutdown_timeout": 10,  # Give tasks 10 seconds to clean up
         "imports": [
             "tasks.parsing_tasks",
+            "tasks.embedding_tasks",
         ],
         "task_routes": {
             "parse_markitdown": {"queue": "parsing"},
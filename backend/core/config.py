@@ -104,12 +104,56 @@ class LLMConfig(BaseModel):
     additional_params: Dict[str, Any] = Field(default_factory=dict)
 
 
+class QueryCacheConfig(BaseModel):
+    enabled: bool = True
+    max_entries: int = 10000
+    ttl_seconds: int = 3600
+    # Lowercase queries before hashing and embedding (only for uncased models)
+    lowercase: bool = False
+    # Optional SQLite file shared by the processes of a host
+    disk_path: Optional[Path] = None
+
+
+class DocumentCacheConfig(BaseModel):
+    enabled: bool = True
+    # "postgres" (embedding_cache table), "sqlite", or null to pick postgres
+    # for the pgvector providers and sqlite otherwise
+    backend: Optional[str] = None
+    # SQLite file, relative to base_dir
+    sqlite_path: Path = Path("vector_stores/embedding_cache.sqlite")
+
+
+class EmbeddingExecutorConfig(BaseModel):
+    enabled: bool = True
+    # Texts per embed_documents request
+    batch_size: int = 64
+    # Estimated tokens per request (remote providers)
+    max_batch_tokens: int = 8000
+    # Requests in flight at once (remote providers)
+    max_concurrency: int = 4
+    # Retries of a rate-limited or failed request, with exponential backoff
+    max_retries: int = 6
+    backoff_base_s: float = 1.0
+    backoff_max_s: float = 60.0
+
+
+class MicroBatchingConfig(BaseModel):
+    enabled: bool = True
+    max_batch_size: int = 64
+    # How long the first call of a batch waits for concurrent ones
+    max_wait_ms: float = 5
+
+
 class EmbeddingConfig(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
 
     provider: str = "openai"
     model_name: str = "text-embedding-3-small"
     device: str = os.getenv("DEVICE")
+    query_cache: QueryCacheConfig = Field(default_factory=QueryCacheConfig)
+    document_cache: DocumentCacheConfig = Field(default_factory=DocumentCacheConfig)
+    executor: EmbeddingExecutorConfig = Field(default_factory=EmbeddingExecutorConfig)
+    micro_batching: MicroBatchingConfig = Field(default_factory=MicroBatchingConfig)
 
     additional_params: Dict[str, Any] = Field(default_factory=dict)
 
@@ -136,9 +180,12 @@ class RetrievalConfig(BaseModel):
             "prioritize_semantic": True,
             # Ensemble retrieval parameters
             "weights": [0.5, 0.5],  # Default weights for default + semantic
-            # Reranking parameters (future implementation)
-            "reranker_model": "colbert",
+            # Reranking parameters
+            "reranker_model": "cross-encoder/ms-marco-MiniLM-L-6-v2",
             "reranker_threshold": 0.7,
+            "reranker_candidates": 50,
+            "reranker_batch_size": 32,
+            "reranker_cache_size": 10000,
         }
     )
 
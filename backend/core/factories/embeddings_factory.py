@@ -1,6 +1,11 @@
+import asyncio
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from langchain.schema.embeddings import Embeddings
 from langchain_community.embeddings import CohereEmbeddings
@@ -8,25 +13,276 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_ollama import OllamaEmbeddings
 from langchain_openai import OpenAIEmbeddings
 
-from core.config import settings
+from core.config import EmbeddingExecutorConfig, settings
+from services.embeddings.document_cache import (
+    DocumentEmbeddingCache,
+    PostgresEmbeddingCacheBackend,
+    SQLiteEmbeddingCacheBackend,
+)
+from services.embeddings.micro_batching import MicroBatchingEmbeddings
+from services.embeddings.onnx_embeddings import ONNXEmbeddings
+from services.embeddings.query_cache import CachedQueryEmbeddings, QueryEmbeddingCache
 
 logger = logging.getLogger(__name__)
 
 SUPPORTED_PROVIDERS = {
     "openai": OpenAIEmbeddings,
     "huggingface": HuggingFaceEmbeddings,
+    "huggingface-onnx": ONNXEmbeddings,
     "cohere": CohereEmbeddings,
 }
 
+# Providers called over HTTP: batched by tokens, concurrent and retried
+REMOTE_PROVIDERS = {"openai", "cohere"}
+
+
+class EmbeddingExecutor(Embeddings):
+    """
+    Batching, concurrency and retry policy around a provider's embeddings.
+
+    Remote providers get batches bounded by text count and estimated tokens,
+    sent max_concurrency at a time (process-wide) and retried with
+    exponential backoff, honoring Retry-After when rate limited. Local models
+    get batches of similar-length texts so each pads to a short length.
+    Any other attribute is looked up on the wrapped embeddings object.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, provider: str, config: EmbeddingExecutorConfig
+    ):
+        self.embeddings = embeddings
+        self.provider = provider
+        self.config = config
+        self.remote = provider in REMOTE_PROVIDERS
+        self._pool = (
+            ThreadPoolExecutor(
+                max_workers=config.max_concurrency, thread_name_prefix="embedding"
+            )
+            if self.remote
+            else None
+        )
+        self._stats_lock = threading.Lock()
+        self.chunks = 0
+        self.requests = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not found on the wrapper itself
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        # ~4 characters per token for English BPE vocabularies
+        return max(1, len(text) // 4)
+
+    def _batches(self, texts: List[str]) -> List[List[int]]:
+        """Indices of texts grouped into request batches."""
+        indices = list(range(len(texts)))
+        if not self.remote:
+            indices.sort(key=lambda i: len(texts[i]))
+        batches: List[List[int]] = []
+        current: List[int] = []
+        tokens = 0
+        for i in indices:
+            cost = self._estimate_tokens(texts[i])
+            full = len(current) >= self.config.batch_size or (
+                self.remote and tokens + cost > self.config.max_batch_tokens
+            )
+            if current and full:
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(i)
+            tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def _is_rate_limited(error: Exception) -> bool:
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(
+            response, "status_code", None
+        )
+        return (
+            status == 429
+            or "RateLimit" in type(error).__name__
+            or "rate limit" in str(error).lower()
+        )
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    def _with_retry(self, func: Callable, *args):
+        """Call func, retrying remote failures with jittered exponential backoff."""
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                return func(*args)
+            except Exception as e:
+                # Local model errors are deterministic, retrying cannot help
+                if not self.remote or attempt == self.config.max_retries:
+                    raise
+                rate_limited = self._is_rate_limited(e)
+                delay = self._retry_after(e) if rate_limited else None
+                if delay is None:
+                    delay = min(
+                        self.config.backoff_max_s,
+                        self.config.backoff_base_s * 2**attempt,
+                    ) * random.uniform(0.5, 1.0)
+                logger.warning(
+                    f"{self.provider} embedding request failed "
+                    f"({'rate limited' if rate_limited else e}), "
+                    f"retry {attempt + 1}/{self.config.max_retries} in {delay:.1f}s"
+                )
+                with self._stats_lock:
+                    self.retries += 1
+                time.sleep(delay)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._with_retry(self.embeddings.embed_documents, texts)
+        with self._stats_lock:
+            self.requests += 1
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        batches = self._batches(texts)
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+        if self._pool is not None and len(batches) > 1:
+            outputs = self._pool.map(self._embed_batch, batch_texts)
+        else:
+            outputs = map(self._embed_batch, batch_texts)
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, vectors in zip(batches, outputs):
+            for i, vector in zip(batch, vectors):
+                results[i] = vector
+
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.chunks += len(texts)
+            self.seconds += elapsed
+        # Single-batch calls (queries, small documents) would flood the log
+        log = logger.info if len(batches) > 1 else logger.debug
+        log(
+            f"Embedded {len(texts)} chunks in {len(batches)} batches, "
+            f"{len(texts) / elapsed if elapsed else 0:.1f} chunks/s"
+        )
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._with_retry(self.embeddings.embed_query, text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.to_thread(self.embed_query, text)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "chunks": self.chunks,
+                "requests": self.requests,
+                "retries": self.retries,
+                "seconds": self.seconds,
+                "chunks_per_sec": self.chunks / self.seconds if self.seconds else 0.0,
+            }
+
+
+@lru_cache()
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Process-wide query embedding cache shared by all embedding instances."""
+    config = settings.embedding.query_cache
+    disk_path = config.disk_path
+    if disk_path is not None and not disk_path.is_absolute():
+        disk_path = settings.paths.base_dir / disk_path
+    return QueryEmbeddingCache(
+        max_entries=config.max_entries,
+        ttl_seconds=config.ttl_seconds,
+        disk_path=disk_path,
+    )
+
+
+def _cache_model_key() -> str:
+    """Model name for cache keys, with the settings that change its vectors."""
+    params = settings.embedding.additional_params
+    key = settings.embedding.model_name
+    if settings.embedding.provider == "huggingface-onnx" and params.get("quantize"):
+        key += ":int8"
+    if params.get("dimensions"):
+        key += f":{params['dimensions']}d"
+    return key
+
+
+@lru_cache()
+def get_document_embedding_cache() -> Optional[DocumentEmbeddingCache]:
+    """
+    Process-wide content-hash cache of chunk embeddings, or None if disabled.
+
+    Consulted by the vector stores before embedding chunks.
+    """
+    config = settings.embedding.document_cache
+    if not config.enabled:
+        return None
+    backend = config.backend or (
+        "postgres" if settings.vector_store.provider.startswith("pgvector") else "sqlite"
+    )
+    if backend == "postgres":
+        store = PostgresEmbeddingCacheBackend()
+    elif backend == "sqlite":
+        path = config.sqlite_path
+        if not path.is_absolute():
+            path = settings.paths.base_dir / path
+        store = SQLiteEmbeddingCacheBackend(path)
+    else:
+        raise ValueError(f"Unsupported embedding cache backend: {backend}")
+    return DocumentEmbeddingCache(
+        store, provider=settings.embedding.provider, model=_cache_model_key()
+    )
+
+
+def embed_documents_cached(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """embed_documents through the document embedding cache, when enabled."""
+    cache = get_document_embedding_cache()
+    if cache is None:
+        return embeddings.embed_documents(texts)
+    return cache.embed_documents(embeddings, texts)
+
+
+async def aembed_documents_cached(
+    embeddings: Embeddings, texts: List[str]
+) -> List[List[float]]:
+    """Async embed_documents through the document embedding cache, when enabled."""
+    cache = get_document_embedding_cache()
+    if cache is None:
+        return await embeddings.aembed_documents(texts)
+    return await cache.aembed_documents(embeddings, texts)
+
 
 @lru_cache()
 def get_embeddings(**kwargs) -> Embeddings:
     """
     Get an embedding model instance.
     Uses LRU cache to maintain single instance per configuration.
+    Document embeddings go through an EmbeddingExecutor (batching,
+    concurrency, retries) unless embedding.executor.enabled is false.
+    Concurrent calls to local models are coalesced into shared forward
+    passes unless embedding.micro_batching.enabled is false.
+    Query embeddings are served from the process-wide query cache
+    unless embedding.query_cache.enabled is false.
 
     Args:
-        provider: The embedding provider (openai, huggingface, huggingface-bge, cohere)
+        provider: The embedding provider (openai, huggingface, huggingface-onnx, cohere)
         model_name: The specific model to use
         **kwargs: Additional configuration parameters
 
@@ -43,14 +299,49 @@ def get_embeddings(**kwargs) -> Embeddings:
             f"Unsupported embedding provider: {settings.embedding.provider}. "
             f"Supported providers: {list(SUPPORTED_PROVIDERS.keys())}"
         )
+    if settings.embedding.executor.enabled and settings.embedding.provider in REMOTE_PROVIDERS:
+        # The executor retries with backoff itself, client retries would
+        # multiply its attempts and hold a concurrency slot while sleeping
+        kwargs = {**kwargs, "max_retries": 0}
+    embeddings = _create_embeddings(**kwargs)
+
+    if settings.embedding.executor.enabled:
+        embeddings = EmbeddingExecutor(
+            embeddings, settings.embedding.provider, settings.embedding.executor
+        )
+
+    # Local models only: remote providers are already batched and run
+    # concurrently by the executor
+    batching = settings.embedding.micro_batching
+    if batching.enabled and settings.embedding.provider not in REMOTE_PROVIDERS:
+        embeddings = MicroBatchingEmbeddings(
+            embeddings,
+            max_batch_size=batching.max_batch_size,
+            max_wait_ms=batching.max_wait_ms,
+        )
+
+    if settings.embedding.query_cache.enabled:
+        embeddings = CachedQueryEmbeddings(
+            embeddings,
+            cache=get_query_embedding_cache(),
+            provider=settings.embedding.provider,
+            model=_cache_model_key(),
+            lowercase=settings.embedding.query_cache.lowercase,
+        )
+    return embeddings
+
+
+def _create_embeddings(**kwargs) -> Embeddings:
+    """Instantiate the configured provider's LangChain embeddings."""
     # TODO: integrate litellm
     device = settings.embedding.device
+    # Call arguments take precedence over embedding.additional_params
+    kwargs = {**settings.embedding.additional_params, **kwargs}
 
     try:
         if settings.embedding.provider == "openai":
             return OpenAIEmbeddings(
                 model=settings.embedding.model_name,
-                **settings.embedding.additional_params,
                 **kwargs,
             )
         elif settings.embedding.provider == "huggingface":
@@ -58,21 +349,24 @@ def get_embeddings(**kwargs) -> Embeddings:
                 model_name=settings.embedding.model_name,
                 # Use the potentially overridden device
                 model_kwargs={"device": device},
-                **settings.embedding.additional_params,
+                **kwargs,
+            )
+        elif settings.embedding.provider == "huggingface-onnx":
+            # Same model as "huggingface", served by ONNX Runtime on CPU
+            return ONNXEmbeddings(
+                model_name=settings.embedding.model_name,
                 **kwargs,
             )
 
         elif settings.embedding.provider == "ollama":
             return OllamaEmbeddings(
                 model_name=settings.embedding.model_name or "nomic-embed-text",
-                **settings.embedding.additional_params,
                 **kwargs,
             )
 
         elif settings.embedding.provider == "cohere":
             return CohereEmbeddings(
                 model=settings.embedding.model_name or "embed-english-v3.0",
-                **settings.embedding.additional_params,
                 **kwargs,
             )
     except Exception as e:
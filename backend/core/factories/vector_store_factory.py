@@ -1,6 +1,6 @@
 from core.config import settings
 from core.factories.embeddings_factory import get_embeddings
-from services.vector_store import PGVectorStore, VectorStoreService
+from services.vector_store import AsyncPGVectorStore, PGVectorStore, VectorStoreService
 from services.vector_store.vector_store_service import VectorStoreService
 
 
@@ -25,14 +25,22 @@ class VectorStoreFactory:
             self._vector_store = self._initialize_faiss(embeddings)
         elif settings.vector_store.provider == "pgvector":
             self._vector_store = self._initialize_pgvector(embeddings)
+        elif settings.vector_store.provider == "pgvector-async":
+            self._vector_store = self._initialize_async_pgvector(embeddings)
         else:
             raise ValueError(
                 f"Unsupported vector store provider: {settings.vector_store.provider}"
             )
 
+    def _initialize_faiss(self, embeddings):
+        return VectorStoreService(embeddings=embeddings)
+
     def _initialize_pgvector(self, embeddings):
         return PGVectorStore()
 
+    def _initialize_async_pgvector(self, embeddings):
+        return AsyncPGVectorStore()
+
     @classmethod
     def get_vector_store(cls) -> VectorStoreService:
         return cls()._vector_store
@@ -1,5 +1,6 @@
 import json
 import logging
+import threading
 from contextlib import contextmanager
 from datetime import datetime
 from typing import Any, Dict, List, Optional
@@ -7,7 +8,7 @@ from typing import Any, Dict, List, Optional
 import psycopg2
 from fastapi import HTTPException, status
 from psycopg2.extras import RealDictCursor
-from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from sqlalchemy import JSON, Column, String, create_engine
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.engine import URL
@@ -60,6 +61,38 @@ class SQLDocument(Base):
         return SimbaDoc(**self.data)
 
 
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool whose getconn waits for a free connection.
+
+    The stock pool raises PoolError as soon as maxconn connections are out,
+    which concurrent search legs hit under load. Here getconn blocks for up
+    to timeout seconds before raising.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, timeout: float = 30.0, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PoolError(
+                f"no connection available after {self._timeout}s"
+            )
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
 class PostgresDB(DatabaseService):
     """PostgreSQL database access with connection pooling and SQLAlchemy ORM."""
 
@@ -79,9 +112,11 @@ class PostgresDB(DatabaseService):
         """Get or create the connection pool."""
         if cls._pool is None:
             try:
-                cls._pool = ThreadedConnectionPool(
+                params = settings.database.additional_params
+                cls._pool = BlockingConnectionPool(
                     minconn=3,
-                    maxconn=10,
+                    maxconn=int(params.get("pool_max_size", 20)),
+                    timeout=float(params.get("pool_timeout_s", 30)),
                     user=settings.postgres.user,
                     password=settings.postgres.password,
                     host=settings.postgres.host,
@@ -282,6 +317,20 @@ class PostgresDB(DatabaseService):
         finally:
             session.close()
 
+    def get_document_ids(self, user_id: str = None) -> List[str]:
+        """IDs of all documents (without loading their data), in id order."""
+        try:
+            session = self._Session()
+            query = session.query(SQLDocument.id)
+            if user_id:
+                query = query.filter(SQLDocument.user_id == user_id)
+            return [row.id for row in query.order_by(SQLDocument.id)]
+        except Exception as e:
+            logger.error(f"Failed to get document ids: {e}")
+            return []
+        finally:
+            session.close()
+
     def get_all_documents(self, user_id: str = None) -> List[SimbaDoc]:
         """Retrieve all documents using SQLAlchemy ORM."""
         try:
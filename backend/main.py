@@ -71,6 +71,17 @@ async def lifespan(app: FastAPI):
     logger.info("=" * 50)
     yield
 
+    # Release the asyncpg pool of the async vector store and flush pending
+    # FAISS writes, if a store was created
+    from core.factories.vector_store_factory import VectorStoreFactory
+
+    if VectorStoreFactory._instance is not None:
+        store = VectorStoreFactory.get_vector_store()
+        if hasattr(store, "aclose"):
+            await store.aclose()
+        if hasattr(store, "close"):
+            store.close()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -21,6 +21,8 @@ class MetadataType(BaseModel):
     file_path: str = Field(default="")
     parsing_status: str = Field(default="")
     parsed_at: str = Field(default="")
+    # Hash of the chunk texts at the last embedding, to detect changed content
+    content_hash: Optional[str] = Field(default=None)
 
     def dict(self, *args, **kwargs):
         return {
@@ -38,6 +40,7 @@ class MetadataType(BaseModel):
             "file_path": self.file_path,
             "parsing_status": self.parsing_status,
             "parsed_at": self.parsed_at,
+            "content_hash": self.content_hash,
         }
 
 
@@ -1,5 +1,6 @@
 import io
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, START, StateGraph
 
@@ -7,7 +8,7 @@ from .nodes.generate_node import generate
 from .nodes.grade_node import grade
 # ===========================================
 # Import nodes
-from .nodes.retrieve_node import retrieve
+from .nodes.retrieve_node import aretrieve, retrieve
 from .state import State
 
 # ===========================================
@@ -18,7 +19,8 @@ memory = MemorySaver()
 
 # ===========================================
 # Define the nodes
-workflow.add_node("retrieve", retrieve)
+# Sync for invoke, async (non-blocking) for ainvoke / astream_events
+workflow.add_node("retrieve", RunnableLambda(retrieve, afunc=aretrieve))
 workflow.add_node("grade", grade)
 workflow.add_node("generate", generate)
 
@@ -1,5 +1,9 @@
+import logging
+
 from services.retrieval.retriever import Retriever
 
+logger = logging.getLogger(__name__)
+
 retriever = Retriever()
 
 def retrieve(state):
@@ -12,16 +16,41 @@ def retrieve(state):
     Returns:
         state (dict): New key added to state, documents, that contains retrieved documents
     """
+    question = None
     try:
-        print("---RETRIEVE---")
+        logger.debug("---RETRIEVE---")
         question = state["messages"][-1].content
-        # Retrieval with error handling
-        documents = retriever.retrieve(question, method="default")
+        # Retrieval with error handling (method from retrieval.method in config)
+        documents = retriever.retrieve(question)
 
-        print(f"Retrieved {len(documents)} documents")
+        logger.info(f"Retrieved {len(documents)} documents")
 
         return {"documents": documents, "question": question}
     except KeyError as e:
-        print(f"Error retrieving documents: {e}")
+        logger.error(f"Error retrieving documents: {e}")
         # Return empty documents list if retrieval fails
         return {"documents": [], "question": question}
+
+
+async def aretrieve(state):
+    """
+    Retrieve documents without blocking the event loop (used by astream_events)
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        state (dict): New key added to state, documents, that contains retrieved documents
+    """
+    question = None
+    try:
+        logger.debug("---RETRIEVE---")
+        question = state["messages"][-1].content
+        documents = await retriever.aretrieve(question)
+
+        logger.info(f"Retrieved {len(documents)} documents")
+
+        return {"documents": documents, "question": question}
+    except KeyError as e:
+        logger.error(f"Error retrieving documents: {e}")
+        return {"documents": [], "question": question}
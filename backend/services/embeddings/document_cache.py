@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Union
+
+from langchain.schema.embeddings import Embeddings
+
+from services.embeddings.query_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """sha256 of the unicode/whitespace-normalized text (case is kept)."""
+    return hashlib.sha256(normalize_text(text, lowercase=False).encode("utf-8")).hexdigest()
+
+
+class PostgresEmbeddingCacheBackend:
+    """embedding_cache table (migration 022), next to chunks_embeddings."""
+
+    def __init__(self):
+        # Imported here, the database package pulls in the ORM models
+        from database.postgres import PostgresDB
+
+        self._get_pool = PostgresDB._get_pool
+
+    def get_many(
+        self, provider: str, model: str, hashes: Sequence[str]
+    ) -> Dict[str, List[float]]:
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT content_hash, embedding FROM embedding_cache
+                    WHERE provider = %s AND model = %s AND content_hash = ANY(%s)
+                    """,
+                    (provider, model, list(hashes)),
+                )
+                rows = cur.fetchall()
+            conn.commit()
+        finally:
+            pool.putconn(conn)
+        return {row[0]: list(row[1]) for row in rows}
+
+    def put_many(
+        self, provider: str, model: str, embeddings: Dict[str, List[float]]
+    ) -> None:
+        from psycopg2.extras import execute_values
+
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO embedding_cache (provider, model, content_hash, embedding)
+                    VALUES %s
+                    ON CONFLICT (provider, model, content_hash) DO NOTHING
+                    """,
+                    [
+                        (provider, model, key, [float(x) for x in vector])
+                        for key, vector in embeddings.items()
+                    ],
+                    template="(%s, %s, %s, %s::real[])",
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+
+class SQLiteEmbeddingCacheBackend:
+    """SQLite file shared by the processes of a host (FAISS deployments)."""
+
+    def __init__(self, path: Union[str, Path]):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                PRIMARY KEY (provider, model, content_hash)
+            )
+            """
+        )
+
+    def get_many(
+        self, provider: str, model: str, hashes: Sequence[str]
+    ) -> Dict[str, List[float]]:
+        found = {}
+        hashes = list(hashes)
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 900):
+                batch = hashes[start:start + 900]
+                placeholders = ",".join("?" * len(batch))
+                for key, blob in self._db.execute(
+                    "SELECT content_hash, embedding FROM embedding_cache "
+                    f"WHERE provider = ? AND model = ? AND content_hash IN ({placeholders})",
+                    [provider, model, *batch],
+                ):
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        return found
+
+    def put_many(
+        self, provider: str, model: str, embeddings: Dict[str, List[float]]
+    ) -> None:
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO embedding_cache VALUES (?, ?, ?, ?)",
+                [
+                    (provider, model, key, array("f", vector).tobytes())
+                    for key, vector in embeddings.items()
+                ],
+            )
+
+
+class DocumentEmbeddingCache:
+    """
+    Persistent cache of chunk embeddings keyed by content hash.
+
+    embed_documents only sends texts missing from the cache (each distinct
+    text once) to the embedding model and stores their vectors.
+    """
+
+    def __init__(self, backend, provider: str, model: str):
+        self.backend = backend
+        self.provider = provider
+        self.model = model
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, texts: List[str]):
+        hashes = [content_hash(text) for text in texts]
+        try:
+            cached = self.backend.get_many(self.provider, self.model, set(hashes))
+        except Exception as e:
+            # A cache outage must not block ingestion
+            logger.warning(f"Embedding cache lookup failed, embedding everything: {e}")
+            cached = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        return hashes, cached, missing
+
+    def _store(self, hashes, cached, missing, vectors) -> List[List[float]]:
+        computed = dict(zip(missing, vectors))
+        if computed:
+            try:
+                self.backend.put_many(self.provider, self.model, computed)
+            except Exception as e:
+                logger.warning(f"Failed to store {len(computed)} embeddings in the cache: {e}")
+
+        hits = sum(1 for key in hashes if key in cached)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(hashes) - hits
+        logger.info(
+            f"Embedding cache: {hits}/{len(hashes)} chunks cached, "
+            f"{len(computed)} embedded"
+        )
+        cached.update(computed)
+        return [cached[key] for key in hashes]
+
+    def embed_documents(self, embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        hashes, cached, missing = self._lookup(texts)
+        vectors = embeddings.embed_documents(list(missing.values())) if missing else []
+        return self._store(hashes, cached, missing, vectors)
+
+    async def aembed_documents(
+        self, embeddings: Embeddings, texts: List[str]
+    ) -> List[List[float]]:
+        if not texts:
+            return []
+        hashes, cached, missing = await asyncio.to_thread(self._lookup, texts)
+        vectors = (
+            await embeddings.aembed_documents(list(missing.values())) if missing else []
+        )
+        return await asyncio.to_thread(self._store, hashes, cached, missing, vectors)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,11 +1,15 @@
+import hashlib
+import inspect
 import logging
-from typing import Dict, List, Optional, Union, cast
+import time
+from typing import Any, Callable, Dict, List, Optional, Union, cast
 
 from langchain.schema import Document
 
 from core.factories.database_factory import get_database
 from core.factories.vector_store_factory import VectorStoreFactory
 from models.simbadoc import SimbaDoc
+from services.embeddings.document_cache import content_hash
 from services.embeddings.utils import _clean_documents
 from services.splitting.splitter import Splitter
 
@@ -19,38 +23,103 @@ class EmbeddingService:
         self.database = get_database()
         self.splitter = Splitter(chunk_size=5000, chunk_overlap=300)
 
-    async def embed_all_documents(self) -> List[Document]:
+    @staticmethod
+    def _content_hash(chunks: List[Document]) -> str:
+        """Hash of a document's chunk texts, in order."""
+        digest = hashlib.sha256()
+        for chunk in chunks:
+            digest.update(content_hash(chunk.page_content).encode("ascii"))
+        return digest.hexdigest()
+
+    def _document_ids(self) -> List[str]:
+        if hasattr(self.database, "get_document_ids"):
+            return self.database.get_document_ids()
+        return [doc.id for doc in self.database.get_all_documents()]
+
+    def _get_document_takes_lists(self) -> bool:
+        """Whether database.get_document is annotated to accept a list of ids."""
+        params = list(inspect.signature(self.database.get_document).parameters.values())
+        if not params:
+            return False
+        annotation = params[0].annotation
+        if annotation is inspect.Parameter.empty:
+            return False
+        return "list" in str(annotation).lower()
+
+    def _load_documents(self, doc_ids: List[str]) -> List[SimbaDoc]:
+        if self._get_document_takes_lists():
+            docs = self.database.get_document(doc_ids)
+        else:
+            docs = [self.database.get_document(doc_id) for doc_id in doc_ids]
+        return [cast(SimbaDoc, doc) for doc in docs if doc is not None]
+
+    def embed_all_documents(
+        self,
+        batch_size: int = 50,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
         """
-        Embed all documents in the database into the vector store.
+        Embed the documents that are not embedded yet or whose content changed.
 
-        Returns:
-            List of embedded langchain documents
-        """
-        try:
-            # Get all documents from the database
-            all_documents = self.database.get_all_documents()
-            simba_documents = [cast(SimbaDoc, doc) for doc in all_documents]
-
-            # Convert to Langchain documents
-            langchain_documents = [
-                doc for simbadoc in simba_documents for doc in simbadoc.documents
-            ]
-
-            # Clean documents
-            langchain_documents = _clean_documents(langchain_documents)
-
-            # Add documents to vector store
-            self.vector_store.add_documents(langchain_documents)
+        Documents are loaded batch_size at a time. A document is checkpointed
+        by saving its content_hash and enabled flag right after its chunks are
+        written, so an interrupted run resumes where it stopped and a failing
+        document does not stop the others.
 
-            # Update enabled status for each document
-            for doc in simba_documents:
-                doc.metadata.enabled = True
-                self.database.update_document(doc.id, doc)
+        Args:
+            batch_size: Documents loaded and embedded per batch
+            progress_callback: Called with the progress dict after each batch
 
-            return langchain_documents
-        except Exception as e:
-            logger.error(f"Error embedding all documents: {str(e)}")
-            raise
+        Returns:
+            Counts of processed, embedded, skipped and failed documents,
+            embedded chunks and throughput
+        """
+        start = time.perf_counter()
+        doc_ids = self._document_ids()
+        progress: Dict[str, Any] = {
+            "total": len(doc_ids),
+            "processed": 0,
+            "embedded": 0,
+            "skipped": 0,
+            "failed": 0,
+            "chunks": 0,
+            "chunks_per_sec": 0.0,
+            "failed_ids": [],
+        }
+
+        for offset in range(0, len(doc_ids), batch_size):
+            for simbadoc in self._load_documents(doc_ids[offset:offset + batch_size]):
+                chunks = _clean_documents(simbadoc.documents)
+                current_hash = self._content_hash(chunks)
+                if simbadoc.metadata.enabled and simbadoc.metadata.content_hash == current_hash:
+                    progress["skipped"] += 1
+                    continue
+                try:
+                    self.vector_store.replace_documents(chunks, document_id=simbadoc.id)
+                    simbadoc.metadata.enabled = True
+                    simbadoc.metadata.content_hash = current_hash
+                    self.database.update_document(simbadoc.id, simbadoc)
+                    progress["embedded"] += 1
+                    progress["chunks"] += len(chunks)
+                except Exception as e:
+                    logger.error(f"Error embedding document {simbadoc.id}: {str(e)}")
+                    progress["failed"] += 1
+                    progress["failed_ids"].append(simbadoc.id)
+
+            progress["processed"] = min(offset + batch_size, len(doc_ids))
+            elapsed = time.perf_counter() - start
+            progress["chunks_per_sec"] = progress["chunks"] / elapsed if elapsed else 0.0
+            logger.info(
+                f"Embedding documents: {progress['processed']}/{progress['total']} "
+                f"processed, {progress['embedded']} embedded, "
+                f"{progress['skipped']} unchanged, {progress['failed']} failed, "
+                f"{progress['chunks_per_sec']:.1f} chunks/s"
+            )
+            if progress_callback:
+                progress_callback(dict(progress))
+
+        progress["seconds"] = time.perf_counter() - start
+        return progress
 
     def embed_document(self, doc_id: str) -> List[Document]:
         """
@@ -68,10 +137,11 @@ class EmbeddingService:
             if not simbadoc:
                 raise ValueError(f"Document {doc_id} not found")
 
-            langchain_documents = simbadoc.documents
+            # Hashed like embed_all_documents does, so it skips this document
+            chunks = _clean_documents(simbadoc.documents)
+            current_hash = self._content_hash(chunks)
 
-            langchain_documents = self.splitter.split_document(
-                langchain_documents)
+            langchain_documents = self.splitter.split_document(chunks)
             try:
                 # Add documents to vector store
                 self.vector_store.add_documents(
@@ -80,6 +150,7 @@ class EmbeddingService:
 
                 # Update document status
                 simbadoc.metadata.enabled = True
+                simbadoc.metadata.content_hash = current_hash
                 self.database.update_document(doc_id, simbadoc)
 
             except ValueError as ve:
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from langchain.schema.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    is_query: bool
+    future: Future = field(default_factory=Future)
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """
+    Coalesces concurrent embedding calls into shared forward passes.
+
+    Calls from all threads and event loops are queued and a single worker
+    thread embeds them, so the wrapped model is only ever called from one
+    thread (tokenizers such as HF's fast tokenizer are not thread safe). The
+    worker takes the first waiting request, keeps collecting requests of the
+    same kind for up to max_wait_ms or until max_batch_size texts are
+    gathered, and embeds them in one call to the wrapped model. Queries and
+    documents are queued separately, since some models encode them
+    differently, and queries are served first. Document lists are queued in
+    max_batch_size slices, so a large ingest call waits its turn between
+    slices instead of holding the model for its whole length.
+    Any other attribute is looked up on the wrapped embeddings object.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5,
+    ):
+        """
+        Args:
+            embeddings: Embeddings to batch calls for
+            max_batch_size: Texts per forward pass
+            max_wait_ms: How long the first request of a batch waits for company
+        """
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self._queries: Deque[_Request] = deque()
+        self._documents: Deque[_Request] = deque()
+        self._ready = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+        self._worker = threading.Thread(
+            target=self._run, name="embedding-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not found on the wrapper itself
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _submit(self, texts: List[str], is_query: bool) -> Future:
+        request = _Request(texts, is_query)
+        with self._ready:
+            (self._queries if is_query else self._documents).append(request)
+            self._ready.notify()
+        return request.future
+
+    def _submit_documents(self, texts: List[str]) -> List[Future]:
+        return [
+            self._submit(texts[start:start + self.max_batch_size], is_query=False)
+            for start in range(0, len(texts), self.max_batch_size)
+        ]
+
+    @staticmethod
+    def _pop(pending: Deque[_Request]) -> Optional[_Request]:
+        """Next queued request that has not been cancelled (e.g. by an
+        asyncio.wait_for deadline), None once the queue is empty."""
+        while pending:
+            request = pending.popleft()
+            if request.future.set_running_or_notify_cancel():
+                return request
+        return None
+
+    def _collect(self) -> List[_Request]:
+        """
+        Next batch: the first waiting query, or document slice when no query
+        waits, then requests of the same kind arriving before the batch is
+        full or max_wait_ms has passed. A document batch stops waiting as
+        soon as a query is queued.
+        """
+        with self._ready:
+            while True:
+                first = self._pop(self._queries) or self._pop(self._documents)
+                if first is not None:
+                    break
+                self._ready.wait()
+
+            pending = self._queries if first.is_query else self._documents
+            batch = [first]
+            size = len(first.texts)
+            deadline = time.monotonic() + self.max_wait_s
+            while size < self.max_batch_size:
+                if not first.is_query and self._queries:
+                    break
+                if not pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+                    continue
+                if size + len(pending[0].texts) > self.max_batch_size:
+                    break
+                request = self._pop(pending)
+                if request is not None:
+                    batch.append(request)
+                    size += len(request.texts)
+            return batch
+
+    def _embed_queries(self, texts: List[str]) -> List[List[float]]:
+        # Models with query-specific encoding (e.g. an instruction prefix)
+        # must keep going through embed_query
+        if getattr(self.embeddings, "query_encode_kwargs", None):
+            return [self.embeddings.embed_query(text) for text in texts]
+        return self.embeddings.embed_documents(texts)
+
+    def _run(self) -> None:
+        while True:
+            # The worker must outlive any failure, or every later call hangs
+            try:
+                self._process(self._collect())
+            except Exception:
+                logger.exception("Embedding batch worker error")
+
+    def _process(self, batch: List[_Request]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        try:
+            if batch[0].is_query:
+                vectors = self._embed_queries(texts)
+            else:
+                vectors = self.embeddings.embed_documents(texts)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in batch:
+            request.future.set_result(vectors[offset:offset + len(request.texts)])
+            offset += len(request.texts)
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.batched_texts += len(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        futures = self._submit_documents(texts)
+        return [vector for future in futures for vector in future.result()]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._submit([text], is_query=True).result()[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        futures = self._submit_documents(texts)
+        slices = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+        return [vector for vectors in slices for vector in vectors]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vectors = await asyncio.wrap_future(self._submit([text], is_query=True))
+        return vectors[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._ready:
+            queued = len(self._queries) + len(self._documents)
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": self.batched_texts / self.batches if self.batches else 0.0,
+                "queued": queued,
+            }
@@ -0,0 +1,283 @@
+"""
+ONNX Runtime backend for sentence-transformers models (provider "huggingface-onnx").
+
+The model is exported once from its PyTorch weights to ONNX (and, with
+quantize, to a dynamically int8-quantized copy) under the onnx cache
+directory, then served by ONNX Runtime on CPU. Pooling, normalization and
+truncation follow the model's sentence-transformers configuration so the
+vectors match HuggingFaceEmbeddings; check with parity_check() or
+
+    python -m services.embeddings.onnx_embeddings --parity
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import onnxruntime as ort
+from langchain.schema.embeddings import Embeddings
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARITY_TEXTS = [
+    "What is the refund policy for annual subscriptions?",
+    "Les documents numérisés sont indexés chaque nuit.",
+    "a",
+    "FAISS and pgvector both support approximate nearest neighbour search "
+    "over dense embeddings, with different trade-offs in recall and memory.",
+]
+
+
+def _load_st_config(model_dir: Path) -> Dict[str, Any]:
+    """Pooling mode, normalization and max length from the sentence-transformers files."""
+    config = {"pooling": "mean", "normalize": False, "max_seq_length": None}
+
+    modules_path = model_dir / "modules.json"
+    if modules_path.exists():
+        modules = json.loads(modules_path.read_text())
+        for module in modules:
+            if module["type"].endswith("Normalize"):
+                config["normalize"] = True
+            if module["type"].endswith("Pooling"):
+                pooling_path = model_dir / module["path"] / "config.json"
+                if pooling_path.exists():
+                    pooling = json.loads(pooling_path.read_text())
+                    if pooling.get("pooling_mode_cls_token"):
+                        config["pooling"] = "cls"
+                    elif pooling.get("pooling_mode_max_tokens"):
+                        config["pooling"] = "max"
+
+    st_path = model_dir / "sentence_bert_config.json"
+    if st_path.exists():
+        config["max_seq_length"] = json.loads(st_path.read_text()).get("max_seq_length")
+    return config
+
+
+def _replace_atomically(output_path: Path, write) -> None:
+    """
+    Call write with a temporary path next to output_path, then rename it.
+
+    Workers that start together may export the same model; none of them can
+    see a half-written file under output_path.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def export_onnx(model_dir: Path, output_path: Path, opset: int = 17) -> None:
+    """Export the transformer of a sentence-transformers model to ONNX."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModel.from_pretrained(model_dir).eval()
+    sample = tokenizer(["hello world"], return_tensors="pt")
+    input_names = [
+        name
+        for name in ("input_ids", "attention_mask", "token_type_ids")
+        if name in sample
+    ]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    def write(path: Path) -> None:
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (),
+                str(path),
+                kwargs={name: sample[name] for name in input_names},
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=opset,
+                # TorchScript exporter: takes dynamic_axes, no onnxscript needed
+                dynamo=False,
+            )
+
+    _replace_atomically(output_path, write)
+    logger.info(f"Exported {model_dir} to {output_path}")
+
+
+def quantize_onnx(input_path: Path, output_path: Path) -> None:
+    """Dynamic int8 quantization of the weights (activations stay fp32)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    _replace_atomically(
+        output_path,
+        lambda path: quantize_dynamic(
+            str(input_path), str(path), weight_type=QuantType.QInt8
+        ),
+    )
+    logger.info(f"Quantized {input_path} to {output_path}")
+
+
+class ONNXEmbeddings(Embeddings):
+    def __init__(
+        self,
+        model_name: str,
+        quantize: bool = False,
+        intra_op_num_threads: Optional[int] = None,
+        inter_op_num_threads: Optional[int] = None,
+        batch_size: int = 32,
+        cache_dir: Optional[str] = None,
+        **kwargs: Any,
+    ):
+        """
+        Args:
+            model_name: sentence-transformers model on the HuggingFace hub
+            quantize: Serve the dynamically int8-quantized model
+            intra_op_num_threads: Threads per operator (default: ONNX Runtime's)
+            inter_op_num_threads: Threads across operators
+            batch_size: Texts per forward pass
+            cache_dir: Where exported models are kept (default: <base_dir>/models/onnx)
+        """
+        from huggingface_hub import snapshot_download
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.quantize = quantize
+        self.batch_size = batch_size
+
+        self.model_dir = Path(snapshot_download(model_name))
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        st_config = _load_st_config(self.model_dir)
+        self.pooling = st_config["pooling"]
+        self.normalize = st_config["normalize"]
+        self.max_seq_length = st_config["max_seq_length"] or self.tokenizer.model_max_length
+
+        cache_root = Path(cache_dir) if cache_dir else settings.paths.base_dir / "models" / "onnx"
+        export_dir = cache_root / re.sub(r"[^\w.-]", "_", model_name)
+        self.model_path = export_dir / "model.onnx"
+        if not self.model_path.exists():
+            export_onnx(self.model_dir, self.model_path)
+        if quantize:
+            quantized_path = export_dir / "model.int8.onnx"
+            if not quantized_path.exists():
+                quantize_onnx(self.model_path, quantized_path)
+            self.model_path = quantized_path
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_num_threads:
+            options.intra_op_num_threads = intra_op_num_threads
+        if inter_op_num_threads:
+            options.inter_op_num_threads = inter_op_num_threads
+        self.session = ort.InferenceSession(
+            str(self.model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+        logger.info(
+            f"Loaded ONNX embeddings {model_name} from {self.model_path} "
+            f"(pooling={self.pooling}, normalize={self.normalize})"
+        )
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        inputs = {
+            name: value.astype(np.int64)
+            for name, value in encoded.items()
+            if name in self._input_names
+        }
+        hidden = self.session.run(None, inputs)[0]
+        mask = encoded["attention_mask"][..., None].astype(hidden.dtype)
+
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        elif self.pooling == "max":
+            pooled = np.where(mask > 0, hidden, -1e9).max(axis=1)
+        else:
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            pooled = pooled / np.clip(norms, 1e-12, None)
+        return pooled
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Similar lengths in a batch pad to a similar length
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            vectors[batch] = self._encode([texts[i] for i in batch])
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+    def parity_check(
+        self, texts: Optional[List[str]] = None, min_cosine: float = 0.99
+    ) -> Dict[str, Any]:
+        """
+        Compare against the PyTorch HuggingFaceEmbeddings output of the same model.
+
+        fp32 exports typically agree to ~1e-5; int8 quantized models trade a
+        little accuracy, hence the cosine rather than an exact tolerance.
+        """
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        texts = texts or PARITY_TEXTS
+        reference = np.asarray(
+            HuggingFaceEmbeddings(
+                model_name=self.model_name, model_kwargs={"device": "cpu"}
+            ).embed_documents(texts)
+        )
+        candidate = np.asarray(self.embed_documents(texts))
+
+        cosines = (reference * candidate).sum(axis=1) / (
+            np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+        )
+        result = {
+            "model": self.model_name,
+            "quantized": self.quantize,
+            "max_abs_diff": float(np.abs(reference - candidate).max()),
+            "min_cosine": float(cosines.min()),
+            "passed": bool(cosines.min() >= min_cosine),
+        }
+        logger.info(f"ONNX parity check: {result}")
+        return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export and check ONNX embeddings")
+    parser.add_argument("--model", default=settings.embedding.model_name)
+    parser.add_argument("--quantize", action="store_true")
+    parser.add_argument("--parity", action="store_true", help="compare with PyTorch")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    embeddings = ONNXEmbeddings(
+        args.model, quantize=args.quantize, intra_op_num_threads=os.cpu_count()
+    )
+    if args.parity:
+        result = embeddings.parity_check(min_cosine=args.min_cosine)
+        print(json.dumps(result, indent=2))
+        raise SystemExit(0 if result["passed"] else 1)
+    print(f"Model ready at {embeddings.model_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from langchain.schema.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str, lowercase: bool = True) -> str:
+    """Normalize unicode and whitespace so near-identical texts share a key."""
+    text = " ".join(unicodedata.normalize("NFKC", text).split())
+    return text.lower() if lowercase else text
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded, thread-safe cache of query embeddings with TTL and LRU eviction.
+
+    Entries live in an in-memory LRU and, optionally, in a SQLite file that
+    several processes on the same host can share. Expired rows of the file
+    are purged on writes, at most once per ttl_seconds.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600,
+        disk_path: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Args:
+            max_entries: Maximum number of embeddings kept in memory
+            ttl_seconds: Time to live of an entry, in memory and on disk
+            disk_path: Optional SQLite file used as a shared second tier
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._disk = None
+        self._next_purge = 0.0
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._disk = sqlite3.connect(
+                str(disk_path), check_same_thread=False, isolation_level=None
+            )
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    key TEXT PRIMARY KEY,
+                    embedding BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    @staticmethod
+    def make_key(provider: str, model: str, text: str, lowercase: bool = False) -> str:
+        payload = f"{provider}\x00{model}\x00{normalize_text(text, lowercase)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, embedding = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(embedding)
+                del self._entries[key]
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT embedding, expires_at FROM query_embeddings WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    embedding = array("d")
+                    embedding.frombytes(row[0])
+                    self._put_memory(key, row[1], embedding)
+                    self.disk_hits += 1
+                    return list(embedding)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, embedding: List[float]) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        vector = array("d", embedding)
+        with self._lock:
+            self._put_memory(key, expires_at, vector)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?)",
+                    (key, vector.tobytes(), expires_at),
+                )
+                if now >= self._next_purge:
+                    self._purge_disk(now)
+
+    def _put_memory(self, key: str, expires_at: float, vector: array) -> None:
+        self._entries[key] = (expires_at, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM query_embeddings")
+
+    def purge_expired(self) -> None:
+        """Drop expired entries from the disk tier."""
+        if self._disk is not None:
+            with self._lock:
+                self._purge_disk(time.time())
+
+    def _purge_disk(self, now: float) -> None:
+        self._disk.execute("DELETE FROM query_embeddings WHERE expires_at <= ?", (now,))
+        self._next_purge = now + self.ttl_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper serving embed_query from a QueryEmbeddingCache.
+
+    The query is embedded in the normalized form its cache key is built from,
+    so texts sharing a key always get the same vector. Document embeddings
+    are passed through untouched. Any other attribute is looked up on the
+    wrapped embeddings object.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: QueryEmbeddingCache,
+        provider: str,
+        model: str,
+        lowercase: bool = False,
+    ):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.provider = provider
+        self.model = model
+        self.lowercase = lowercase
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not found on the wrapper itself
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _normalized_key(self, text: str) -> Tuple[str, str]:
+        text = normalize_text(text, self.lowercase)
+        return text, self.cache.make_key(self.provider, self.model, text, self.lowercase)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        text, key = self._normalized_key(text)
+        embedding = self.cache.get(key)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(text)
+            self.cache.put(key, embedding)
+        return embedding
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        text, key = self._normalized_key(text)
+        embedding = self.cache.get(key)
+        if embedding is None:
+            embedding = await self.embeddings.aembed_query(text)
+            self.cache.put(key, embedding)
+        return embedding
@@ -1,3 +1,4 @@
+import asyncio
 from typing import List, Optional
 
 from langchain.schema import Document
@@ -19,3 +20,13 @@ class DefaultRetriever(BaseRetriever):
         current_user_id = user.user.id
 
         return self.store.similarity_search(query, current_user_id)
+
+    async def aretrieve(self, query: str, user_id: str = None, **kwargs) -> List[Document]:
+        user = await asyncio.to_thread(supabase.auth.get_user)
+        current_user_id = user.user.id
+
+        if hasattr(self.store, "asimilarity_search"):
+            return await self.store.asimilarity_search(query, current_user_id)
+        return await asyncio.to_thread(
+            self.store.similarity_search, query, current_user_id
+        )
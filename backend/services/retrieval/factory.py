@@ -26,8 +26,14 @@ class RetrieverFactory:
         filtered_kwargs = {
             "vector_store": vector_store} if vector_store else {}
 
-        logger.warning(
-            "RerankedRetriever not implemented, falling back to DefaultRetriever")
+        if method == RetrievalMethod.RERANKED:
+            from core.config import settings
+            from services.retrieval.reranked import RerankedRetriever
+            params = {"k": settings.retrieval.k, **settings.retrieval.params, **kwargs}
+            return RerankedRetriever(**filtered_kwargs, **params)
+        if method != RetrievalMethod.DEFAULT:
+            logger.warning(
+                f"{method.value} retriever not implemented, falling back to DefaultRetriever")
         return DefaultRetriever(**filtered_kwargs)
 
     @staticmethod
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from services.auth.supabase_client import get_supabase_client
+from services.retrieval.base import BaseRetriever
+from services.vector_store.vector_store_service import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderScorer:
+    """
+    Process-wide cross-encoder with an LRU cache of (query, chunk id) scores.
+
+    Retrievers are created per request, so the loaded model and the cache
+    are shared through get() instead of living on the retriever.
+    """
+
+    _instances: Dict[str, "CrossEncoderScorer"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, model_name: str, cache_size: int = 10000):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # CrossEncoder.predict is not safe to call from several threads at once
+        self._predict_lock = threading.Lock()
+        logger.info(f"Loaded cross-encoder {model_name}")
+
+    @classmethod
+    def get(cls, model_name: str, cache_size: int = 10000) -> "CrossEncoderScorer":
+        with cls._instances_lock:
+            scorer = cls._instances.get(model_name)
+            if scorer is None:
+                scorer = cls(model_name, cache_size)
+                cls._instances[model_name] = scorer
+            return scorer
+
+    def score(
+        self, query: str, documents: List[Document], batch_size: int = 32
+    ) -> List[float]:
+        """
+        Relevance of each document to the query, as a probability in [0, 1].
+
+        Only pairs missing from the cache go through the model, in batches of
+        batch_size.
+        """
+        keys = [(query, self._chunk_key(doc)) for doc in documents]
+        scores: List[Optional[float]] = []
+        with self._cache_lock:
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                scores.append(score)
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            pairs = [[query, documents[i].page_content] for i in missing]
+            with self._predict_lock:
+                logits = self.model.predict(
+                    pairs,
+                    batch_size=batch_size,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                )
+            probabilities = 1 / (1 + np.exp(-np.asarray(logits, dtype=np.float64)))
+
+            with self._cache_lock:
+                for i, probability in zip(missing, probabilities.tolist()):
+                    scores[i] = probability
+                    self._cache[keys[i]] = probability
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return scores
+
+    @staticmethod
+    def _chunk_key(doc: Document) -> str:
+        # Chunks without an id (other stores) are keyed by their content
+        return doc.metadata.get("id") or doc.page_content
+
+
+class RerankedRetriever(BaseRetriever):
+    """
+    Hybrid search candidates re-scored by a CPU cross-encoder.
+
+    The vector store returns up to candidate_k fused candidates, the
+    cross-encoder scores them against the query and the k best above
+    reranker_threshold are returned with their "rerank_score".
+    """
+
+    def __init__(
+        self,
+        vector_store: Optional[VectorStoreService] = None,
+        k: int = 5,
+        reranker_model: Optional[str] = None,
+        reranker_threshold: Optional[float] = None,
+        reranker_candidates: int = 50,
+        reranker_batch_size: int = 32,
+        reranker_cache_size: int = 10000,
+        **kwargs,
+    ):
+        super().__init__(vector_store)
+        self.default_k = k
+        # "colbert" was the config placeholder before rerankers existed
+        if not reranker_model or reranker_model == "colbert":
+            reranker_model = DEFAULT_RERANKER_MODEL
+        self.model_name = reranker_model
+        self.threshold = reranker_threshold
+        self.candidate_k = reranker_candidates
+        self.batch_size = reranker_batch_size
+        self.cache_size = reranker_cache_size
+
+    @property
+    def scorer(self) -> CrossEncoderScorer:
+        return CrossEncoderScorer.get(self.model_name, self.cache_size)
+
+    @staticmethod
+    def _current_user_id() -> str:
+        return get_supabase_client().auth.get_user().user.id
+
+    def _rerank(
+        self, query: str, candidates: List[Document], k: int
+    ) -> List[Document]:
+        if not candidates:
+            return []
+        candidates = candidates[: self.candidate_k]
+        scores = self.scorer.score(query, candidates, self.batch_size)
+
+        ranked = sorted(
+            zip(candidates, scores), key=lambda item: item[1], reverse=True
+        )
+        results = []
+        for doc, score in ranked:
+            if self.threshold is not None and score < self.threshold:
+                break
+            doc.metadata["rerank_score"] = score
+            results.append(doc)
+            if len(results) == k:
+                break
+        logger.debug(
+            f"Reranked {len(candidates)} candidates, kept {len(results)} "
+            f"(threshold={self.threshold})"
+        )
+        return results
+
+    def retrieve(self, query: str, user_id: str = None, **kwargs) -> List[Document]:
+        user_id = user_id or self._current_user_id()
+        k = kwargs.get("k", self.default_k)
+
+        candidates = self.store.similarity_search(
+            query, user_id, top_k=self.candidate_k
+        )
+        return self._rerank(query, candidates, k)
+
+    async def aretrieve(self, query: str, user_id: str = None, **kwargs) -> List[Document]:
+        user_id = user_id or await asyncio.to_thread(self._current_user_id)
+        k = kwargs.get("k", self.default_k)
+
+        if hasattr(self.store, "asimilarity_search"):
+            candidates = await self.store.asimilarity_search(
+                query, user_id, top_k=self.candidate_k
+            )
+        else:
+            candidates = await asyncio.to_thread(
+                self.store.similarity_search, query, user_id, top_k=self.candidate_k
+            )
+        # Scoring is CPU bound, keep it off the event loop
+        return await asyncio.to_thread(self._rerank, query, candidates, k)
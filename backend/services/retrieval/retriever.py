@@ -4,6 +4,7 @@ from langchain_community.retrievers import BM25Retriever
 from core.factories.vector_store_factory import VectorStoreFactory
 from services.retrieval.factory import RetrieverFactory, RetrievalMethod
 from services.auth.supabase_client import get_supabase_client
+import asyncio
 import logging
 from typing import Dict, Union
 logger = logging.getLogger(__name__)
@@ -41,6 +42,31 @@ class Retriever:
         supabase = get_supabase_client()
         user = supabase.auth.get_user()
         user_id = user.user.id
+        retriever = self._select(method, query)
+        if user_id is None:
+            logger.warning(
+                "retrieve() called without user_id - this is not secure for multi-tenant systems")
+        if user_id:
+            kwargs["user_id"] = user_id
+        docs = retriever.retrieve(query, **kwargs)
+        logger.debug(
+            f"Retrieved {len(docs)} documents using {type(retriever).__name__}")
+        return docs
+
+    async def aretrieve(self, query: str, method: Union[str, RetrievalMethod] = None, **kwargs):
+        """Async variant of retrieve, for the chat graph running on the event loop."""
+        supabase = get_supabase_client()
+        user = await asyncio.to_thread(supabase.auth.get_user)
+        user_id = user.user.id
+        retriever = self._select(method, query)
+        if user_id:
+            kwargs["user_id"] = user_id
+        docs = await retriever.aretrieve(query, **kwargs)
+        logger.debug(
+            f"Retrieved {len(docs)} documents using {type(retriever).__name__}")
+        return docs
+
+    def _select(self, method: Union[str, RetrievalMethod], query: str):
         if method:
             retriever = self.factory.get_retriever(
                 method, vector_store=self.store)
@@ -51,12 +77,4 @@ class Retriever:
             retriever = self.default_retriever
             logger.debug(
                 f"Using default retrieval strategy for query: {query[:50]}...")
-        if user_id is None:
-            logger.warning(
-                "retrieve() called without user_id - this is not secure for multi-tenant systems")
-        if user_id:
-            kwargs["user_id"] = user_id
-        docs = retriever.retrieve(query, **kwargs)
-        logger.debug(
-            f"Retrieved {len(docs)} documents using {type(retriever).__name__}")
-        return docs
+        return retriever
@@ -1,4 +1,5 @@
+from .async_pgvector import AsyncPGVectorStore
 from .pgvector import PGVectorStore
 from .vector_store_service import VectorStoreService
 
-__all__ = ["VectorStoreService", "PGVectorStore"]
+__all__ = ["VectorStoreService", "PGVectorStore", "AsyncPGVectorStore"]
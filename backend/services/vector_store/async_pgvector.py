@@ -0,0 +1,682 @@
+import asyncio
+import itertools
+import json
+import logging
+import re
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+from langchain_core.documents import Document
+from pgvector.asyncpg import register_vector
+
+from core.config import settings
+from core.factories.embeddings_factory import aembed_documents_cached
+from database.postgres import DateTimeEncoder
+from services.vector_store.bm25_cache import tenant_key
+from services.vector_store.pgvector import PGVectorStore, _elapsed_ms, _remaining_ms
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER_RE = re.compile(r"%s")
+
+
+def _to_asyncpg(sql: str) -> str:
+    """Rewrite psycopg2 %s placeholders as asyncpg's positional $n."""
+    counter = itertools.count(1)
+    return _PLACEHOLDER_RE.sub(lambda _: f"${next(counter)}", sql)
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Register the vector and jsonb codecs on every new pool connection."""
+    await register_vector(conn)
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=lambda value: json.dumps(value, cls=DateTimeEncoder),
+        decoder=json.loads,
+        schema="pg_catalog",
+    )
+
+
+class AsyncPGVectorStore(PGVectorStore):
+    """
+    PGVectorStore with native async retrieval and writes on an asyncpg pool.
+
+    The async methods (asimilarity_search, aadd_documents, adelete) never
+    block the event loop: queries go through asyncpg, query embeddings
+    through aembed_query, and only the in-memory BM25 lookup runs in a
+    thread. The synchronous API of PGVectorStore remains available for
+    Celery workers and scripts.
+    """
+
+    def __init__(self, embedding_dim: int = 3072, create_indexes: bool = True):
+        super().__init__(embedding_dim=embedding_dim, create_indexes=create_indexes)
+        # asyncpg pools are bound to the loop they were created on
+        self._pools: Dict[asyncio.AbstractEventLoop, asyncpg.Pool] = {}
+        self._pool_locks: Dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
+
+    async def _get_async_pool(self) -> asyncpg.Pool:
+        """
+        Get or create the asyncpg pool of the running event loop.
+
+        Each loop the store is used from gets its own pool. Pools of loops
+        that have since been closed are terminated when a new one is made.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is not None:
+            return pool
+
+        async with self._pool_locks.setdefault(loop, asyncio.Lock()):
+            if loop not in self._pools:
+                self._discard_closed_loops()
+                self._pools[loop] = await asyncpg.create_pool(
+                    user=settings.postgres.user,
+                    password=settings.postgres.password,
+                    host=settings.postgres.host,
+                    port=settings.postgres.port,
+                    database=settings.postgres.db,
+                    ssl=False,
+                    min_size=int(self._param("async_pool_min_size", 2)),
+                    max_size=int(self._param("async_pool_max_size", 10)),
+                    init=_init_connection,
+                )
+                logger.info("Created asyncpg connection pool")
+        return self._pools[loop]
+
+    @staticmethod
+    def _terminate(pool: asyncpg.Pool) -> None:
+        """Drop a pool's connections without its (closed) loop, best effort."""
+        try:
+            pool.terminate()
+        except Exception as e:
+            logger.debug(f"Could not terminate asyncpg pool: {e}")
+
+    def _discard_closed_loops(self) -> None:
+        for loop in [loop for loop in self._pools if loop.is_closed()]:
+            self._terminate(self._pools.pop(loop))
+            self._pool_locks.pop(loop, None)
+
+    async def aclose(self) -> None:
+        """Close the asyncpg pools (e.g. on application shutdown)."""
+        current = asyncio.get_running_loop()
+        pools, self._pools, self._pool_locks = self._pools, {}, {}
+        for loop, pool in pools.items():
+            if loop is current:
+                await pool.close()
+            elif loop.is_closed():
+                self._terminate(pool)
+            else:
+                # Closed on its own loop, still running in another thread
+                asyncio.run_coroutine_threadsafe(pool.close(), loop)
+
+    @asynccontextmanager
+    async def _aconnection(self, statement_timeout_ms: Optional[int] = None):
+        """
+        Borrow a pooled connection inside a transaction.
+
+        Args:
+            statement_timeout_ms: Cancel statements of this transaction that
+                run longer than this
+        """
+        pool = await self._get_async_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if statement_timeout_ms:
+                    await conn.execute(
+                        f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}"
+                    )
+                yield conn
+
+    async def _apgvector_version(self, conn: asyncpg.Connection) -> Tuple[int, ...]:
+        if self._vector_version is None:
+            version = await conn.fetchval(
+                "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+            )
+            self._vector_version = (
+                tuple(int(part) for part in re.findall(r"\d+", version))
+                if version
+                else (0,)
+            )
+        return self._vector_version
+
+    async def _aapply_ann_settings(
+        self, conn: asyncpg.Connection, options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Async counterpart of _apply_ann_settings."""
+        version = (
+            await self._apgvector_version(conn)
+            if options["iterative_scan"] != "off"
+            else None
+        )
+        statements, applied = self._ann_setting_statements(options, version)
+        for statement in statements:
+            await conn.execute(statement)
+        return applied
+
+    async def _aget_document_owner(self, document_id: str) -> Tuple[str, Optional[str]]:
+        """Return the (user_id, organization_id) of a parent document."""
+        pool = await self._get_async_pool()
+        row = await pool.fetchrow(
+            "SELECT user_id, organization_id FROM documents WHERE id = $1",
+            document_id,
+        )
+        if row is None:
+            raise ValueError(f"Parent document {document_id} not found")
+        organization_id = row["organization_id"]
+        return str(row["user_id"]), str(organization_id) if organization_id else None
+
+    async def aadd_documents(
+        self, documents: List[Document], document_id: str, upsert: bool = False
+    ) -> bool:
+        """
+        Add documents to the store without blocking the event loop.
+
+        Rows are sent with asyncpg's pipelined executemany in a single
+        transaction.
+
+        Args:
+            documents: Chunks to add
+            document_id: ID of the parent document
+            upsert: Overwrite chunks whose ID already exists instead of failing
+
+        Returns:
+            True if successful
+        """
+        try:
+            user_id, organization_id = await self._aget_document_owner(document_id)
+
+            for doc in documents:
+                doc.id = doc.id or str(uuid.uuid4())
+
+            texts = [doc.page_content for doc in documents]
+            embeddings = await aembed_documents_cached(self.embeddings, texts)
+
+            sql = """
+                INSERT INTO chunks_embeddings (id, document_id, user_id, data, embedding)
+                VALUES ($1, $2, $3, $4::jsonb, $5::vector)
+            """
+            if upsert:
+                sql += self._upsert_clause()
+
+            records = [
+                (
+                    doc.id,
+                    document_id,
+                    user_id,
+                    {"page_content": doc.page_content, "metadata": doc.metadata},
+                    embedding,
+                )
+                for doc, embedding in zip(documents, embeddings)
+            ]
+            async with self._aconnection() as conn:
+                await conn.executemany(sql, records)
+
+            keys = [tenant_key(user_id=user_id)]
+            if organization_id:
+                keys.append(tenant_key(organization_id=organization_id))
+            self._bm25_cache.add_documents(
+                keys,
+                [
+                    Document(
+                        page_content=doc.page_content,
+                        metadata={
+                            **doc.metadata,
+                            "id": doc.id,
+                            "document_id": document_id,
+                        },
+                    )
+                    for doc in documents
+                ],
+            )
+
+            logger.info(
+                f"Successfully added {len(documents)} chunks for document {document_id}"
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to add documents: {e}")
+            raise
+
+    async def adelete(self, document_id: str, user_id: Optional[str] = None) -> bool:
+        """
+        Delete every chunk of a document.
+
+        Args:
+            document_id: ID of the parent document
+            user_id: If given, only delete when the document belongs to this user
+
+        Returns:
+            True if successful
+        """
+        try:
+            async with self._aconnection() as conn:
+                if user_id is not None:
+                    owner = await conn.fetchval(
+                        "SELECT user_id FROM documents WHERE id = $1", document_id
+                    )
+                    if owner is None or str(owner) != str(user_id):
+                        raise ValueError(
+                            f"User {user_id} does not have access to document {document_id}"
+                        )
+                status = await conn.execute(
+                    "DELETE FROM chunks_embeddings WHERE document_id = $1", document_id
+                )
+
+            self._bm25_cache.remove_document(document_id)
+
+            logger.info(f"Successfully deleted {status.split()[-1]} chunks")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete documents: {e}")
+            return False
+
+    async def _aretrieve_with_text_search(
+        self,
+        query: str,
+        user_id: str,
+        top_k: int,
+        document_ids: Optional[List[str]] = None,
+        language: str = "french",
+        organization_id: Optional[str] = None,
+        statement_timeout_ms: Optional[int] = None,
+        with_scores: bool = False,
+    ) -> List[Document]:
+        """Async counterpart of _retrieve_with_text_search."""
+        sql, params = self._text_search_sql(
+            query, user_id, top_k, document_ids, language, organization_id
+        )
+        async with self._aconnection(statement_timeout_ms) as conn:
+            rows = await conn.fetch(_to_asyncpg(sql), *params)
+        return [self._row_to_document(row, with_scores) for row in rows]
+
+    async def _aretrieve_with_dense_vector(
+        self,
+        query_embedding: List[float],
+        user_id: str,
+        top_k: int,
+        organization_id: Optional[str] = None,
+        statement_timeout_ms: Optional[int] = None,
+        ann_options: Optional[Dict[str, Any]] = None,
+        ann_report: Optional[Dict[str, Any]] = None,
+        with_scores: bool = False,
+    ) -> List[Document]:
+        """Async counterpart of _retrieve_with_dense_vector."""
+        ann_options = ann_options or self._ann_options(top_k)
+        sql, params = self._dense_sql(
+            query_embedding,
+            user_id,
+            top_k,
+            organization_id=organization_id,
+            ann_options=ann_options,
+        )
+        sql = _to_asyncpg(sql)
+
+        async with self._aconnection(statement_timeout_ms) as conn:
+            report = await self._aapply_ann_settings(conn, ann_options)
+            rows = await conn.fetch(sql, *params)
+            report["ann_rows"] = len(rows)
+            report["exact_fallback"] = False
+
+            # A short result is only incomplete if the scope has more rows
+            short = len(rows) < top_k and ann_options["exact_fallback"]
+            if short:
+                count_sql, count_params = self._count_scope_sql(
+                    user_id, None, organization_id, top_k
+                )
+                short = await conn.fetchval(_to_asyncpg(count_sql), *count_params) > len(rows)
+            if short:
+                # Short ANN result: rerun as an exact scan
+                await conn.execute("SET LOCAL enable_indexscan = off")
+                rows = await conn.fetch(sql, *params)
+                report["exact_fallback"] = True
+                report["exact_rows"] = len(rows)
+
+        if ann_report is not None:
+            ann_report.update(report)
+        return [self._row_to_document(row, with_scores) for row in rows]
+
+    async def _asparse_leg(
+        self,
+        query: str,
+        user_id: str,
+        bm25_k: int,
+        language: str,
+        organization_id: Optional[str],
+        deadline: float,
+        with_scores: bool = False,
+    ) -> Tuple[List[Document], Dict[str, float]]:
+        """BM25 first pass (in a thread) followed by PostgreSQL text search."""
+        timings = {}
+        start = time.perf_counter()
+        bm25_doc_ids = await asyncio.to_thread(
+            self._retrieve_with_bm25, query, user_id, bm25_k, organization_id
+        )
+        timings["bm25_ms"] = _elapsed_ms(start)
+
+        start = time.perf_counter()
+        results = await self._aretrieve_with_text_search(
+            query=query,
+            user_id=user_id,
+            top_k=bm25_k,
+            document_ids=bm25_doc_ids,
+            language=language,
+            organization_id=organization_id,
+            statement_timeout_ms=_remaining_ms(deadline),
+            with_scores=with_scores,
+        )
+        timings["text_search_ms"] = _elapsed_ms(start)
+        return results, timings
+
+    async def _adense_leg(
+        self,
+        query: str,
+        user_id: str,
+        dense_k: int,
+        organization_id: Optional[str],
+        deadline: float,
+        ann_options: Dict[str, Any],
+        ann_report: Dict[str, Any],
+        with_scores: bool = False,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Tuple[List[Document], Dict[str, float]]:
+        """Query embedding (unless given) followed by the vector similarity query."""
+        timings = {}
+        if query_embedding is None:
+            start = time.perf_counter()
+            query_embedding = await self.embeddings.aembed_query(query)
+            timings["embed_ms"] = _elapsed_ms(start)
+
+        start = time.perf_counter()
+        results = await self._aretrieve_with_dense_vector(
+            query_embedding,
+            user_id=user_id,
+            top_k=dense_k,
+            organization_id=organization_id,
+            statement_timeout_ms=_remaining_ms(deadline),
+            ann_options=ann_options,
+            ann_report=ann_report,
+            with_scores=with_scores,
+        )
+        timings["vector_search_ms"] = _elapsed_ms(start)
+        return results, timings
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        user_id: str = "1",
+        top_k: int = 200,
+        bm25_k: int = 100,
+        dense_k: int = 100,
+        use_bm25_first_pass: bool = True,
+        language: str = "french",
+        organization_id: Optional[str] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        """
+        Async hybrid search, same arguments and results as similarity_search.
+        """
+        results, timings = await self.asimilarity_search_with_timings(
+            query,
+            user_id=user_id,
+            top_k=top_k,
+            bm25_k=bm25_k,
+            dense_k=dense_k,
+            use_bm25_first_pass=use_bm25_first_pass,
+            language=language,
+            organization_id=organization_id,
+            **kwargs,
+        )
+        logger.debug(f"Async hybrid search timings: {timings}")
+        return results
+
+    async def asimilarity_search_with_timings(
+        self,
+        query: str,
+        user_id: str = "1",
+        top_k: int = 200,
+        bm25_k: int = 100,
+        dense_k: int = 100,
+        use_bm25_first_pass: bool = True,
+        language: str = "french",
+        organization_id: Optional[str] = None,
+        sparse_deadline_ms: Optional[int] = None,
+        dense_deadline_ms: Optional[int] = None,
+        hybrid_mode: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        exact_fallback: Optional[bool] = None,
+        quantization: Optional[str] = None,
+        with_scores: bool = False,
+        diversify: Optional[bool] = None,
+        diversify_k: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
+        dedup_threshold: Optional[float] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        """
+        Async counterpart of similarity_search_with_timings.
+
+        The legs run as concurrent tasks on separate pooled connections, each
+        bounded by its deadline; see similarity_search_with_timings for the
+        arguments and the timings returned.
+        """
+        start = time.perf_counter()
+        diversify_options = self._diversify_options(
+            top_k, diversify, diversify_k, mmr_lambda, dedup_threshold
+        )
+        # Embedded once for the dense leg and MMR
+        query_embedding, embed_ms = None, None
+        if diversify_options:
+            embed_start = time.perf_counter()
+            query_embedding = await self.embeddings.aembed_query(query)
+            embed_ms = _elapsed_ms(embed_start)
+        results, timings = await self._ahybrid_search_with_timings(
+            query,
+            user_id=user_id,
+            top_k=top_k,
+            bm25_k=bm25_k,
+            dense_k=dense_k,
+            use_bm25_first_pass=use_bm25_first_pass,
+            language=language,
+            organization_id=organization_id,
+            sparse_deadline_ms=sparse_deadline_ms,
+            dense_deadline_ms=dense_deadline_ms,
+            hybrid_mode=hybrid_mode,
+            ef_search=ef_search,
+            iterative_scan=iterative_scan,
+            exact_fallback=exact_fallback,
+            quantization=quantization,
+            with_scores=with_scores,
+            query_embedding=query_embedding,
+        )
+        if embed_ms is not None:
+            timings["embed_ms"] = embed_ms
+        if diversify_options and results:
+            diversify_start = time.perf_counter()
+            sql, params = self._embeddings_sql(results, user_id, organization_id)
+            async with self._aconnection() as conn:
+                rows = await conn.fetch(_to_asyncpg(sql), *params)
+            vectors = {row["id"]: row["embedding"] for row in rows}
+            timings["diversified_from"] = len(results)
+            results = self._diversify(
+                results, query_embedding, vectors, diversify_options
+            )
+            timings["diversify_ms"] = _elapsed_ms(diversify_start)
+            timings["total_ms"] = _elapsed_ms(start)
+        return results, timings
+
+    async def _ahybrid_search_with_timings(
+        self,
+        query: str,
+        user_id: str = "1",
+        top_k: int = 200,
+        bm25_k: int = 100,
+        dense_k: int = 100,
+        use_bm25_first_pass: bool = True,
+        language: str = "french",
+        organization_id: Optional[str] = None,
+        sparse_deadline_ms: Optional[int] = None,
+        dense_deadline_ms: Optional[int] = None,
+        hybrid_mode: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        exact_fallback: Optional[bool] = None,
+        quantization: Optional[str] = None,
+        with_scores: bool = False,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        """Async hybrid search without diversification."""
+        start = time.perf_counter()
+        sparse_deadline_ms = sparse_deadline_ms or self._param(
+            "sparse_deadline_ms", 2000
+        )
+        dense_deadline_ms = dense_deadline_ms or self._param("dense_deadline_ms", 5000)
+        hybrid_mode = hybrid_mode or self._param("hybrid_mode", "client")
+        ann_options = self._ann_options(
+            dense_k,
+            ef_search=ef_search,
+            iterative_scan=iterative_scan,
+            exact_fallback=exact_fallback,
+            quantization=quantization,
+        )
+
+        if hybrid_mode == "server":
+            return await self._aserver_hybrid_search(
+                query,
+                user_id=user_id,
+                top_k=top_k,
+                sparse_k=bm25_k,
+                dense_k=dense_k,
+                use_text_search=use_bm25_first_pass,
+                language=language,
+                organization_id=organization_id,
+                deadline_ms=max(sparse_deadline_ms, dense_deadline_ms),
+                ann_options=ann_options,
+                with_scores=with_scores,
+                query_embedding=query_embedding,
+            )
+        if hybrid_mode != "client":
+            raise ValueError(f"Unsupported hybrid mode: {hybrid_mode}")
+
+        ann_report: Dict[str, Any] = {}
+        legs = {}
+        if use_bm25_first_pass:
+            legs["sparse"] = asyncio.wait_for(
+                self._asparse_leg(
+                    query,
+                    user_id,
+                    bm25_k,
+                    language,
+                    organization_id,
+                    start + sparse_deadline_ms / 1000,
+                    with_scores,
+                ),
+                timeout=sparse_deadline_ms / 1000,
+            )
+        legs["dense"] = asyncio.wait_for(
+            self._adense_leg(
+                query,
+                user_id,
+                dense_k,
+                organization_id,
+                start + dense_deadline_ms / 1000,
+                ann_options,
+                ann_report,
+                with_scores,
+                query_embedding,
+            ),
+            timeout=dense_deadline_ms / 1000,
+        )
+
+        timings: Dict[str, Any] = {
+            "timed_out": [],
+            "failed": [],
+            "mode": "client",
+            "ann": ann_report,
+        }
+        results: Dict[str, List[Document]] = {}
+        outcomes = await asyncio.gather(*legs.values(), return_exceptions=True)
+        for name, outcome in zip(legs, outcomes):
+            if isinstance(
+                outcome, (asyncio.TimeoutError, asyncpg.exceptions.QueryCanceledError)
+            ):
+                timings["timed_out"].append(name)
+                logger.warning(f"{name} retrieval leg missed its deadline")
+            elif isinstance(outcome, BaseException):
+                timings["failed"].append(name)
+                logger.error(f"{name} retrieval leg failed: {outcome}")
+            else:
+                docs, leg_timings = outcome
+                results[name] = docs
+                timings.update(leg_timings)
+                timings[f"{name}_ms"] = sum(leg_timings.values())
+
+        if not results and timings["failed"] and not timings["timed_out"]:
+            raise RuntimeError(f"All retrieval legs failed for query: {query[:50]}")
+
+        fusion_start = time.perf_counter()
+        fused_results = self._fuse_legs(results, top_k, with_scores)
+        timings["fusion_ms"] = _elapsed_ms(fusion_start)
+        timings["total_ms"] = _elapsed_ms(start)
+
+        return fused_results, timings
+
+    async def _aserver_hybrid_search(
+        self,
+        query: str,
+        user_id: str,
+        top_k: int,
+        sparse_k: int,
+        dense_k: int,
+        use_text_search: bool,
+        language: str,
+        organization_id: Optional[str],
+        deadline_ms: int,
+        ann_options: Dict[str, Any],
+        with_scores: bool = False,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        """Async counterpart of _server_hybrid_search."""
+        start = time.perf_counter()
+        deadline = start + deadline_ms / 1000
+        ann_report: Dict[str, Any] = {}
+        timings: Dict[str, Any] = {
+            "timed_out": [],
+            "failed": [],
+            "mode": "server",
+            "ann": ann_report,
+        }
+
+        if query_embedding is None:
+            query_embedding = await self.embeddings.aembed_query(query)
+            timings["embed_ms"] = _elapsed_ms(start)
+
+        sql, params = self._server_rrf_sql(
+            query,
+            user_id,
+            top_k,
+            sparse_k,
+            dense_k,
+            query_embedding,
+            language,
+            organization_id,
+            use_text_search,
+            ann_options=ann_options,
+        )
+
+        query_start = time.perf_counter()
+        try:
+            async with self._aconnection(_remaining_ms(deadline)) as conn:
+                ann_report.update(await self._aapply_ann_settings(conn, ann_options))
+                rows = await conn.fetch(_to_asyncpg(sql), *params)
+            results = [self._row_to_document(row, with_scores) for row in rows]
+        except asyncpg.exceptions.QueryCanceledError:
+            logger.warning("Server-side hybrid query missed its deadline")
+            timings["timed_out"].append("hybrid")
+            results = []
+        timings["hybrid_query_ms"] = _elapsed_ms(query_start)
+        timings["total_ms"] = _elapsed_ms(start)
+        return results, timings
@@ -0,0 +1,368 @@
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from langchain_community.retrievers import BM25Retriever
+from langchain_community.retrievers.bm25 import default_preprocessing_func
+from langchain_core.documents import Document
+from rank_bm25 import BM25Okapi
+
+logger = logging.getLogger(__name__)
+
+# ("user", user_id) or ("org", organization_id)
+TenantKey = Tuple[str, str]
+
+
+def tenant_key(
+    user_id: Optional[str] = None, organization_id: Optional[str] = None
+) -> TenantKey:
+    """Build the cache key for a user or organization scope."""
+    if organization_id:
+        return ("org", str(organization_id))
+    if user_id:
+        return ("user", str(user_id))
+    raise ValueError("Either user_id or organization_id is required")
+
+
+class _BM25Entry:
+    """Tokenized corpus and BM25 index for a single tenant."""
+
+    def __init__(self, key: TenantKey):
+        self.key = key
+        self.docs: Dict[str, Document] = {}
+        self.tokens: Dict[str, List[str]] = {}
+        self.sizes: Dict[str, int] = {}
+        self.by_document: Dict[str, Set[str]] = {}
+        self.retriever: Optional[BM25Retriever] = None
+        self.size_bytes = 0
+        self.version = 0
+        self.built_version = -1
+        self.rebuild_scheduled = False
+        # Corpus state in the database when loaded, see BM25Cache.fingerprint
+        self.fingerprint: Any = None
+        self.checked_at = 0.0
+
+    @property
+    def dirty(self) -> bool:
+        return self.built_version != self.version
+
+    def add(self, doc: Document) -> None:
+        chunk_id = doc.metadata.get("id")
+        if chunk_id is None:
+            return
+        self.remove_chunk(chunk_id)
+
+        tokens = default_preprocessing_func(doc.page_content)
+        size = sys.getsizeof(doc.page_content) + 2 * sum(
+            sys.getsizeof(t) for t in tokens
+        )
+        self.docs[chunk_id] = doc
+        self.tokens[chunk_id] = tokens
+        self.sizes[chunk_id] = size
+        self.size_bytes += size
+
+        document_id = doc.metadata.get("document_id")
+        if document_id is not None:
+            self.by_document.setdefault(document_id, set()).add(chunk_id)
+        self.version += 1
+
+    def remove_chunk(self, chunk_id: str) -> None:
+        doc = self.docs.pop(chunk_id, None)
+        if doc is None:
+            return
+        self.tokens.pop(chunk_id, None)
+        self.size_bytes -= self.sizes.pop(chunk_id, 0)
+
+        document_id = doc.metadata.get("document_id")
+        chunk_ids = self.by_document.get(document_id)
+        if chunk_ids is not None:
+            chunk_ids.discard(chunk_id)
+            if not chunk_ids:
+                del self.by_document[document_id]
+        self.version += 1
+
+    def remove_document(self, document_id: str) -> bool:
+        chunk_ids = self.by_document.get(document_id)
+        if not chunk_ids:
+            return False
+        for chunk_id in list(chunk_ids):
+            self.remove_chunk(chunk_id)
+        return True
+
+
+class BM25Cache:
+    """
+    Per-tenant BM25 index cache with LRU eviction under a memory cap.
+
+    Each tenant (user or organization) gets its own tokenized corpus, loaded
+    once from the vector store. Chunk additions and deletions are applied to
+    the cached corpus incrementally, and the BM25 index is rebuilt from the
+    cached tokens on a background thread, so queries never re-scan the
+    database or re-tokenize the corpus. Changes made by other processes are
+    caught by a periodic fingerprint check, which reloads the tenant.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[TenantKey], Iterable[Document]],
+        max_bytes: int = 512 * 1024 * 1024,
+        k1: float = 1.2,
+        b: float = 0.75,
+        warm_workers: int = 2,
+        fingerprint: Optional[Callable[[TenantKey], Any]] = None,
+        check_interval_s: float = 10.0,
+    ):
+        """
+        Args:
+            loader: Callable returning all chunks for a tenant key. Each
+                Document must carry "id" and "document_id" in its metadata.
+            max_bytes: Approximate memory budget shared by all cached tenants
+            k1: BM25 term frequency saturation parameter
+            b: BM25 length normalization parameter
+            warm_workers: Threads loading corpora for warm(), separate from
+                the rebuild thread so a slow load does not delay rebuilds
+            fingerprint: Callable returning a cheap summary of a tenant's
+                stored chunks (e.g. row count and last update). A cached
+                corpus whose fingerprint no longer matches was changed by
+                another process and is reloaded.
+            check_interval_s: Minimum time between fingerprint checks of a
+                tenant
+        """
+        self._loader = loader
+        self._fingerprint = fingerprint
+        self.check_interval_s = check_interval_s
+        self.max_bytes = max_bytes
+        self._bm25_params = {"k1": k1, "b": b}
+
+        self._entries: "OrderedDict[TenantKey, _BM25Entry]" = OrderedDict()
+        self._loading: Dict[TenantKey, threading.Event] = {}
+        self._pending: Dict[TenantKey, List[Tuple[str, object]]] = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="bm25-rebuild"
+        )
+        self._warm_executor = ThreadPoolExecutor(
+            max_workers=warm_workers, thread_name_prefix="bm25-warm"
+        )
+        self._warming: Set[TenantKey] = set()
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+
+    def search(self, key: TenantKey, query: str, k: int) -> List[Document]:
+        """
+        Return the top-k chunks for a query within a tenant.
+
+        If the index is being rebuilt after a mutation, the previous index is
+        served and hits for chunks that no longer exist are filtered out.
+        """
+        entry = self._get_entry(key)
+
+        with self._lock:
+            retriever = entry.retriever
+            live_docs = entry.docs
+            if retriever is not None and entry.dirty:
+                self._schedule_rebuild(entry)
+
+        if retriever is None:
+            if not live_docs:
+                return []
+            retriever = self._build(entry)
+            if retriever is None:
+                return []
+
+        processed_query = retriever.preprocess_func(query)
+        hits = retriever.vectorizer.get_top_n(processed_query, retriever.docs, n=k)
+        return [doc for doc in hits if doc.metadata.get("id") in live_docs]
+
+    def warm(self, key: TenantKey) -> None:
+        """Load a tenant's corpus in the background if it is not cached."""
+        with self._lock:
+            if key in self._entries or key in self._loading or key in self._warming:
+                return
+            self._warming.add(key)
+        self._warm_executor.submit(self._safe_get_entry, key)
+
+    def add_documents(self, keys: Iterable[TenantKey], docs: List[Document]) -> None:
+        """Apply newly written chunks to every cached tenant they belong to."""
+        self._apply(keys, "add", docs)
+
+    def remove_document(self, document_id: str) -> None:
+        """Drop all chunks of a parent document from every cached tenant."""
+        with self._lock:
+            keys = list(self._entries.keys()) + list(self._loading.keys())
+        self._apply(keys, "remove", document_id)
+
+    def remove_chunks(self, chunk_ids: List[str]) -> None:
+        """Drop individual chunks from every cached tenant."""
+        with self._lock:
+            keys = list(self._entries.keys()) + list(self._loading.keys())
+        self._apply(keys, "remove_chunks", chunk_ids)
+
+    def _apply(self, keys: Iterable[TenantKey], op: str, payload) -> None:
+        with self._lock:
+            for key in keys:
+                if key in self._loading:
+                    # Replayed once the in-flight load finishes
+                    self._pending.setdefault(key, []).append((op, payload))
+                    continue
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                changed = self._apply_op(entry, op, payload)
+                if changed:
+                    self._schedule_rebuild(entry)
+            self._evict()
+
+    @staticmethod
+    def _apply_op(entry: _BM25Entry, op: str, payload) -> bool:
+        if op == "add":
+            for doc in payload:
+                entry.add(doc)
+            return True
+        if op == "remove":
+            return entry.remove_document(payload)
+        if op == "remove_chunks":
+            removed = [chunk_id for chunk_id in payload if chunk_id in entry.docs]
+            for chunk_id in removed:
+                entry.remove_chunk(chunk_id)
+            return bool(removed)
+        raise ValueError(f"Unknown BM25 cache operation: {op}")
+
+    def _safe_get_entry(self, key: TenantKey) -> None:
+        try:
+            self._get_entry(key)
+        except Exception as e:
+            logger.error(f"Failed to warm BM25 cache for {key}: {e}")
+        finally:
+            with self._lock:
+                self._warming.discard(key)
+
+    def _check_due(self, entry: _BM25Entry) -> bool:
+        """Whether this caller should check the entry's fingerprint (under _lock)."""
+        if self._fingerprint is None:
+            return False
+        now = time.monotonic()
+        if now - entry.checked_at < self.check_interval_s:
+            return False
+        # Claimed here so concurrent searches do not all probe the database
+        entry.checked_at = now
+        return True
+
+    def _is_current(self, entry: _BM25Entry) -> bool:
+        try:
+            return self._fingerprint(entry.key) == entry.fingerprint
+        except Exception as e:
+            logger.warning(f"BM25 cache staleness check failed for {entry.key}: {e}")
+            return True
+
+    def _get_entry(self, key: TenantKey) -> _BM25Entry:
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    if not self._check_due(entry):
+                        return entry
+                else:
+                    loading = self._loading.get(key)
+                    if loading is None:
+                        loading = threading.Event()
+                        self._loading[key] = loading
+                        break
+            if entry is None:
+                # Another thread is loading this tenant, wait for it
+                loading.wait()
+                continue
+            if self._is_current(entry):
+                return entry
+            # Chunks were written or deleted by another process (worker,
+            # Celery task), drop the corpus and load it again
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            logger.info(f"BM25 corpus for {key} changed in the database, reloading")
+
+        entry = _BM25Entry(key)
+        try:
+            # Taken before loading: a write racing with the load makes the
+            # next check reload rather than go unnoticed
+            if self._fingerprint is not None:
+                entry.fingerprint = self._fingerprint(key)
+                entry.checked_at = time.monotonic()
+            for doc in self._loader(key):
+                entry.add(doc)
+            self._build(entry)
+
+            with self._lock:
+                for op, payload in self._pending.pop(key, []):
+                    self._apply_op(entry, op, payload)
+                self._entries[key] = entry
+                if entry.dirty:
+                    self._schedule_rebuild(entry)
+                self._evict(keep=key)
+            logger.debug(
+                f"Loaded BM25 corpus for {key} with {len(entry.docs)} chunks "
+                f"(~{entry.size_bytes // 1024} KiB)"
+            )
+            return entry
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                self._loading.pop(key, None)
+            loading.set()
+
+    def _build(self, entry: _BM25Entry) -> Optional[BM25Retriever]:
+        with self._lock:
+            version = entry.version
+            docs = list(entry.docs.values())
+            tokens = [entry.tokens[doc.metadata["id"]] for doc in docs]
+
+        retriever = None
+        if docs:
+            retriever = BM25Retriever(
+                vectorizer=BM25Okapi(tokens, **self._bm25_params),
+                docs=docs,
+                preprocess_func=default_preprocessing_func,
+            )
+
+        with self._lock:
+            # Only publish if no mutation raced with the build
+            if entry.version == version:
+                entry.retriever = retriever
+                entry.built_version = version
+            elif entry.retriever is None:
+                entry.retriever = retriever
+        return retriever
+
+    def _rebuild(self, entry: _BM25Entry) -> Optional[BM25Retriever]:
+        try:
+            return self._build(entry)
+        finally:
+            with self._lock:
+                entry.rebuild_scheduled = False
+                if entry.dirty and entry.key in self._entries:
+                    self._schedule_rebuild(entry)
+
+    def _schedule_rebuild(self, entry: _BM25Entry) -> None:
+        if entry.rebuild_scheduled:
+            return
+        entry.rebuild_scheduled = True
+        self._executor.submit(self._rebuild, entry)
+
+    def _evict(self, keep: Optional[TenantKey] = None) -> None:
+        total = sum(entry.size_bytes for entry in self._entries.values())
+        for key in list(self._entries.keys()):
+            if total <= self.max_bytes:
+                break
+            if key == keep or len(self._entries) <= 1:
+                continue
+            evicted = self._entries.pop(key)
+            total -= evicted.size_bytes
+            logger.debug(f"Evicted BM25 corpus for {key}")
@@ -0,0 +1,88 @@
+"""
+Post-retrieval diversification of ranked chunks.
+
+Both stages work on the stored chunk embeddings with batched matrix
+operations: one similarity matrix product up front, then one vector update
+per kept or selected chunk (never a Python loop over pairs).
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def collapse_near_duplicates(
+    embeddings: Sequence[Sequence[float]], threshold: float = 0.95
+) -> List[int]:
+    """
+    Drop chunks that are near-duplicates of a better ranked kept chunk.
+
+    Args:
+        embeddings: Chunk embeddings in rank order
+        threshold: Cosine similarity at or above which two chunks are duplicates
+
+    Returns:
+        Indices of the kept chunks, in rank order
+    """
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+    count = len(vectors)
+    if count == 0:
+        return []
+
+    duplicates = (vectors @ vectors.T) >= threshold
+    alive = np.ones(count, dtype=bool)
+    for i in range(count):
+        if alive[i]:
+            # Everything ranked below i that duplicates it goes
+            alive[i + 1:] &= ~duplicates[i, i + 1:]
+    return np.flatnonzero(alive).tolist()
+
+
+def mmr_select(
+    query_embedding: Sequence[float],
+    embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """
+    Maximal Marginal Relevance selection.
+
+    Each step picks the chunk maximizing
+    lambda_mult * sim(query, chunk) - (1 - lambda_mult) * max sim(chunk, selected).
+
+    Args:
+        query_embedding: Embedding of the query
+        embeddings: Candidate chunk embeddings
+        k: Number of chunks to select
+        lambda_mult: 1 is pure relevance, 0 is pure diversity
+
+    Returns:
+        Indices of the selected chunks, in selection order
+    """
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+    count = len(vectors)
+    k = min(k, count)
+    if k <= 0:
+        return []
+
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+    relevance = vectors @ query
+    redundancy = np.full(count, -np.inf, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+
+    selected = [int(np.argmax(relevance))]
+    available[selected[0]] = False
+    while len(selected) < k:
+        # Similarity of every candidate to the chunk selected last
+        redundancy = np.maximum(redundancy, vectors @ vectors[selected[-1]])
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+    return selected
@@ -0,0 +1,261 @@
+"""
+Construction, training and tuning of the FAISS indexes behind VectorStoreService.
+
+Index types (vector_store.additional_params.faiss_index_type):
+    flat      exact search (IndexFlatL2), cost linear in the corpus size
+    hnsw      graph index (IndexHNSWFlat), no training
+    ivf_flat  inverted lists over full vectors (IndexIVFFlat), needs training
+    ivf_pq    inverted lists over product-quantized codes (IndexIVFPQ),
+              needs training, a fraction of the memory of the others
+
+All indexes use the L2 metric, like the flat index LangChain's FAISS store
+is created with, and take stable int64 ids (add_with_ids/remove_ids): flat
+and HNSW through an IndexIDMap2 wrapper, IVF natively with a hashtable
+direct map so removing an id does not scan the inverted lists.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# FAISS warns below ~39 training points per centroid
+_POINTS_PER_CENTROID = 39
+
+
+@dataclass
+class FaissIndexConfig:
+    index_type: str = "flat"
+    nlist: int = 1024
+    pq_m: int = 16
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    nprobe: int = 16
+    ef_search: int = 64
+    train_min_vectors: Optional[int] = None
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "FaissIndexConfig":
+        """Read faiss_* keys of vector_store.additional_params."""
+        config = cls(
+            **{
+                field: params[f"faiss_{field}"]
+                for field in cls.__dataclass_fields__
+                if params.get(f"faiss_{field}") is not None
+            }
+        )
+        if config.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported FAISS index type: {config.index_type}")
+        return config
+
+    @property
+    def needs_training(self) -> bool:
+        return self.index_type in ("ivf_flat", "ivf_pq")
+
+    @property
+    def train_size(self) -> int:
+        """Vectors required before an IVF index is trained."""
+        return self.train_min_vectors or self.nlist * _POINTS_PER_CENTROID
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Index type name of an existing index ("flat", "hnsw", ...)."""
+    index = _unwrap(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexFlat):
+        return "flat"
+    return type(index).__name__
+
+
+def _unwrap(index: faiss.Index) -> faiss.Index:
+    """The index under an IndexIDMap/IndexIDMap2 wrapper, if any."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def build_index(config: FaissIndexConfig, dim: int) -> faiss.Index:
+    """Create an empty (untrained) id-mapped index of the configured type."""
+    if config.index_type == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+    if config.index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+        return faiss.IndexIDMap2(index)
+
+    quantizer = faiss.IndexFlatL2(dim)
+    if config.index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, config.nlist)
+    else:
+        if dim % config.pq_m:
+            raise ValueError(
+                f"faiss_pq_m ({config.pq_m}) must divide the embedding dimension ({dim})"
+            )
+        index = faiss.IndexIVFPQ(
+            quantizer, dim, config.nlist, config.pq_m, config.pq_nbits
+        )
+    index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index
+
+
+def vectors_and_ids(index: faiss.Index) -> Tuple[np.ndarray, np.ndarray]:
+    """Stored vectors of a flat or HNSW index with their ids, in storage order."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        inner = faiss.downcast_index(index.index)
+        return (
+            inner.reconstruct_n(0, inner.ntotal),
+            faiss.vector_to_array(index.id_map).astype(np.int64),
+        )
+    return index.reconstruct_n(0, index.ntotal), np.arange(index.ntotal, dtype=np.int64)
+
+
+def ensure_id_mapped(
+    index: faiss.Index, config: FaissIndexConfig
+) -> Tuple[faiss.Index, bool]:
+    """
+    Bring an index written before ids were stable to the id-mapped layout.
+
+    Such indexes were filled with add(), so each vector's id is its position.
+    Flat and HNSW indexes are re-added under an IndexIDMap2, IVF indexes get
+    a hashtable direct map.
+
+    Returns:
+        The index and whether it was converted
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return index, False
+    if isinstance(index, faiss.IndexIVF):
+        if index.direct_map.type == faiss.DirectMap.Hashtable:
+            return index, False
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index, True
+
+    current = index_type_of(index)
+    if current not in ("flat", "hnsw"):
+        logger.warning(f"Leaving unsupported {current} FAISS index as is")
+        return index, False
+    vectors, ids = vectors_and_ids(index)
+    if current == "hnsw":
+        graph = faiss.IndexHNSWFlat(index.d, index.hnsw.nb_neighbors(1))
+        graph.hnsw.efConstruction = index.hnsw.efConstruction
+        mapped = faiss.IndexIDMap2(graph)
+    else:
+        mapped = faiss.IndexIDMap2(faiss.IndexFlatL2(index.d))
+    if len(ids):
+        mapped.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)
+    apply_search_params(mapped, config.nprobe, config.ef_search)
+    logger.info(f"Converted {current} FAISS index to stable ids ({len(ids)} vectors)")
+    return mapped, True
+
+
+def apply_search_params(
+    index: faiss.Index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+) -> None:
+    """Set the query-time knobs of IVF (nprobe) and HNSW (efSearch) indexes."""
+    index = _unwrap(index)
+    if nprobe and isinstance(index, faiss.IndexIVF):
+        index.nprobe = int(nprobe)
+    if ef_search and isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = int(ef_search)
+
+
+def migrate_index(
+    source: faiss.Index, config: FaissIndexConfig
+) -> Optional[faiss.Index]:
+    """
+    Rebuild the vectors of a flat index into the configured index type.
+
+    Vectors keep their ids, so index_to_docstore_id stays valid. Trained
+    types are only built once train_size vectors exist.
+
+    Returns:
+        The new index, or None when no migration is due yet
+    """
+    current = index_type_of(source)
+    if current == config.index_type:
+        return None
+    if current != "flat":
+        logger.warning(
+            f"Cannot migrate a {current} FAISS index to {config.index_type}, "
+            "only flat indexes are migrated"
+        )
+        return None
+    if config.needs_training and source.ntotal < config.train_size:
+        logger.debug(
+            f"Keeping the flat index until {config.train_size} vectors exist "
+            f"({source.ntotal} now)"
+        )
+        return None
+
+    vectors, ids = vectors_and_ids(source)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    target = build_index(config, source.d)
+    if config.needs_training:
+        logger.info(f"Training {config.index_type} index on {source.ntotal} vectors")
+        target.train(vectors)
+    if len(ids):
+        target.add_with_ids(vectors, ids)
+    apply_search_params(target, config.nprobe, config.ef_search)
+    logger.info(
+        f"Migrated FAISS index from flat to {config.index_type} "
+        f"({target.ntotal} vectors)"
+    )
+    return target
+
+
+def _is_mapped(index: faiss.Index) -> bool:
+    """Whether IO_FLAG_MMAP_IFC maps the bulk of this index's data."""
+    index = _unwrap(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    # Flat codes (flat and HNSW storage) and array inverted lists (IVF)
+    return isinstance(index, (faiss.IndexFlatCodes, faiss.IndexIVF))
+
+
+def read_index(path: str, mmap: bool = False) -> Tuple[faiss.Index, bool]:
+    """
+    Read an index from disk, memory-mapped read-only when mmap is set.
+
+    Mapped pages come from the OS page cache and are shared by every process
+    loading the same file. Index types FAISS cannot map are read into memory.
+
+    Returns:
+        The index and whether its data is actually memory-mapped
+    """
+    if mmap:
+        try:
+            index = faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+            mapped = _is_mapped(index)
+            if not mapped:
+                logger.info(f"{index_type_of(index)} index {path} cannot be memory-mapped")
+            return index, mapped
+        except RuntimeError as e:
+            logger.warning(f"Cannot memory-map {path}, reading it instead: {e}")
+    return faiss.read_index(path), False
+
+
+def writable_copy(index: faiss.Index) -> faiss.Index:
+    """
+    Copy of a memory-mapped index that owns its data.
+
+    clone_index keeps pointing at the mapped buffers (and fails on mapped
+    inverted lists), so the index goes through a serialize round trip.
+    """
+    return faiss.deserialize_index(faiss.serialize_index(index))
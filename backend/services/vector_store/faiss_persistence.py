@@ -0,0 +1,198 @@
+"""
+Write-behind persistence for the FAISS store.
+
+Mutations are appended to a JSON-lines log next to the snapshot (with the
+chunk vectors, so replay never re-embeds) and the full save_local snapshot
+is only written when a flush is due: every flush_interval_s, once
+flush_max_mutations are pending, or at interpreter shutdown. After a crash
+the snapshot is loaded and the log replayed on top of it.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MUTATION_LOG = "mutations.jsonl"
+
+
+class MutationLog:
+    """Append-only log of add/delete mutations applied since the last snapshot."""
+
+    def __init__(self, directory: Path):
+        self.path = Path(directory) / MUTATION_LOG
+        self._lock = threading.Lock()
+
+    def append(self, entries: List[Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        payload = "".join(json.dumps(entry) + "\n" for entry in entries)
+        with self._lock:
+            os.makedirs(self.path.parent, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def is_empty(self) -> bool:
+        return not self.path.exists() or self.path.stat().st_size == 0
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-append
+                    logger.warning(
+                        f"Skipping unreadable mutation log line {line_number}"
+                    )
+
+    def truncate(self) -> None:
+        with self._lock:
+            if self.path.exists():
+                os.truncate(self.path, 0)
+
+
+class WriteBehindPersister:
+    """
+    Batches FAISS mutations and snapshots the store off the ingest path.
+
+    save_snapshot is called with no arguments and must write the full store;
+    the log is truncated only after it returns. lock is the store's lock:
+    callers hold it while applying a mutation and recording it, and flush
+    holds it from the snapshot to the truncate, so a logged mutation is
+    always either in the snapshot or still in the log.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        save_snapshot: Callable[[], None],
+        lock: Optional[threading.RLock] = None,
+        flush_interval_s: float = 30,
+        flush_max_mutations: int = 1000,
+    ):
+        self.log = MutationLog(directory)
+        self._save_snapshot = save_snapshot
+        self.flush_interval_s = flush_interval_s
+        self.flush_max_mutations = flush_max_mutations
+        self._pending = 0
+        self._lock = lock or threading.RLock()
+        self._stop = threading.Event()
+
+        self._timer = threading.Thread(
+            target=self._run_timer, name="faiss-write-behind", daemon=True
+        )
+        self._timer.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def record_add(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        vectors: List[List[float]],
+    ) -> None:
+        self._record(
+            [
+                {
+                    "op": "add",
+                    "id": chunk_id,
+                    "text": text,
+                    "metadata": metadata,
+                    "vector": [float(x) for x in vector],
+                }
+                for chunk_id, text, metadata, vector in zip(
+                    ids, texts, metadatas, vectors
+                )
+            ],
+            len(ids),
+        )
+
+    def record_delete(self, ids: List[str]) -> None:
+        self._record([{"op": "delete", "ids": list(ids)}], len(ids))
+
+    def _record(self, entries: List[Dict[str, Any]], count: int) -> None:
+        with self._lock:
+            self.log.append(entries)
+            self._pending += count
+            due = self._pending >= self.flush_max_mutations
+        if due:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Snapshot the store and truncate the log, if anything is pending."""
+        with self._lock:
+            if not self._pending:
+                return False
+            pending = self._pending
+            self._save_snapshot()
+            self.log.truncate()
+            self._pending = 0
+            logger.info(f"Flushed FAISS store ({pending} mutations)")
+            return True
+
+    def _run_timer(self) -> None:
+        while not self._stop.wait(self.flush_interval_s):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing FAISS store: {e}")
+
+    def close(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing FAISS store on shutdown: {e}")
+        atexit.unregister(self.close)
+
+
+def replay_mutations(store, log: MutationLog) -> int:
+    """
+    Re-apply logged mutations on top of a loaded snapshot.
+
+    Adds of ids already present and deletes of missing ids are skipped, so a
+    crash between the snapshot and the log truncation replays safely.
+
+    Returns:
+        Number of mutations applied
+    """
+    applied = 0
+    known = set(store.index_to_docstore_id.values())
+    for entry in log.entries():
+        if entry.get("op") == "add":
+            if entry["id"] in known:
+                continue
+            store.add_embeddings(
+                [(entry["text"], entry["vector"])],
+                metadatas=[entry.get("metadata") or {}],
+                ids=[entry["id"]],
+            )
+            known.add(entry["id"])
+            applied += 1
+        elif entry.get("op") == "delete":
+            ids = [chunk_id for chunk_id in entry["ids"] if chunk_id in known]
+            if ids:
+                store.delete(ids)
+                known.difference_update(ids)
+                applied += len(ids)
+    if applied:
+        logger.info(f"Replayed {applied} FAISS mutations from {log.path}")
+    return applied
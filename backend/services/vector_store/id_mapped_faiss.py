@@ -0,0 +1,328 @@
+"""
+LangChain FAISS store keyed by stable FAISS ids instead of index positions.
+
+The stock FAISS store maps index positions to docstore ids, so every delete
+compacts the index and renumbers the whole mapping in Python. Here each chunk
+gets an int64 label for its lifetime: vectors are added with add_with_ids and
+deleted with remove_ids, and only the deleted labels are touched in
+index_to_docstore_id.
+
+HNSW graphs cannot remove vectors. Their deleted labels are tombstoned:
+searches exclude them with an IDSelector, and the graph is rebuilt without
+them by compact(), once they are a large enough share of the index.
+"""
+
+import logging
+import operator
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import faiss
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import (
+    DistanceStrategy,
+    maximal_marginal_relevance,
+)
+
+from services.vector_store.faiss_index import vectors_and_ids, index_type_of
+
+logger = logging.getLogger(__name__)
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """Whether the index can delete vectors in place (HNSW cannot)."""
+    return index_type_of(index) != "hnsw"
+
+
+def _index_labels(index: faiss.Index) -> Optional[np.ndarray]:
+    """Labels stored in an IndexIDMap/IndexIDMap2, None for other indexes."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.vector_to_array(index.id_map).astype(np.int64)
+    return None
+
+
+class IdMappedFAISS(FAISS):
+    """
+    FAISS store whose index_to_docstore_id is keyed by FAISS labels.
+
+    The index must accept add_with_ids: an IndexIDMap2 wrapper for flat and
+    HNSW indexes, IVF indexes natively.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._label_of: Dict[str, int] = {
+            doc_id: label for label, doc_id in self.index_to_docstore_id.items()
+        }
+        self._next_label = max(self.index_to_docstore_id, default=-1) + 1
+        # Deleted labels still in an HNSW graph; a loaded snapshot's are the
+        # index labels missing from index_to_docstore_id
+        self._tombstones: Set[int] = set()
+        labels = _index_labels(self.index)
+        if labels is not None and len(labels):
+            self._tombstones = set(labels.tolist()) - set(self.index_to_docstore_id)
+            self._next_label = max(self._next_label, int(labels.max()) + 1)
+        self._tombstone_selector = None
+
+    @property
+    def tombstones(self) -> int:
+        return len(self._tombstones)
+
+    def _exclude_tombstones(self):
+        """IDSelector excluding tombstoned labels, rebuilt after deletes."""
+        selector = self._tombstone_selector
+        if selector is None and self._tombstones:
+            labels = np.fromiter(self._tombstones, dtype=np.int64)
+            batch = faiss.IDSelectorBatch(len(labels), faiss.swig_ptr(labels))
+            # The Not selector only points to the batch one, keep both alive
+            selector = (faiss.IDSelectorNot(batch), batch)
+            self._tombstone_selector = selector
+        return selector
+
+    def _search_parameters(
+        self,
+        index: faiss.Index,
+        selector,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> Optional[faiss.SearchParameters]:
+        """
+        Per-call search parameters: the tombstone selector and the index's
+        own search knobs, with nprobe/ef_search overriding them for this
+        call only. None when the index's defaults apply as they are.
+        """
+        if selector is None and not nprobe and not ef_search:
+            return None
+        inner = faiss.downcast_index(index)
+        if isinstance(inner, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            inner = faiss.downcast_index(inner.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW()
+            params.efSearch = ef_search or inner.hnsw.efSearch
+        elif isinstance(inner, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF()
+            params.nprobe = nprobe or inner.nprobe
+        else:
+            params = faiss.SearchParameters()
+        if selector is not None:
+            params.sel = selector[0]
+        return params
+
+    def _search(
+        self,
+        vectors: np.ndarray,
+        k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # The parameters must match the index they are passed to
+        index = self.index
+        selector = self._exclude_tombstones()
+        params = self._search_parameters(index, selector, nprobe, ef_search)
+        if params is None:
+            return index.search(vectors, k)
+        return index.search(vectors, k, params=params)
+
+    def _docs_for(
+        self, hits: Iterable[Tuple[int, float]]
+    ) -> List[Tuple[Document, Tuple[int, float]]]:
+        """
+        Documents of (label, score) hits, paired with their hit.
+
+        A shared docstore (SQLiteDocstore) can lose rows deleted by another
+        process before this process reloads its index: those hits are
+        skipped instead of failing the whole search.
+        """
+        docs = []
+        for label, score in hits:
+            _id = self.index_to_docstore_id.get(label)
+            doc = self.docstore.search(_id) if _id is not None else None
+            if not isinstance(doc, Document):
+                logger.debug(f"Skipping hit {label}: no document for id {_id}")
+                continue
+            docs.append((doc, (label, score)))
+        return docs
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Union[Callable, Dict[str, Any]]] = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        # As FAISS's, with tombstoned labels excluded by the index search and
+        # nprobe/ef_search kwargs applied to this search only
+        vector = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+        scores, indices = self._search(
+            vector,
+            k if filter is None else fetch_k,
+            nprobe=kwargs.get("nprobe"),
+            ef_search=kwargs.get("ef_search"),
+        )
+        hits = [(int(i), float(score)) for i, score in zip(indices[0], scores[0]) if i != -1]
+        docs = [(doc, score) for doc, (_, score) in self._docs_for(hits)]
+
+        if filter is not None:
+            filter_func = self._create_filter_func(filter)
+            docs = [(doc, score) for doc, score in docs if filter_func(doc.metadata)]
+
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            cmp = (
+                operator.ge
+                if self.distance_strategy
+                in (DistanceStrategy.MAX_INNER_PRODUCT, DistanceStrategy.JACCARD)
+                else operator.le
+            )
+            docs = [(doc, score) for doc, score in docs if cmp(score, score_threshold)]
+        return docs[:k]
+
+    def max_marginal_relevance_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        *,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Union[Callable, Dict[str, Any]]] = None,
+    ) -> List[Tuple[Document, float]]:
+        # As FAISS's, with tombstoned labels excluded by the index search
+        scores, indices = self._search(
+            np.array([embedding], dtype=np.float32),
+            fetch_k if filter is None else fetch_k * 2,
+        )
+        hits = [(int(i), float(score)) for i, score in zip(indices[0], scores[0]) if i != -1]
+        docs = self._docs_for(hits)
+        if filter is not None:
+            filter_func = self._create_filter_func(filter)
+            docs = [(doc, hit) for doc, hit in docs if filter_func(doc.metadata)]
+
+        mmr_selected = maximal_marginal_relevance(
+            np.array([embedding], dtype=np.float32),
+            [self.index.reconstruct(label) for _, (label, _) in docs],
+            k=k,
+            lambda_mult=lambda_mult,
+        )
+        return [(docs[i][0], docs[i][1][1]) for i in mmr_selected]
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[Iterable[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        pairs = list(text_embeddings)
+        texts = [text for text, _ in pairs]
+        embeddings = [embedding for _, embedding in pairs]
+        return self._add_with_labels(texts, embeddings, metadatas, ids)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return self._add_with_labels(
+            texts, self._embed_documents(texts), metadatas, ids
+        )
+
+    def _add_with_labels(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[Iterable[dict]],
+        ids: Optional[List[str]],
+    ) -> List[str]:
+        if not texts:
+            return []
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Duplicate ids found in the ids list.")
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vectors)
+
+        self.docstore.add(
+            {
+                doc_id: Document(id=doc_id, page_content=text, metadata=metadata)
+                for doc_id, text, metadata in zip(ids, texts, metadatas)
+            }
+        )
+        labels = np.arange(
+            self._next_label, self._next_label + len(ids), dtype=np.int64
+        )
+        self.index.add_with_ids(vectors, labels)
+        self._next_label += len(ids)
+        for label, doc_id in zip(labels.tolist(), ids):
+            self.index_to_docstore_id[label] = doc_id
+            self._label_of[doc_id] = label
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids is None:
+            raise ValueError("No ids provided to delete.")
+        missing = [doc_id for doc_id in ids if doc_id not in self._label_of]
+        if missing:
+            raise ValueError(
+                f"Some specified ids do not exist in the current store. Ids not found: {missing}"
+            )
+        labels = np.fromiter(
+            (self._label_of[doc_id] for doc_id in ids), dtype=np.int64, count=len(ids)
+        )
+
+        if supports_remove(self.index):
+            # IDSelectorArray lets IVF indexes with a hashtable direct map
+            # drop each id without scanning the inverted lists
+            self.index.remove_ids(faiss.IDSelectorArray(len(labels), faiss.swig_ptr(labels)))
+        else:
+            self._tombstones.update(labels.tolist())
+            self._tombstone_selector = None
+
+        self.docstore.delete(ids)
+        for doc_id, label in zip(ids, labels.tolist()):
+            del self.index_to_docstore_id[label]
+            del self._label_of[doc_id]
+        return True
+
+    def compact(self, min_ratio: float = 0.0) -> bool:
+        """
+        Rebuild an HNSW graph without its tombstoned vectors.
+
+        Args:
+            min_ratio: Only rebuild once tombstones are this share of the index
+
+        Returns:
+            Whether the index was rebuilt
+        """
+        if not self._tombstones or len(self._tombstones) < min_ratio * self.index.ntotal:
+            return False
+        vectors, labels = vectors_and_ids(self.index)
+        keep = ~np.isin(labels, np.fromiter(self._tombstones, dtype=np.int64))
+        logger.info(
+            f"Compacting HNSW index: dropping {len(self._tombstones)} deleted "
+            f"vectors, keeping {int(keep.sum())}"
+        )
+        hnsw = faiss.downcast_index(faiss.downcast_index(self.index).index)
+        graph = faiss.IndexHNSWFlat(self.index.d, hnsw.hnsw.nb_neighbors(1))
+        graph.hnsw.efConstruction = hnsw.hnsw.efConstruction
+        graph.hnsw.efSearch = hnsw.hnsw.efSearch
+        rebuilt = faiss.IndexIDMap2(graph)
+        if keep.any():
+            rebuilt.add_with_ids(
+                np.ascontiguousarray(vectors[keep], dtype=np.float32), labels[keep]
+            )
+        self.index = rebuilt
+        self._tombstones = set()
+        self._tombstone_selector = None
+        return True
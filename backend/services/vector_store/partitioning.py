@@ -0,0 +1,469 @@
+"""
+Migrate chunks_embeddings to a layout hash-partitioned on user_id.
+
+Every partition gets its own copy of each index, including the HNSW
+indexes, so a user-filtered query is pruned to one partition and traverses
+a graph a fraction of the size of the global one. Pick the partition count
+so that partitions stay small at the expected platform size: a partitioned
+table cannot be re-partitioned in place. Queries scoped to an organization
+rather than a user are not pruned and visit every partition.
+
+PGVectorStore detects the layout and needs no configuration change; only
+its upsert conflict target changes to the new primary key.
+
+Usage (from the backend directory):
+
+    python -m services.vector_store.partitioning --partitions 16
+    python -m services.vector_store.partitioning --partitions 16 --dry-run
+
+Rows are copied in keyset batches while the application keeps running.
+Rows written or deleted during the copy are then caught up, again in
+batches, with deletes from that point on recorded by a trigger. The final
+swap takes a lock that blocks writes (reads continue), applies only the
+changes made since the catch-up, and renames the tables. The original
+table is kept as chunks_embeddings_unpartitioned unless --drop-old is given.
+
+Indexes, foreign keys, row level security policies, triggers, grants and
+dependent views are carried over. Unique indexes that do not include
+user_id cannot exist on the partitioned table and are skipped; the primary
+key becomes (id, user_id).
+"""
+
+import argparse
+import logging
+import re
+from typing import Dict, List, Tuple
+
+from psycopg2.extensions import quote_ident
+
+from database.postgres import PostgresDB
+
+logger = logging.getLogger(__name__)
+
+TABLE = "chunks_embeddings"
+NEW_TABLE = f"{TABLE}_partitioned"
+OLD_TABLE = f"{TABLE}_unpartitioned"
+PARTITION_KEY = "user_id"
+DELETE_LOG = f"{TABLE}_partition_deletes"
+
+# Rows written this long before the copy started are replayed at swap time,
+# to cover transactions that were in flight when it started
+_CATCHUP_MARGIN = "5 minutes"
+
+_INDEX_DEF_RE = re.compile(r"^(CREATE (?:UNIQUE )?INDEX )(\S+)( ON (?:ONLY )?)(\S+)")
+_TABLE_REF_RE = re.compile(rf"\bON (?:\w+\.)?{TABLE}\b")
+
+
+def _quote(name: str) -> str:
+    """Quote an identifier read from the catalogs."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def is_partitioned(cur) -> bool:
+    """Whether chunks_embeddings is already a partitioned table."""
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", [TABLE])
+    row = cur.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def _columns(cur) -> List[str]:
+    """Writable columns of the table (generated columns are recomputed)."""
+    cur.execute(
+        """
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = %s::regclass
+          AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+        ORDER BY attnum
+        """,
+        [TABLE],
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def _schema_objects(cur) -> Dict[str, List[Tuple]]:
+    """Read the definitions that must be recreated on the new table."""
+    objects = {}
+    cur.execute(
+        """
+        SELECT i.relname, pg_get_indexdef(i.oid), ix.indisunique, ix.indisprimary
+        FROM pg_index ix JOIN pg_class i ON i.oid = ix.indexrelid
+        WHERE ix.indrelid = %s::regclass
+        """,
+        [TABLE],
+    )
+    objects["indexes"] = cur.fetchall()
+    cur.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        """,
+        [TABLE],
+    )
+    objects["foreign_keys"] = cur.fetchall()
+    cur.execute(
+        """
+        SELECT policyname, permissive, cmd,
+               (SELECT string_agg(CASE WHEN r = 'public' THEN 'PUBLIC'
+                                       ELSE quote_ident(r) END, ', ')
+                FROM unnest(roles) r),
+               qual, with_check
+        FROM pg_policies
+        WHERE schemaname = current_schema() AND tablename = %s
+        """,
+        [TABLE],
+    )
+    objects["policies"] = cur.fetchall()
+    cur.execute(
+        """
+        SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger
+        WHERE tgrelid = %s::regclass AND NOT tgisinternal
+        """,
+        [TABLE],
+    )
+    objects["triggers"] = cur.fetchall()
+    cur.execute(
+        """
+        SELECT grantee, privilege_type FROM information_schema.role_table_grants
+        WHERE table_schema = current_schema() AND table_name = %s
+        """,
+        [TABLE],
+    )
+    objects["grants"] = cur.fetchall()
+    cur.execute(
+        """
+        SELECT DISTINCT v.oid::regclass::text, pg_get_viewdef(v.oid)
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.classid = 'pg_rewrite'::regclass
+          AND d.refobjid = %s::regclass
+          AND v.oid <> %s::regclass
+        """,
+        [TABLE, TABLE],
+    )
+    objects["views"] = cur.fetchall()
+    cur.execute("SELECT relrowsecurity FROM pg_class WHERE oid = %s::regclass", [TABLE])
+    objects["row_security"] = cur.fetchone()[0]
+    return objects
+
+
+def _create_statements(partitions: int) -> List[str]:
+    statements = [
+        f"""
+        CREATE TABLE {NEW_TABLE} (
+            LIKE {TABLE}
+            INCLUDING DEFAULTS INCLUDING GENERATED
+            INCLUDING CONSTRAINTS INCLUDING STORAGE
+        ) PARTITION BY HASH ({PARTITION_KEY})
+        """
+    ]
+    for remainder in range(partitions):
+        statements.append(
+            f"""
+            CREATE TABLE {TABLE}_p{remainder} PARTITION OF {NEW_TABLE}
+            FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})
+            """
+        )
+    return statements
+
+
+def _index_statements(objects: Dict[str, List[Tuple]]) -> Tuple[List[str], List[str]]:
+    """
+    Primary key, foreign keys and indexes of the new table.
+
+    Returns:
+        Tuple of (statements, names of the indexes recreated)
+    """
+    statements = [f"ALTER TABLE {NEW_TABLE} ADD PRIMARY KEY (id, {PARTITION_KEY})"]
+    for name, definition in objects["foreign_keys"]:
+        statements.append(f"ALTER TABLE {NEW_TABLE} ADD {definition}")
+
+    recreated = []
+    for name, definition, unique, primary in objects["indexes"]:
+        if primary:
+            continue
+        if unique and not re.search(rf"\b{PARTITION_KEY}\b", definition):
+            logger.warning(
+                f"Skipping unique index {name}: it does not include {PARTITION_KEY}"
+            )
+            continue
+        statements.append(
+            _INDEX_DEF_RE.sub(
+                lambda m: f"{m.group(1)}{name}_part{m.group(3)}{NEW_TABLE}",
+                definition,
+            )
+        )
+        recreated.append(name)
+    return statements, recreated
+
+
+def _security_statements(objects: Dict[str, List[Tuple]]) -> List[str]:
+    """Row level security, policies, triggers and grants of the new table."""
+    statements = []
+    if objects["row_security"]:
+        statements.append(f"ALTER TABLE {NEW_TABLE} ENABLE ROW LEVEL SECURITY")
+    for name, permissive, cmd, roles, qual, with_check in objects["policies"]:
+        statement = (
+            f"CREATE POLICY {_quote(name)} ON {NEW_TABLE} "
+            f"AS {permissive} FOR {cmd} TO {roles or 'PUBLIC'}"
+        )
+        if qual:
+            statement += f" USING ({qual})"
+        if with_check:
+            statement += f" WITH CHECK ({with_check})"
+        statements.append(statement)
+    for name, definition in objects["triggers"]:
+        statements.append(_TABLE_REF_RE.sub(f"ON {NEW_TABLE}", definition))
+    for grantee, privilege in objects["grants"]:
+        grantee = "PUBLIC" if grantee == "PUBLIC" else _quote(grantee)
+        statements.append(f"GRANT {privilege} ON {NEW_TABLE} TO {grantee}")
+    return statements
+
+
+def _copy_rows(conn, columns: List[str], batch_size: int) -> int:
+    """Copy every row to the new table in keyset batches, one commit each."""
+    with conn.cursor() as cur:
+        column_list = ", ".join(quote_ident(column, cur) for column in columns)
+    last_id, copied = "", 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                WITH batch AS (
+                    SELECT {column_list} FROM {TABLE}
+                    WHERE id > %s ORDER BY id LIMIT %s
+                ), inserted AS (
+                    INSERT INTO {NEW_TABLE} ({column_list})
+                    SELECT {column_list} FROM batch
+                )
+                SELECT max(id), count(*) FROM batch
+                """,
+                [last_id, batch_size],
+            )
+            batch_last_id, count = cur.fetchone()
+        conn.commit()
+        if not count:
+            return copied
+        copied += count
+        last_id = batch_last_id
+        logger.info(f"Copied {copied} rows to {NEW_TABLE}")
+
+
+def _replay_sql(cur, columns: List[str]) -> str:
+    """Upsert of the rows written to the old table since a point in time."""
+    column_list = ", ".join(quote_ident(column, cur) for column in columns)
+    updates = ", ".join(
+        f"{quote_ident(column, cur)} = EXCLUDED.{quote_ident(column, cur)}"
+        for column in columns
+        if column not in ("id", PARTITION_KEY)
+    )
+    return f"""
+        INSERT INTO {NEW_TABLE} ({column_list})
+        SELECT {column_list} FROM {TABLE}
+        WHERE updated_at >= %s OR created_at >= %s
+        ON CONFLICT (id, {PARTITION_KEY}) DO UPDATE SET {updates}
+    """
+
+
+def _log_deletes(conn) -> None:
+    """Record rows deleted from the old table from now on in DELETE_LOG."""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"CREATE UNLOGGED TABLE {DELETE_LOG} (id text, {PARTITION_KEY} text)"
+        )
+        cur.execute(
+            f"""
+            CREATE FUNCTION {DELETE_LOG}() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO {DELETE_LOG} VALUES (OLD.id, OLD.{PARTITION_KEY});
+                RETURN OLD;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        )
+        # Waits for in-flight writes: later deletes are logged, earlier
+        # ones are visible to the catch-up pass that follows
+        cur.execute(
+            f"""
+            CREATE TRIGGER {DELETE_LOG} AFTER DELETE ON {TABLE}
+            FOR EACH ROW EXECUTE FUNCTION {DELETE_LOG}()
+            """
+        )
+    conn.commit()
+
+
+def _drop_delete_log(cur) -> None:
+    cur.execute(f"DROP TRIGGER IF EXISTS {DELETE_LOG} ON {TABLE}")
+    cur.execute(f"DROP FUNCTION IF EXISTS {DELETE_LOG}()")
+    cur.execute(f"DROP TABLE IF EXISTS {DELETE_LOG}")
+
+
+def _catch_up(conn, columns: List[str], started_at, batch_size: int):
+    """
+    Apply the writes and deletes made during the copy, without blocking
+    writes. Returns the point in time later changes are replayed from.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT now() - interval '{_CATCHUP_MARGIN}'")
+        checkpoint = cur.fetchone()[0]
+    conn.commit()
+    _log_deletes(conn)
+
+    with conn.cursor() as cur:
+        cur.execute(_replay_sql(cur, columns), [started_at, started_at])
+        logger.info(f"Replayed {cur.rowcount} rows written during the copy")
+    conn.commit()
+
+    last_id, removed = "", 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                WITH batch AS (
+                    SELECT id, {PARTITION_KEY} FROM {NEW_TABLE}
+                    WHERE id > %s ORDER BY id LIMIT %s
+                ), deleted AS (
+                    DELETE FROM {NEW_TABLE} n
+                    USING batch b
+                    WHERE n.id = b.id AND n.{PARTITION_KEY} = b.{PARTITION_KEY}
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {TABLE} o
+                        WHERE o.id = b.id AND o.{PARTITION_KEY} = b.{PARTITION_KEY}
+                    )
+                    RETURNING 1
+                )
+                SELECT (SELECT max(id) FROM batch), (SELECT count(*) FROM deleted)
+                """,
+                [last_id, batch_size],
+            )
+            batch_last_id, count = cur.fetchone()
+        conn.commit()
+        if batch_last_id is None:
+            break
+        removed += count
+        last_id = batch_last_id
+    logger.info(f"Removed {removed} rows deleted during the copy")
+    return checkpoint
+
+
+def _swap(conn, columns: List[str], checkpoint, objects, recreated: List[str]):
+    """Apply the changes made since checkpoint and swap the tables, in one transaction."""
+    with conn.cursor() as cur:
+        # Block writes, reads keep going until the rename
+        cur.execute(f"LOCK TABLE {TABLE} IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute(_replay_sql(cur, columns), [checkpoint, checkpoint])
+        logger.info(f"Replayed {cur.rowcount} rows written during the catch-up")
+        cur.execute(
+            f"""
+            DELETE FROM {NEW_TABLE} n
+            USING {DELETE_LOG} d
+            WHERE n.id = d.id AND n.{PARTITION_KEY} = d.{PARTITION_KEY}
+            """
+        )
+        logger.info(f"Removed {cur.rowcount} rows deleted during the catch-up")
+        _drop_delete_log(cur)
+
+        cur.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+        for name in recreated:
+            cur.execute(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned")
+            cur.execute(f"ALTER INDEX {name}_part RENAME TO {name}")
+        cur.execute(f"ALTER TABLE {NEW_TABLE} RENAME TO {TABLE}")
+
+        # Views are bound to the old table; their definitions were read
+        # before the rename, so they now resolve to the partitioned one
+        for view, definition in objects["views"]:
+            cur.execute(f"CREATE OR REPLACE VIEW {view} AS {definition}")
+    conn.commit()
+
+
+def partition_chunks_embeddings(
+    partitions: int = 16,
+    batch_size: int = 10000,
+    drop_old: bool = False,
+    dry_run: bool = False,
+) -> None:
+    """
+    Convert chunks_embeddings to a table hash-partitioned on user_id.
+
+    Args:
+        partitions: Number of hash partitions
+        batch_size: Rows copied per transaction
+        drop_old: Drop the original table after the swap
+        dry_run: Only log the DDL that would run
+    """
+    pool = PostgresDB._get_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            if is_partitioned(cur):
+                logger.info(f"{TABLE} is already partitioned, nothing to do")
+                return
+            cur.execute(f"SELECT now() - interval '{_CATCHUP_MARGIN}'")
+            started_at = cur.fetchone()[0]
+            columns = _columns(cur)
+            objects = _schema_objects(cur)
+        conn.commit()
+
+        index_statements, recreated = _index_statements(objects)
+        plan = (
+            _create_statements(partitions)
+            + index_statements
+            + _security_statements(objects)
+        )
+        if dry_run:
+            for statement in plan:
+                logger.info(" ".join(statement.split()))
+            return
+
+        with conn.cursor() as cur:
+            for statement in _create_statements(partitions):
+                cur.execute(statement)
+        conn.commit()
+        logger.info(f"Created {NEW_TABLE} with {partitions} partitions")
+
+        copied = _copy_rows(conn, columns, batch_size)
+        logger.info(f"Copied {copied} rows, building indexes")
+
+        # Indexes are built after the bulk copy, which is much faster for HNSW
+        with conn.cursor() as cur:
+            for statement in index_statements + _security_statements(objects):
+                cur.execute(statement)
+        conn.commit()
+
+        checkpoint = _catch_up(conn, columns, started_at, batch_size)
+        _swap(conn, columns, checkpoint, objects, recreated)
+        logger.info(f"{TABLE} is now partitioned by hash of {PARTITION_KEY}")
+
+        if drop_old:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE {OLD_TABLE}")
+            conn.commit()
+            logger.info(f"Dropped {OLD_TABLE}")
+    except Exception:
+        conn.rollback()
+        # Do not leave the delete trigger on the live table
+        with conn.cursor() as cur:
+            _drop_delete_log(cur)
+        conn.commit()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Hash-partition chunks_embeddings by user_id"
+    )
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--drop-old", action="store_true")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    partition_chunks_embeddings(
+        partitions=args.partitions,
+        batch_size=args.batch_size,
+        drop_old=args.drop_old,
+        dry_run=args.dry_run,
+    )
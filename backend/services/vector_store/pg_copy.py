@@ -0,0 +1,86 @@
+"""
+Encoding of rows for PostgreSQL's binary COPY protocol.
+
+Only the column types used by chunks_embeddings are supported: text-like
+columns, uuid, jsonb and pgvector's vector.
+"""
+
+import io
+import struct
+import uuid
+from typing import Any, Callable, Iterable, List, Sequence
+
+import numpy as np
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+PGCOPY_TRAILER = struct.pack("!h", -1)
+
+Encoder = Callable[[Any], bytes]
+
+
+def encode_text(value: Any) -> bytes:
+    return str(value).encode("utf-8")
+
+
+def encode_uuid(value: Any) -> bytes:
+    return uuid.UUID(str(value)).bytes
+
+
+def encode_jsonb(value: Any) -> bytes:
+    """Encode an already serialized JSON string as jsonb (format version 1)."""
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return b"\x01" + value
+
+
+def encode_vector(value: Any) -> bytes:
+    """Encode a vector as pgvector's binary format: dim, unused, float4s."""
+    vector = np.asarray(value, dtype=">f4")
+    return struct.pack("!HH", vector.shape[0], 0) + vector.tobytes()
+
+
+def encoder_for_type(type_name: str) -> Encoder:
+    """Pick the binary encoder for a column from its format_type() name."""
+    if type_name in ("text", "character varying") or type_name.startswith(
+        "character varying("
+    ):
+        return encode_text
+    if type_name == "uuid":
+        return encode_uuid
+    if type_name == "jsonb":
+        return encode_jsonb
+    if type_name == "vector" or type_name.startswith("vector("):
+        return encode_vector
+    raise ValueError(f"Unsupported column type for binary COPY: {type_name}")
+
+
+def copy_binary_stream(
+    rows: Iterable[Sequence[Any]], encoders: List[Encoder]
+) -> io.BytesIO:
+    """
+    Build a binary COPY payload for the given rows.
+
+    Args:
+        rows: Rows whose values are in the same order as the encoders
+        encoders: One encoder per column
+
+    Returns:
+        Buffer positioned at its start, ready for cursor.copy_expert
+    """
+    field_count = struct.pack("!h", len(encoders))
+    null = struct.pack("!i", -1)
+
+    buffer = io.BytesIO()
+    buffer.write(PGCOPY_HEADER)
+    for row in rows:
+        buffer.write(field_count)
+        for value, encode in zip(row, encoders):
+            if value is None:
+                buffer.write(null)
+                continue
+            data = encode(value)
+            buffer.write(struct.pack("!i", len(data)))
+            buffer.write(data)
+    buffer.write(PGCOPY_TRAILER)
+    buffer.seek(0)
+    return buffer
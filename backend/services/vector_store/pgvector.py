@@ -1,30 +1,90 @@
 import json
 import logging
+import re
+import threading
+import time
 import uuid
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
 from langchain.schema.embeddings import Embeddings
 from langchain.vectorstores import VectorStore
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 from pgvector.sqlalchemy import Vector
+from psycopg2.errors import QueryCanceled
 from psycopg2.extras import RealDictCursor
 from sqlalchemy import Column, DateTime, ForeignKey, String, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
-from core.factories.embeddings_factory import get_embeddings
+from core.config import settings
+from core.factories.embeddings_factory import embed_documents_cached, get_embeddings
 from database.postgres import Base, DateTimeEncoder, PostgresDB, SQLDocument
 from models.simbadoc import SimbaDoc
 from services.auth.supabase_client import get_supabase_client
+from services.vector_store.bm25_cache import BM25Cache, TenantKey, tenant_key
+from services.vector_store.diversify import collapse_near_duplicates, mmr_select
+from services.vector_store.pg_copy import Encoder, copy_binary_stream, encoder_for_type
 
 supabase = get_supabase_client()
 
 logger = logging.getLogger(__name__)
 
+# Text search configurations are inlined into SQL, so only allow plain names
+_LANGUAGE_RE = re.compile(r"^[a-z_]+$")
+
+# Columns written by the bulk COPY path, in COPY order
+_COPY_COLUMNS = ("id", "document_id", "user_id", "data", "embedding")
+
+_ITERATIVE_SCAN_MODES = ("off", "strict_order", "relaxed_order")
+
+# Largest hnsw.ef_search pgvector accepts
+_MAX_EF_SEARCH = 1000
+
+# Compact ANN indexes over the embedding column (see migration 020), the
+# exact float32 vectors are only used to re-rank their candidates
+_QUANTIZED_INDEXES = {
+    "halfvec": (
+        "idx_chunks_embeddings_embedding_halfvec_hnsw",
+        "(embedding::halfvec({dim})) halfvec_cosine_ops",
+    ),
+    "binary": (
+        "idx_chunks_embeddings_embedding_bit_hnsw",
+        "(binary_quantize(embedding)::bit({dim})) bit_hamming_ops",
+    ),
+}
+_QUANTIZATIONS = ("none", *_QUANTIZED_INDEXES)
+
+# Score columns that with_scores copies into Document.metadata
+_SCORE_COLUMNS = ("distance", "text_rank", "rrf_score")
+
+
+def _chunk_projection(alias: str = "") -> str:
+    """Columns retrieval needs from chunks_embeddings (never the embedding)."""
+    prefix = f"{alias}." if alias else ""
+    return (
+        f"{prefix}id, {prefix}document_id, "
+        f"{prefix}data->>'page_content' AS page_content, "
+        f"{prefix}data->'metadata' AS metadata"
+    )
+
+
+_CHUNK_PROJECTION = _chunk_projection()
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _remaining_ms(deadline: float) -> int:
+    """Milliseconds left before a perf_counter deadline (at least 1)."""
+    return max(1, int((deadline - time.perf_counter()) * 1000))
+
 
 class ChunkEmbedding(Base):
     """SQLAlchemy model for chunks_embeddings table"""
@@ -48,6 +108,8 @@ class ChunkEmbedding(Base):
     __table_args__ = (
         # Index for faster user_id filtering
         # We'll create indexes separately in the ensure_text_search_index method
+        # (the generated tsv_<language> columns are not mapped here on purpose,
+        # so the ORM keeps working on databases that have not been migrated)
         {"schema": None}
     )
 
@@ -82,6 +144,9 @@ class PGVectorStore(VectorStore):
     Custom PostgreSQL pgvector implementation using SQLAlchemy ORM.
     """
 
+    _search_executor: Optional[ThreadPoolExecutor] = None
+    _search_executor_lock = threading.Lock()
+
     def __init__(self, embedding_dim: int = 3072, create_indexes: bool = True):
         """
         Initialize the vector store.
@@ -96,13 +161,288 @@ class PGVectorStore(VectorStore):
         self.db = PostgresDB()
         self._Session = self.db._Session
 
-        # Initialize BM25 retriever as None, will be created on first use
-        self._bm25_retriever = None
-        self._bm25_docs = None
+        # Per-tenant BM25 indexes, loaded lazily and kept in sync on writes
+        self._bm25_cache = BM25Cache(
+            loader=self._load_bm25_corpus,
+            max_bytes=int(self._param("bm25_cache_max_mb", 512)) * 1024 * 1024,
+            fingerprint=self._bm25_fingerprint,
+            check_interval_s=float(self._param("bm25_check_interval_s", 10)),
+        )
+
+        # Actual column types of chunks_embeddings, resolved on first COPY
+        self._copy_column_types = None
+        # pgvector extension version, resolved on first dense query
+        self._vector_version = None
+        # Declared dimension of chunks_embeddings.embedding, for quantized casts
+        self._vector_dim = None
+        # Whether chunks_embeddings is hash-partitioned by user_id
+        self._partitioned = None
+
+        # Languages that have a stored tsv_<language> column
+        self._fts_languages = set()
+        if create_indexes:
+            self._ensure_indexes()
 
         # Log initialization
         logger.info("Vector store initialized")
 
+    @staticmethod
+    def _param(name: str, default: Any = None) -> Any:
+        """Read a tuning knob from vector_store.additional_params."""
+        return settings.vector_store.additional_params.get(name, default)
+
+    @contextmanager
+    def _cursor(self, statement_timeout_ms: Optional[int] = None):
+        """
+        Borrow a pooled connection and yield a dict cursor on it.
+
+        Args:
+            statement_timeout_ms: Cancel statements of this transaction that
+                run longer than this, so a timed out search does not keep
+                holding its connection
+        """
+        pool = self.db._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                if statement_timeout_ms:
+                    cur.execute(
+                        "SET LOCAL statement_timeout = %s", [int(statement_timeout_ms)]
+                    )
+                yield cur
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+    def _ensure_indexes(self) -> None:
+        """
+        Check the search columns and create the indexes this store relies on.
+
+        Text search columns are only detected: adding one rewrites
+        chunks_embeddings under an ACCESS EXCLUSIVE lock, which is left to
+        migration 019 or an explicit ensure_text_search_index call.
+        """
+        try:
+            self._load_fts_languages()
+            for language in self._param("text_search_languages", ["french"]):
+                if self._validate_language(language) not in self._fts_languages:
+                    logger.warning(
+                        f"No indexed tsv_{language} column, full-text search "
+                        f"computes to_tsvector per row; run "
+                        f"ensure_text_search_index('{language}') in a maintenance window"
+                    )
+        except Exception as e:
+            logger.warning(f"Could not check text search indexes: {e}")
+
+        quantization = self._param("quantization", "none")
+        if quantization != "none":
+            try:
+                self.ensure_quantized_index(quantization)
+            except Exception as e:
+                logger.warning(f"Could not ensure {quantization} index: {e}")
+
+    def _load_fts_languages(self) -> None:
+        """Languages with a tsv_<language> column and a valid GIN index on it."""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                SELECT a.attname AS column_name
+                FROM pg_attribute a
+                JOIN pg_index i
+                  ON i.indrelid = a.attrelid AND a.attnum = ANY(i.indkey)
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_am am ON am.oid = c.relam
+                WHERE a.attrelid = 'chunks_embeddings'::regclass
+                  AND a.attname LIKE 'tsv\\_%'
+                  AND NOT a.attisdropped
+                  AND am.amname = 'gin'
+                  AND i.indisvalid
+                """
+            )
+            self._fts_languages = {
+                row["column_name"][len("tsv_"):] for row in cur.fetchall()
+            }
+
+    def ensure_text_search_index(self, language: str = "french") -> None:
+        """
+        Add a stored tsvector column and GIN index for a text search language.
+
+        An admin operation, not run on startup: the generated column is
+        computed for every existing row when it is added, which rewrites the
+        table under an ACCESS EXCLUSIVE lock. An INVALID index left by an
+        interrupted CREATE INDEX CONCURRENTLY is dropped and rebuilt.
+
+        Args:
+            language: PostgreSQL text search configuration (e.g. 'french')
+        """
+        language = self._validate_language(language)
+        if language in self._fts_languages:
+            return
+
+        column = f"tsv_{language}"
+        index_name = f"idx_chunks_embeddings_{column}"
+        valid = self._index_valid(index_name)
+        pool = self.db._get_pool()
+        conn = pool.getconn()
+        try:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                logger.info(f"Adding stored tsvector column {column}")
+                cur.execute(
+                    f"""
+                    ALTER TABLE chunks_embeddings
+                    ADD COLUMN IF NOT EXISTS {column} tsvector
+                    GENERATED ALWAYS AS (
+                        to_tsvector('{language}'::regconfig,
+                                    coalesce(data->>'page_content', ''))
+                    ) STORED
+                    """
+                )
+                if valid is False:
+                    logger.warning(f"Rebuilding invalid index {index_name}")
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+                cur.execute(
+                    f"""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name}
+                    ON chunks_embeddings USING GIN ({column})
+                    """
+                )
+            self._fts_languages.add(language)
+        finally:
+            conn.autocommit = False
+            pool.putconn(conn)
+
+    def _vector_dimension(self) -> int:
+        """Declared dimension of chunks_embeddings.embedding (its typmod)."""
+        if self._vector_dim is None:
+            with self._cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT atttypmod FROM pg_attribute
+                    WHERE attrelid = 'chunks_embeddings'::regclass
+                      AND attname = 'embedding'
+                    """
+                )
+                row = cur.fetchone()
+            if not row or row["atttypmod"] <= 0:
+                raise ValueError(
+                    "chunks_embeddings.embedding has no fixed dimension, "
+                    "quantized indexes need one"
+                )
+            self._vector_dim = int(row["atttypmod"])
+        return self._vector_dim
+
+    def _index_valid(self, index_name: str) -> Optional[bool]:
+        """Whether an index is valid, None if it does not exist."""
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                SELECT i.indisvalid FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = %s
+                """,
+                [index_name],
+            )
+            row = cur.fetchone()
+        return row["indisvalid"] if row else None
+
+    def ensure_quantized_index(self, quantization: str = "halfvec") -> None:
+        """
+        Create the compact HNSW index used by a quantization mode.
+
+        Only the index of the configured mode is built. An INVALID index left
+        by an interrupted CREATE INDEX CONCURRENTLY is dropped and rebuilt.
+
+        Args:
+            quantization: "halfvec" (float16) or "binary" (1 bit per dimension)
+        """
+        if quantization not in _QUANTIZED_INDEXES:
+            raise ValueError(f"Invalid quantization: {quantization}")
+
+        index_name, expression = _QUANTIZED_INDEXES[quantization]
+        valid = self._index_valid(index_name)
+        if valid:
+            return
+        expression = expression.format(dim=self._vector_dimension())
+        pool = self.db._get_pool()
+        conn = pool.getconn()
+        try:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                if valid is False:
+                    logger.warning(f"Rebuilding invalid index {index_name}")
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+                logger.info(f"Building {quantization} HNSW index {index_name}")
+                cur.execute(
+                    f"""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name}
+                    ON chunks_embeddings USING hnsw ({expression})
+                    WITH (m = 16, ef_construction = 64)
+                    """
+                )
+        finally:
+            conn.autocommit = False
+            pool.putconn(conn)
+
+    def _ann_order_expr(self, quantization: str, alias: str = "") -> str:
+        """
+        Distance to the query (one %s) matching the ANN index of a mode.
+
+        The expression must be identical to the index expression for the
+        planner to use the index.
+        """
+        prefix = f"{alias}." if alias else ""
+        if quantization == "none":
+            return f"{prefix}embedding <=> %s::vector"
+        dim = self._vector_dimension()
+        if quantization == "halfvec":
+            return f"{prefix}embedding::halfvec({dim}) <=> %s::halfvec({dim})"
+        return (
+            f"binary_quantize({prefix}embedding)::bit({dim}) "
+            "<~> binary_quantize(%s::vector)"
+        )
+
+    @staticmethod
+    def _validate_language(language: str) -> str:
+        if not _LANGUAGE_RE.match(language or ""):
+            raise ValueError(f"Invalid text search language: {language}")
+        return language
+
+    def _tsvector_expr(self, language: str, alias: str = "") -> str:
+        """Stored tsvector column for a language, or the on-the-fly expression."""
+        language = self._validate_language(language)
+        prefix = f"{alias}." if alias else ""
+        if language in self._fts_languages:
+            return f"{prefix}tsv_{language}"
+        return (
+            f"to_tsvector('{language}'::regconfig, "
+            f"coalesce({prefix}data->>'page_content', ''))"
+        )
+
+    @staticmethod
+    def _scope_filter(
+        user_id: str, organization_id: Optional[str] = None, alias: str = ""
+    ):
+        """
+        SQL predicate restricting chunks to a user or to an organization.
+
+        Returns:
+            Tuple of (sql fragment, params)
+        """
+        prefix = f"{alias}." if alias else ""
+        if organization_id:
+            return (
+                f"{prefix}document_id IN "
+                "(SELECT id FROM documents WHERE organization_id = %s)",
+                [organization_id],
+            )
+        return f"{prefix}user_id = %s", [user_id]
+
     def get_document(self, document_id: str) -> Optional[SimbaDoc]:
         """
         Retrieve a document from the store.
@@ -134,45 +474,60 @@ class PGVectorStore(VectorStore):
         )
         return get_embeddings()
 
-    def add_documents(self, documents: List[Document], document_id: str) -> bool:
-        """Add documents to the store using SQLAlchemy ORM."""
+    def _get_document_owner(self, document_id: str) -> str:
+        """Return the user_id of a parent document, raising if it is missing."""
         session = None
         try:
-            print("add_document")
             session = self._Session()
-
-            # Check if document exists
             existing_doc = (
                 session.query(SQLDocument).filter(
                     SQLDocument.id == document_id).first()
             )
             if not existing_doc:
                 raise ValueError(f"Parent document {document_id} not found")
+            return str(existing_doc.user_id)
+        finally:
+            if session:
+                session.close()
+
+    def add_documents(
+        self, documents: List[Document], document_id: str, upsert: bool = False
+    ) -> bool:
+        """
+        Add documents to the store.
+
+        Batches of at least bulk_copy_threshold chunks are streamed with
+        binary COPY, smaller ones are written through the SQLAlchemy ORM.
+
+        Args:
+            documents: Chunks to add
+            document_id: ID of the parent document
+            upsert: Overwrite chunks whose ID already exists instead of failing
+
+        Returns:
+            True if successful
+        """
+        try:
+            # Get user_id from the parent document
+            user_id = self._get_document_owner(document_id)
+
+            for doc in documents:
+                doc.id = doc.id or str(uuid.uuid4())
 
-            # Get user_id from the document
-            user_id = str(existing_doc.user_id)
-            print("user_id: ", user_id)
             # Generate embeddings for all documents
             texts = [doc.page_content for doc in documents]
-            print("texts = [doc.page_content for doc in documents]")
-            embeddings = self.embeddings.embed_documents(texts)
-            print("embeddings = self.embeddings.embed_documents(texts)")
-            # Create ChunkEmbedding objects and explicitly set their IDs
-            chunk_objects = []
-            for doc, embedding in zip(documents, embeddings):
-                chunk = ChunkEmbedding(
-                    id=doc.id,  # Use the LangChain document's ID directly
-                    document_id=document_id,
-                    user_id=user_id,
-                    data={"page_content": doc.page_content,
-                          "metadata": doc.metadata},
-                    embedding=embedding,
-                )
-                chunk_objects.append(chunk)
-            print("done loop")
-            # Add all chunks to session
-            session.add_all(chunk_objects)
-            session.commit()
+            embeddings = embed_documents_cached(self.embeddings, texts)
+
+            self._write_chunks(
+                document_id,
+                user_id,
+                ids=[doc.id for doc in documents],
+                texts=texts,
+                metadatas=[doc.metadata for doc in documents],
+                embeddings=embeddings,
+                upsert=upsert,
+            )
+            self._notify_chunks_added(document_id, user_id, documents)
 
             logger.info(
                 f"Successfully added {len(documents)} chunks for document {document_id}"
@@ -180,40 +535,373 @@ class PGVectorStore(VectorStore):
             return True
 
         except Exception as e:
-            if session:
-                session.rollback()
             logger.error(f"Failed to add documents: {e}")
             raise  # Re-raise the exception to handle it at a higher level
+
+    def replace_documents(self, documents: List[Document], document_id: str) -> bool:
+        """
+        Replace all chunks of a document (re-embedding after a content change).
+
+        The new chunks are upserted first and the document's other chunks
+        deleted afterwards, so the document stays searchable while it is
+        re-embedded and keeps its old chunks if embedding fails.
+
+        Unlike delete_documents this does not check the current user, it is
+        meant for background jobs acting on behalf of the document owner.
+        """
+        if documents:
+            self.add_documents(documents, document_id, upsert=True)
+        with self._cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM chunks_embeddings
+                WHERE document_id = %s AND NOT (id = ANY(%s))
+                RETURNING id
+                """,
+                [document_id, [doc.id for doc in documents]],
+            )
+            stale_ids = [row["id"] for row in cur.fetchall()]
+        if stale_ids:
+            self._bm25_cache.remove_chunks(stale_ids)
+        return True
+
+    def _write_chunks(
+        self,
+        document_id: str,
+        user_id: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[dict],
+        embeddings: List[List[float]],
+        upsert: bool = False,
+    ) -> None:
+        """Persist chunks with COPY for large batches, the ORM otherwise."""
+        if len(ids) >= int(self._param("bulk_copy_threshold", 256)):
+            self._copy_chunks(
+                document_id, user_id, ids, texts, metadatas, embeddings, upsert
+            )
+            return
+
+        session = None
+        try:
+            session = self._Session()
+            chunk_objects = [
+                ChunkEmbedding(
+                    id=chunk_id,
+                    document_id=document_id,
+                    user_id=user_id,
+                    data={"page_content": text, "metadata": metadata},
+                    embedding=embedding,
+                )
+                for chunk_id, text, metadata, embedding in zip(
+                    ids, texts, metadatas, embeddings
+                )
+            ]
+            if upsert:
+                for chunk in chunk_objects:
+                    session.merge(chunk)
+            else:
+                session.add_all(chunk_objects)
+            session.commit()
+        except Exception:
+            if session:
+                session.rollback()
+            raise
         finally:
             if session:
                 session.close()
 
+    def _is_partitioned(self) -> bool:
+        """Whether chunks_embeddings is partitioned (see partitioning.py)."""
+        if self._partitioned is None:
+            with self._cursor() as cur:
+                cur.execute(
+                    "SELECT relkind FROM pg_class "
+                    "WHERE oid = 'chunks_embeddings'::regclass"
+                )
+                row = cur.fetchone()
+            self._partitioned = bool(row) and row["relkind"] == "p"
+        return self._partitioned
+
+    def _upsert_clause(self) -> str:
+        """
+        ON CONFLICT clause overwriting existing chunks.
+
+        A partitioned table's primary key includes the partition key
+        (id, user_id), which is then also the conflict target.
+        """
+        if self._is_partitioned():
+            target, owner = "(id, user_id)", ""
+        else:
+            target, owner = "(id)", "user_id = EXCLUDED.user_id,"
+        return f"""
+            ON CONFLICT {target} DO UPDATE SET
+                document_id = EXCLUDED.document_id,
+                {owner}
+                data = EXCLUDED.data,
+                embedding = EXCLUDED.embedding,
+                updated_at = now()
+        """
+
+    def _copy_encoders(self, cur) -> List[Encoder]:
+        """Binary COPY encoders matching the actual chunks_embeddings columns."""
+        if self._copy_column_types is None:
+            cur.execute(
+                """
+                SELECT attname, format_type(atttypid, atttypmod) AS type
+                FROM pg_attribute
+                WHERE attrelid = 'chunks_embeddings'::regclass
+                  AND attname = ANY(%s)
+                """,
+                [list(_COPY_COLUMNS)],
+            )
+            self._copy_column_types = {
+                row["attname"]: row["type"] for row in cur.fetchall()
+            }
+        return [
+            encoder_for_type(self._copy_column_types[column])
+            for column in _COPY_COLUMNS
+        ]
+
+    def _copy_chunks(
+        self,
+        document_id: str,
+        user_id: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[dict],
+        embeddings: List[List[float]],
+        upsert: bool = False,
+    ) -> int:
+        """
+        Bulk write chunks with binary COPY through a staging table.
+
+        All batches are written in one transaction. Each batch is copied into
+        a temporary staging table and moved into chunks_embeddings with a
+        single INSERT ... SELECT, which is where upsert semantics apply.
+
+        Returns:
+            Number of chunks written
+        """
+        batch_size = int(self._param("bulk_copy_batch_size", 5000))
+        vectors = np.asarray(embeddings, dtype=">f4")
+        columns = ", ".join(_COPY_COLUMNS)
+
+        conflict = self._upsert_clause() if upsert else ""
+
+        with self._cursor() as cur:
+            encoders = self._copy_encoders(cur)
+            cur.execute(
+                f"""
+                CREATE TEMP TABLE IF NOT EXISTS chunks_embeddings_staging
+                ON COMMIT DROP AS
+                SELECT {columns} FROM chunks_embeddings WITH NO DATA
+                """
+            )
+            for start in range(0, len(ids), batch_size):
+                stop = min(start + batch_size, len(ids))
+                rows = (
+                    (
+                        ids[i],
+                        document_id,
+                        user_id,
+                        json.dumps(
+                            {"page_content": texts[i], "metadata": metadatas[i]},
+                            cls=DateTimeEncoder,
+                        ),
+                        vectors[i],
+                    )
+                    for i in range(start, stop)
+                )
+                cur.copy_expert(
+                    f"COPY chunks_embeddings_staging ({columns}) "
+                    "FROM STDIN WITH (FORMAT binary)",
+                    copy_binary_stream(rows, encoders),
+                )
+                cur.execute(
+                    f"""
+                    INSERT INTO chunks_embeddings ({columns})
+                    SELECT {columns} FROM chunks_embeddings_staging
+                    {conflict}
+                    """
+                )
+                cur.execute("TRUNCATE chunks_embeddings_staging")
+                logger.debug(f"Copied chunks {start}-{stop} of document {document_id}")
+
+        return len(ids)
+
     def get_all_documents(self, user_id: str) -> List[Document]:
-        """Get all documents from the store, optionally filtered by user_id."""
-        session = None
+        """
+        Get all chunks of a user as a list.
+
+        Prefer iter_all_documents or get_documents_page for large tenants,
+        this materializes the whole corpus.
+        """
+        return list(self.iter_all_documents(user_id))
+
+    def iter_all_documents(
+        self,
+        user_id: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        organization_id: Optional[str] = None,
+    ) -> Iterator[Document]:
+        """
+        Stream the chunks of a user or organization.
+
+        Rows are read through a server-side (named) cursor, batch_size at a
+        time, so memory stays flat whatever the corpus size. The pooled
+        connection is held until the generator is exhausted or closed.
+
+        Args:
+            user_id: User whose chunks are returned
+            batch_size: Rows fetched per round trip
+                (default: vector_store.additional_params.chunk_scan_batch_size)
+            organization_id: Return the organization's chunks instead of the user's
+
+        Yields:
+            Documents with "id" and "document_id" in their metadata
+        """
+        batch_size = int(batch_size or self._param("chunk_scan_batch_size", 2000))
+        where, params = self._scope_filter(user_id, organization_id)
+
+        pool = self.db._get_pool()
+        conn = pool.getconn()
         try:
-            session = self._Session()
-            query = session.query(ChunkEmbedding).filter(
-                ChunkEmbedding.user_id == user_id
+            with conn.cursor(
+                name=f"chunks_scan_{uuid.uuid4().hex}", cursor_factory=RealDictCursor
+            ) as cur:
+                cur.itersize = batch_size
+                cur.execute(
+                    f"SELECT {_CHUNK_PROJECTION} FROM chunks_embeddings WHERE {where}",
+                    params,
+                )
+                for row in cur:
+                    yield self._row_to_document(row)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            # The pool rolls back a transaction left open by an abandoned generator
+            pool.putconn(conn)
+
+    def get_documents_page(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = 100,
+        after_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+    ) -> Tuple[List[Document], Optional[str]]:
+        """
+        Keyset-paginated chunks of a user or organization, ordered by chunk id.
+
+        Args:
+            user_id: User whose chunks are returned
+            limit: Page size
+            after_id: Cursor returned by the previous page, None for the first
+            organization_id: Return the organization's chunks instead of the user's
+
+        Returns:
+            Tuple of (documents, cursor of the next page or None on the last page)
+        """
+        where, params = self._scope_filter(user_id, organization_id)
+        if after_id is not None:
+            where += " AND id > %s"
+            params = [*params, after_id]
+
+        with self._cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {_CHUNK_PROJECTION} FROM chunks_embeddings
+                WHERE {where}
+                ORDER BY id
+                LIMIT %s
+                """,
+                [*params, limit],
+            )
+            rows = cur.fetchall()
+
+        documents = [self._row_to_document(row) for row in rows]
+        next_cursor = rows[-1]["id"] if len(rows) == limit else None
+        return documents, next_cursor
+
+    def _load_bm25_corpus(self, key: TenantKey) -> Iterable[Document]:
+        """Stream every chunk of a tenant into the BM25 cache."""
+        scope, tenant_id = key
+        if scope == "org":
+            return self.iter_all_documents(organization_id=tenant_id)
+        return self.iter_all_documents(tenant_id)
+
+    def _bm25_fingerprint(self, key: TenantKey) -> Tuple[int, Optional[str]]:
+        """Row count and last update of a tenant's chunks, see BM25Cache."""
+        scope, tenant_id = key
+        if scope == "org":
+            where, params = self._scope_filter(None, tenant_id)
+        else:
+            where, params = self._scope_filter(tenant_id)
+        with self._cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT count(*) AS n, max(updated_at) AS last_update
+                FROM chunks_embeddings WHERE {where}
+                """,
+                params,
             )
+            row = cur.fetchone()
+        last_update = row["last_update"]
+        return row["n"], last_update.isoformat() if last_update else None
 
-            chunks = query.all()
-            # Modify this to ensure document_id is in metadata
-            return [
+    def _get_organization_id(self, document_id: str) -> Optional[str]:
+        """Look up the organization a document belongs to, if any."""
+        try:
+            with self._cursor() as cur:
+                cur.execute(
+                    "SELECT organization_id FROM documents WHERE id = %s",
+                    [document_id],
+                )
+                row = cur.fetchone()
+            return str(row["organization_id"]) if row and row["organization_id"] else None
+        except Exception as e:
+            logger.debug(f"Could not resolve organization of {document_id}: {e}")
+            return None
+
+    def _notify_chunks_added(
+        self, document_id: str, user_id: str, chunks: List[Document]
+    ) -> None:
+        """Apply freshly written chunks to the cached BM25 corpora."""
+        keys = [tenant_key(user_id=user_id)]
+        organization_id = self._get_organization_id(document_id)
+        if organization_id:
+            keys.append(tenant_key(organization_id=organization_id))
+
+        self._bm25_cache.add_documents(
+            keys,
+            [
                 Document(
-                    page_content=chunk.data["page_content"],
+                    page_content=chunk.page_content,
                     metadata={
-                        **chunk.data.get("metadata", {}),
-                        "document_id": chunk.document_id,  # Explicitly add document_id
+                        **chunk.metadata,
+                        "id": chunk.id,
+                        "document_id": document_id,
                     },
                 )
                 for chunk in chunks
-            ]
-        finally:
-            if session:
-                session.close()
+            ],
+        )
+
+    def warm_bm25_cache(
+        self, user_id: Optional[str] = None, organization_id: Optional[str] = None
+    ) -> None:
+        """Preload a tenant's BM25 index in the background (e.g. at login)."""
+        self._bm25_cache.warm(tenant_key(user_id, organization_id))
 
-    def _retrieve_with_bm25(self, query: str, user_id: str, k: int = 30) -> List[str]:
+    def _retrieve_with_bm25(
+        self,
+        query: str,
+        user_id: str,
+        k: int = 30,
+        organization_id: Optional[str] = None,
+    ) -> List[str]:
         """
         Perform first-pass BM25 retrieval to get candidate document IDs.
 
@@ -221,15 +909,15 @@ class PGVectorStore(VectorStore):
             query: Search query
             user_id: User ID for filtering
             k: Number of documents to retrieve
+            organization_id: Search the organization's corpus instead of the user's
 
         Returns:
             List of document IDs from BM25 retrieval
         """
-        # Get BM25 retriever (will be cached after first use)
-        bm25_retriever = self._get_bm25_retriever(user_id, k)
-
-        # Get top documents using BM25
-        first_pass_docs = bm25_retriever.get_relevant_documents(query)
+        # Per-tenant index, loaded on first use and kept in sync on writes
+        first_pass_docs = self._bm25_cache.search(
+            tenant_key(user_id, organization_id), query, k
+        )
         logger.debug(f"BM25 returned {len(first_pass_docs)} documents")
 
         # Extract document IDs from first pass results
@@ -246,6 +934,9 @@ class PGVectorStore(VectorStore):
         top_k: int,
         document_ids: Optional[List[str]] = None,
         language: str = "french",
+        organization_id: Optional[str] = None,
+        statement_timeout_ms: Optional[int] = None,
+        with_scores: bool = False,
     ) -> List[Document]:
         """
         Perform text-based search using PostgreSQL's full-text search.
@@ -256,133 +947,84 @@ class PGVectorStore(VectorStore):
             top_k: Number of results to retrieve
             document_ids: Optional list of document IDs to filter by
             language: Language for text search
+            organization_id: Search the organization's chunks instead of the user's
+            statement_timeout_ms: Optional server-side deadline for the query
+            with_scores: Add the ts_rank as "text_rank" to the metadata
 
         Returns:
             List of Document objects with results
         """
-        session = None
-        try:
-            # Get a session and its engine
-            session = self._Session()
-            conn = session.connection()
-            cur = conn.connection.cursor(cursor_factory=RealDictCursor)
-
-            # Prepare the SQL query for text search
-            sql = """
-                SELECT * FROM chunks_embeddings 
-                WHERE user_id = %s 
-            """
-
-            params = [user_id]
-
-            if document_ids:
-                sql += " AND document_id = ANY(%s) "
-                params.append(document_ids)
-
-            sql += f"""
-                ORDER BY ts_rank(to_tsvector(%s, data->>'page_content'), 
-                               plainto_tsquery(%s, %s)) DESC
-                LIMIT %s
-            """
-            params.extend([language, language, query, top_k])
-
-            # Execute query
+        sql, params = self._text_search_sql(
+            query, user_id, top_k, document_ids, language, organization_id
+        )
+        with self._cursor(statement_timeout_ms) as cur:
             cur.execute(sql, params)
             rows = cur.fetchall()
 
-            # Convert rows to Document objects
-            results = []
-            for row in rows:
-                # Create a document with the data from the row
-                doc = Document(
-                    page_content=row["data"].get("page_content", ""),
-                    metadata={
-                        **row["data"].get("metadata", {}),
-                        "id": row["id"],
-                        "document_id": row["document_id"],
-                    },
-                )
-                results.append(doc)
-
-            return results
+        return [self._row_to_document(row, with_scores) for row in rows]
 
-        finally:
-            if session:
-                session.close()
-
-    def _retrieve_with_text_search(
+    def _text_search_sql(
         self,
         query: str,
         user_id: str,
         top_k: int,
         document_ids: Optional[List[str]] = None,
         language: str = "french",
-    ) -> List[Document]:
+        organization_id: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """Build the full-text search query, see _retrieve_with_text_search."""
+        # Filter on the stored tsvector (GIN indexed) before ranking
+        tsvector = self._tsvector_expr(language, alias="c")
+        scope_sql, scope_params = self._scope_filter(
+            user_id, organization_id, alias="c"
+        )
+        sql = f"""
+            SELECT {_chunk_projection("c")}, ts_rank({tsvector}, q) AS text_rank
+            FROM chunks_embeddings c,
+                plainto_tsquery('{language}'::regconfig, %s) AS q
+            WHERE {scope_sql}
+              AND {tsvector} @@ q
         """
-        Perform text-based search using PostgreSQL's full-text search.
+        params = [query, *scope_params]
 
-        Args:
-            query: Search query
-            user_id: User ID for filtering
-            top_k: Number of results to retrieve
-            document_ids: Optional list of document IDs to filter by
-            language: Language for text search
+        if document_ids:
+            sql += " AND c.document_id = ANY(%s) "
+            params.append(document_ids)
 
-        Returns:
-            List of Document objects with results
+        sql += """
+            ORDER BY text_rank DESC
+            LIMIT %s
         """
-        session = None
-        try:
-            # Get a session and its engine
-            session = self._Session()
-            conn = session.connection()
-            cur = conn.connection.cursor(cursor_factory=RealDictCursor)
-
-            # Prepare the SQL query for text search
-            sql = """
-                SELECT * FROM chunks_embeddings 
-                WHERE user_id = %s 
-            """
+        params.append(top_k)
+        return sql, params
 
-            params = [user_id]
-
-            if document_ids:
-                sql += " AND document_id = ANY(%s) "
-                params.append(document_ids)
-
-            sql += f"""
-                ORDER BY ts_rank(to_tsvector(%s, data->>'page_content'), 
-                               plainto_tsquery(%s, %s)) DESC
-                LIMIT %s
-            """
-            params.extend([language, language, query, top_k])
-
-            # Execute query
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-
-            # Convert rows to Document objects
-            results = []
-            for row in rows:
-                # Create a document with the data from the row
-                doc = Document(
-                    page_content=row["data"].get("page_content", ""),
-                    metadata={
-                        **row["data"].get("metadata", {}),
-                        "id": row["id"],
-                        "document_id": row["document_id"],
-                    },
-                )
-                results.append(doc)
-
-            return results
+    @staticmethod
+    def _row_to_document(row, with_scores: bool = False) -> Document:
+        """
+        Convert a projected chunks_embeddings row to a LangChain Document.
 
-        finally:
-            if session:
-                session.close()
+        Args:
+            row: Row selected with _chunk_projection, plus any score columns
+            with_scores: Copy the score columns present in the row
+                (distance, text_rank, rrf_score) into the metadata
+        """
+        metadata = {
+            **(row["metadata"] or {}),
+            "id": row["id"],
+            "document_id": row["document_id"],
+        }
+        if with_scores:
+            for column in _SCORE_COLUMNS:
+                if row.get(column) is not None:
+                    metadata[column] = float(row[column])
+        return Document(page_content=row["page_content"] or "", metadata=metadata)
 
     def _fuse_results_rrf(
-        self, *ranked_lists: List[Document], k: int = 60, top_k: int = 100
+        self,
+        *ranked_lists: List[Document],
+        k: int = 60,
+        top_k: int = 100,
+        with_scores: bool = False,
     ) -> List[Document]:
         """
         Fuse multiple result lists using Reciprocal Rank Fusion.
@@ -391,6 +1033,8 @@ class PGVectorStore(VectorStore):
             ranked_lists: Multiple lists of Documents in rank order
             k: RRF constant (default=60)
             top_k: Number of results to return after fusion
+            with_scores: Add the fused score as "rrf_score" and keep the
+                per-leg scores of every list in the metadata
 
         Returns:
             List of fused Document objects
@@ -407,6 +1051,8 @@ class PGVectorStore(VectorStore):
                     continue
 
                 # Store document for later retrieval
+                if with_scores and doc_id in doc_map:
+                    doc.metadata = {**doc_map[doc_id].metadata, **doc.metadata}
                 doc_map[doc_id] = doc
 
                 # Add RRF score
@@ -417,105 +1063,503 @@ class PGVectorStore(VectorStore):
             d for d, _ in sorted(scores.items(), key=lambda x: x[1], reverse=True)
         ][:top_k]
 
+        if with_scores:
+            for doc_id in top_ids:
+                doc_map[doc_id].metadata["rrf_score"] = scores[doc_id]
+
         # Return documents in the new fused order
         return [doc_map[doc_id] for doc_id in top_ids if doc_id in doc_map]
 
+    def _ann_options(
+        self,
+        top_k: int,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        exact_fallback: Optional[bool] = None,
+        quantization: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Resolve HNSW query-time settings from call arguments and config.
+
+        With a quantized index, the ANN pass fetches top_k * rerank_multiple
+        candidates that are re-ranked on the exact vectors. ef_search is never
+        set below the number of rows the index must return, otherwise the
+        index cannot return them (pgvector's default ef_search is 40), nor
+        above pgvector's limit of 1000.
+        """
+        ef_search = ef_search or self._param("hnsw_ef_search", 40)
+        iterative_scan = iterative_scan or self._param("hnsw_iterative_scan", "off")
+        if iterative_scan not in _ITERATIVE_SCAN_MODES:
+            raise ValueError(f"Invalid hnsw iterative scan mode: {iterative_scan}")
+        if exact_fallback is None:
+            exact_fallback = self._param("ann_exact_fallback", True)
+        quantization = quantization or self._param("quantization", "none")
+        if quantization not in _QUANTIZATIONS:
+            raise ValueError(f"Invalid quantization: {quantization}")
+
+        candidates = top_k
+        if quantization != "none":
+            candidates = top_k * max(1, int(self._param("rerank_multiple", 4)))
+        return {
+            "ef_search": min(max(int(ef_search), candidates), _MAX_EF_SEARCH),
+            "iterative_scan": iterative_scan,
+            "max_scan_tuples": self._param("hnsw_max_scan_tuples"),
+            "exact_fallback": bool(exact_fallback),
+            "quantization": quantization,
+            "candidates": candidates,
+        }
+
+    def _pgvector_version(self, cur) -> Tuple[int, ...]:
+        if self._vector_version is None:
+            cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            row = cur.fetchone()
+            self._vector_version = (
+                tuple(int(part) for part in re.findall(r"\d+", row["extversion"]))
+                if row
+                else (0,)
+            )
+        return self._vector_version
+
+    def _apply_ann_settings(self, cur, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply HNSW settings to the current transaction.
+
+        Returns:
+            The settings actually applied. Iterative scans need pgvector 0.8+
+            and are reported as "unsupported" on older servers.
+        """
+        version = (
+            self._pgvector_version(cur) if options["iterative_scan"] != "off" else None
+        )
+        statements, applied = self._ann_setting_statements(options, version)
+        for statement in statements:
+            cur.execute(statement)
+        return applied
+
+    @staticmethod
+    def _ann_setting_statements(
+        options: Dict[str, Any], version: Optional[Tuple[int, ...]]
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        SET LOCAL statements for the given HNSW options.
+
+        Values are validated integers and modes, so they are inlined: SET
+        does not take bind parameters on the server side.
+
+        Args:
+            options: HNSW settings, see _ann_options
+            version: pgvector version, only needed for iterative scans
+
+        Returns:
+            Tuple of (statements, settings actually applied)
+        """
+        applied = {
+            "ef_search": options["ef_search"],
+            "quantization": options.get("quantization", "none"),
+            "candidates": options.get("candidates"),
+        }
+        statements = [f"SET LOCAL hnsw.ef_search = {int(options['ef_search'])}"]
+
+        iterative_scan = options["iterative_scan"]
+        if iterative_scan != "off":
+            if version and version >= (0, 8, 0):
+                statements.append(f"SET LOCAL hnsw.iterative_scan = {iterative_scan}")
+                if options["max_scan_tuples"]:
+                    statements.append(
+                        "SET LOCAL hnsw.max_scan_tuples = "
+                        f"{int(options['max_scan_tuples'])}"
+                    )
+            else:
+                iterative_scan = "unsupported"
+        applied["iterative_scan"] = iterative_scan
+        return statements, applied
+
     def _retrieve_with_dense_vector(
         self,
         query: str,
         user_id: str,
         top_k: int,
         document_ids: Optional[List[str]] = None,
+        organization_id: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None,
+        statement_timeout_ms: Optional[int] = None,
+        ann_options: Optional[Dict[str, Any]] = None,
+        ann_report: Optional[Dict[str, Any]] = None,
+        with_scores: bool = False,
     ) -> List[Document]:
         """
         Perform pure vector similarity search.
 
+        Filtered HNSW scans can return fewer than top_k rows. When that
+        happens, the scope holds more rows than were returned and exact
+        fallback is enabled, the query is re-run without index scans, which
+        is exact.
+
         Args:
             query: Search query
             user_id: User ID for filtering
             top_k: Number of results to retrieve
             document_ids: Optional list of document IDs to filter by (from BM25)
+            organization_id: Search the organization's chunks instead of the user's
+            query_embedding: Precomputed query embedding, computed if omitted
+            statement_timeout_ms: Optional server-side deadline for the query
+            ann_options: HNSW settings, see _ann_options
+            ann_report: Optional dict filled with the settings used and
+                whether the exact fallback ran
+            with_scores: Add the cosine distance as "distance" to the metadata
 
         Returns:
             List of Document objects with results
         """
-        session = None
-        try:
-            # Get a session and its engine
-            session = self._Session()
-            conn = session.connection()
-            cur = conn.connection.cursor(cursor_factory=RealDictCursor)
-
-            # Generate query embedding
+        if query_embedding is None:
             query_embedding = self.embeddings.embed_query(query)
-            query_embedding_array = np.array(query_embedding)
-            # Convert numpy array to list for psycopg2
-            query_embedding_list = query_embedding_array.tolist()
+        ann_options = ann_options or self._ann_options(top_k)
+        sql, params = self._dense_sql(
+            query_embedding, user_id, top_k, document_ids, organization_id, ann_options
+        )
 
-            # Prepare the SQL query
-            sql = """
-                SELECT * FROM chunks_embeddings 
-                WHERE user_id = %s 
-            """
+        with self._cursor(statement_timeout_ms) as cur:
+            report = self._apply_ann_settings(cur, ann_options)
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+            report["ann_rows"] = len(rows)
+            report["exact_fallback"] = False
+
+            # A short result is only incomplete if the scope has more rows,
+            # which is never the case for tenants with fewer than top_k chunks
+            short = len(rows) < top_k and ann_options["exact_fallback"]
+            if short:
+                cur.execute(
+                    *self._count_scope_sql(user_id, document_ids, organization_id, top_k)
+                )
+                short = cur.fetchone()["n"] > len(rows)
+            if short:
+                # Short ANN result: rerun as an exact scan
+                cur.execute("SET LOCAL enable_indexscan = off")
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+                report["exact_fallback"] = True
+                report["exact_rows"] = len(rows)
+
+        if ann_report is not None:
+            ann_report.update(report)
+        return [self._row_to_document(row, with_scores) for row in rows]
+
+    def _dense_scope(
+        self,
+        user_id: str,
+        document_ids: Optional[List[str]] = None,
+        organization_id: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """WHERE clause (alias c) and params of a dense query's scope."""
+        where, where_params = self._scope_filter(user_id, organization_id, alias="c")
+        if document_ids:
+            where += " AND c.document_id = ANY(%s)"
+            where_params = [*where_params, document_ids]
+        return where, where_params
+
+    def _count_scope_sql(
+        self,
+        user_id: str,
+        document_ids: Optional[List[str]],
+        organization_id: Optional[str],
+        limit: int,
+    ) -> Tuple[str, List[Any]]:
+        """Count of the chunks in a dense query's scope, up to limit."""
+        where, where_params = self._dense_scope(user_id, document_ids, organization_id)
+        sql = f"""
+            SELECT count(*) AS n FROM (
+                SELECT 1 FROM chunks_embeddings c WHERE {where} LIMIT %s
+            ) scope
+        """
+        return sql, [*where_params, limit]
 
-            params = [user_id]
+    def _dense_sql(
+        self,
+        query_embedding: List[float],
+        user_id: str,
+        top_k: int,
+        document_ids: Optional[List[str]] = None,
+        organization_id: Optional[str] = None,
+        ann_options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, List[Any]]:
+        """Build the vector similarity query, see _retrieve_with_dense_vector."""
+        # Convert numpy array to list for the driver
+        query_vector = np.asarray(query_embedding).tolist()
+        where, where_params = self._dense_scope(user_id, document_ids, organization_id)
+
+        source, source_params = self._dense_source(
+            query_vector, where, where_params, ann_options
+        )
+        sql = f"""
+            SELECT {_chunk_projection("c")}, c.embedding <=> %s::vector AS distance
+            FROM {source}
+            WHERE {where}
+            ORDER BY distance
+            LIMIT %s
+        """
+        params = [query_vector, *source_params, *where_params, top_k]
+        return sql, params
 
-            if document_ids:
-                sql += " AND document_id = ANY(%s) "
-                params.append(document_ids)
+    def _dense_source(
+        self,
+        query_vector: List[float],
+        where: str,
+        where_params: List[Any],
+        ann_options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        FROM clause (aliased c) of the dense query.
 
-            sql += """
-                ORDER BY embedding <=> %s::vector
+        Without quantization this is the table itself, ranked on the float32
+        HNSW index. With quantization, the ANN pass runs on the compact index
+        and only its candidates are joined back for exact re-ranking. The
+        join repeats the scope predicate so that on the partitioned layout
+        it only probes the tenant's partition.
+        """
+        quantization = (ann_options or {}).get("quantization", "none")
+        if quantization == "none":
+            return "chunks_embeddings c", []
+        return (
+            f"""(
+                SELECT c.id FROM chunks_embeddings c
+                WHERE {where}
+                ORDER BY {self._ann_order_expr(quantization, alias="c")}
                 LIMIT %s
-            """
-            params.extend([query_embedding_list, top_k])
+            ) candidates
+            JOIN chunks_embeddings c ON c.id = candidates.id AND {where}""",
+            [*where_params, query_vector, ann_options["candidates"], *where_params],
+        )
 
-            # Execute query
+    def _retrieve_with_server_rrf(
+        self,
+        query: str,
+        user_id: str,
+        top_k: int,
+        sparse_k: int,
+        dense_k: int,
+        query_embedding: List[float],
+        language: str = "french",
+        organization_id: Optional[str] = None,
+        use_text_search: bool = True,
+        rrf_k: int = 60,
+        statement_timeout_ms: Optional[int] = None,
+        ann_options: Optional[Dict[str, Any]] = None,
+        ann_report: Optional[Dict[str, Any]] = None,
+        with_scores: bool = False,
+    ) -> List[Document]:
+        """
+        Hybrid search with ranking and Reciprocal Rank Fusion done in SQL.
+
+        Both legs are CTEs of one statement: the full-text leg ranks by
+        ts_rank over the GIN-indexed tsvector, the dense leg by vector
+        distance over the HNSW index. They are fused by 1/(rrf_k + rank) and
+        only the final top_k rows are returned, without their embeddings.
+
+        Args:
+            query: Search query
+            user_id: User ID for filtering
+            top_k: Number of fused results to return
+            sparse_k: Number of candidates from the full-text leg
+            dense_k: Number of candidates from the dense leg
+            query_embedding: Embedding of the query
+            language: Language for text search
+            organization_id: Search the organization's chunks instead of the user's
+            use_text_search: Whether to include the full-text leg
+            rrf_k: RRF constant
+            statement_timeout_ms: Optional server-side deadline for the query
+            ann_options: HNSW settings of the dense leg, see _ann_options
+            ann_report: Optional dict filled with the HNSW settings used
+            with_scores: Add the fused score as "rrf_score" to the metadata
+
+        Returns:
+            List of Document objects in fused order
+        """
+        ann_options = ann_options or self._ann_options(dense_k)
+        sql, params = self._server_rrf_sql(
+            query,
+            user_id,
+            top_k,
+            sparse_k,
+            dense_k,
+            query_embedding,
+            language,
+            organization_id,
+            use_text_search,
+            rrf_k,
+            ann_options,
+        )
+        with self._cursor(statement_timeout_ms) as cur:
+            report = self._apply_ann_settings(cur, ann_options)
             cur.execute(sql, params)
             rows = cur.fetchall()
 
-            # Convert rows to Document objects
-            results = []
-            for row in rows:
-                # Create a document with the data from the row
-                doc = Document(
-                    page_content=row["data"].get("page_content", ""),
-                    metadata={
-                        **row["data"].get("metadata", {}),
-                        "id": row["id"],
-                        "document_id": row["document_id"],
-                    },
-                )
-                results.append(doc)
+        if ann_report is not None:
+            ann_report.update(report)
 
-            return results
+        return [self._row_to_document(row, with_scores) for row in rows]
 
-        finally:
-            if session:
-                session.close()
+    def _server_rrf_sql(
+        self,
+        query: str,
+        user_id: str,
+        top_k: int,
+        sparse_k: int,
+        dense_k: int,
+        query_embedding: List[float],
+        language: str = "french",
+        organization_id: Optional[str] = None,
+        use_text_search: bool = True,
+        rrf_k: int = 60,
+        ann_options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, List[Any]]:
+        """Build the single-statement hybrid query, see _retrieve_with_server_rrf."""
+        legs = []
+        params: List[Any] = []
+
+        if use_text_search:
+            tsvector = self._tsvector_expr(language, alias="c")
+            scope_sql, scope_params = self._scope_filter(
+                user_id, organization_id, alias="c"
+            )
+            legs.append(
+                f"""
+                sparse AS (
+                    SELECT id, row_number() OVER (ORDER BY rank DESC) AS rnk
+                    FROM (
+                        SELECT c.id, ts_rank({tsvector}, q) AS rank
+                        FROM chunks_embeddings c,
+                            plainto_tsquery('{language}'::regconfig, %s) AS q
+                        WHERE {scope_sql} AND {tsvector} @@ q
+                        ORDER BY rank DESC
+                        LIMIT %s
+                    ) s
+                )"""
+            )
+            params.extend([query, *scope_params, sparse_k])
 
-    def _get_bm25_retriever(self, user_id: str, k: int = 10) -> BM25Retriever:
-        """
-        Get or create BM25 retriever for a user.
-        Caches the retriever and documents to avoid rebuilding for each query.
-        """
-        if self._bm25_retriever is None or self._bm25_docs is None:
-            # Get all documents for this user
-            self._bm25_docs = self.get_all_documents(user_id=user_id)
-            logger.debug(
-                f"Initialized BM25 with {len(self._bm25_docs)} documents")
-
-            # Initialize BM25 retriever
-            self._bm25_retriever = BM25Retriever.from_documents(
-                self._bm25_docs,
-                k=k,
-                bm25_params={
-                    "k1": 1.2,
-                    "b": 0.75,
-                },
+        query_vector = np.asarray(query_embedding).tolist()
+        scope_sql, scope_params = self._scope_filter(
+            user_id, organization_id, alias="c"
+        )
+        source, source_params = self._dense_source(
+            query_vector, scope_sql, scope_params, ann_options
+        )
+        legs.append(
+            f"""
+            dense AS (
+                SELECT id, row_number() OVER (ORDER BY distance) AS rnk
+                FROM (
+                    SELECT c.id, c.embedding <=> %s::vector AS distance
+                    FROM {source}
+                    WHERE {scope_sql}
+                    ORDER BY distance
+                    LIMIT %s
+                ) d
+            )"""
+        )
+        params.extend([query_vector, *source_params, *scope_params, dense_k])
+
+        ranked = " UNION ALL ".join(
+            f"SELECT id, rnk FROM {name}"
+            for name in (["sparse"] if use_text_search else []) + ["dense"]
+        )
+        sql = f"""
+            WITH {",".join(legs)},
+            fused AS (
+                SELECT id, SUM(1.0 / (%s + rnk)) AS score
+                FROM ({ranked}) legs
+                GROUP BY id
+                ORDER BY score DESC
+                LIMIT %s
             )
+            SELECT {_chunk_projection("c")}, f.score AS rrf_score
+            FROM fused f
+            JOIN chunks_embeddings c ON c.id = f.id AND {scope_sql}
+            ORDER BY f.score DESC
+        """
+        params.extend([rrf_k, top_k, *scope_params])
+        return sql, params
+
+    @classmethod
+    def _get_search_executor(cls) -> ThreadPoolExecutor:
+        """Shared pool running the sparse and dense legs of hybrid search."""
+        with cls._search_executor_lock:
+            if cls._search_executor is None:
+                cls._search_executor = ThreadPoolExecutor(
+                    max_workers=int(cls._param("search_workers", 8)),
+                    thread_name_prefix="pgvector-search",
+                )
+            return cls._search_executor
+
+    def _sparse_leg(
+        self,
+        query: str,
+        user_id: str,
+        bm25_k: int,
+        language: str,
+        organization_id: Optional[str],
+        deadline: float,
+        with_scores: bool = False,
+    ) -> Tuple[List[Document], Dict[str, float]]:
+        """BM25 first pass followed by PostgreSQL text search."""
+        timings = {}
+        start = time.perf_counter()
+        # Get document IDs from BM25
+        bm25_doc_ids = self._retrieve_with_bm25(
+            query, user_id, bm25_k, organization_id=organization_id
+        )
+        timings["bm25_ms"] = _elapsed_ms(start)
+
+        # Get actual documents from database with text search ranking
+        start = time.perf_counter()
+        results = self._retrieve_with_text_search(
+            query=query,
+            user_id=user_id,
+            top_k=bm25_k,
+            document_ids=bm25_doc_ids,
+            language=language,
+            organization_id=organization_id,
+            statement_timeout_ms=_remaining_ms(deadline),
+            with_scores=with_scores,
+        )
+        timings["text_search_ms"] = _elapsed_ms(start)
+        return results, timings
 
-        return self._bm25_retriever
+    def _dense_leg(
+        self,
+        query: str,
+        user_id: str,
+        dense_k: int,
+        organization_id: Optional[str],
+        deadline: float,
+        ann_options: Dict[str, Any],
+        ann_report: Dict[str, Any],
+        with_scores: bool = False,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Tuple[List[Document], Dict[str, float]]:
+        """Query embedding (unless given) followed by the vector similarity query."""
+        timings = {}
+        if query_embedding is None:
+            start = time.perf_counter()
+            query_embedding = self.embeddings.embed_query(query)
+            timings["embed_ms"] = _elapsed_ms(start)
+
+        start = time.perf_counter()
+        results = self._retrieve_with_dense_vector(
+            query=query,
+            user_id=user_id,
+            top_k=dense_k,
+            document_ids=None,  # Don't filter by BM25 results for pure dense retrieval
+            organization_id=organization_id,
+            query_embedding=query_embedding,
+            statement_timeout_ms=_remaining_ms(deadline),
+            ann_options=ann_options,
+            ann_report=ann_report,
+            with_scores=with_scores,
+        )
+        timings["vector_search_ms"] = _elapsed_ms(start)
+        return results, timings
 
     def similarity_search(
         self,
@@ -526,6 +1570,8 @@ class PGVectorStore(VectorStore):
         dense_k: int = 100,
         use_bm25_first_pass: bool = True,
         language: str = "french",
+        organization_id: Optional[str] = None,
+        **kwargs: Any,
     ) -> List[Document]:
         """
         Search for documents similar to a query, filtered by user_id.
@@ -539,43 +1585,484 @@ class PGVectorStore(VectorStore):
             dense_k: Number of results to retrieve from dense vectors (default: 100)
             use_bm25_first_pass: Whether to use BM25 retrieval
             language: The language to use for text search (default: 'french')
+            organization_id: Search the organization's chunks instead of the user's
+            **kwargs: Extra options, see similarity_search_with_timings
 
         Returns:
             A list of documents similar to the query
         """
-        # Step 1: Sparse BM25 retrieval
-        sparse_results = []
+        results, timings = self.similarity_search_with_timings(
+            query,
+            user_id=user_id,
+            top_k=top_k,
+            bm25_k=bm25_k,
+            dense_k=dense_k,
+            use_bm25_first_pass=use_bm25_first_pass,
+            language=language,
+            organization_id=organization_id,
+            **kwargs,
+        )
+        logger.debug(f"Hybrid search timings: {timings}")
+        return results
+
+    def similarity_search_with_timings(
+        self,
+        query: str,
+        user_id: str = "1",
+        top_k: int = 200,
+        bm25_k: int = 100,
+        dense_k: int = 100,
+        use_bm25_first_pass: bool = True,
+        language: str = "french",
+        organization_id: Optional[str] = None,
+        sparse_deadline_ms: Optional[int] = None,
+        dense_deadline_ms: Optional[int] = None,
+        hybrid_mode: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        exact_fallback: Optional[bool] = None,
+        quantization: Optional[str] = None,
+        with_scores: bool = False,
+        diversify: Optional[bool] = None,
+        diversify_k: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
+        dedup_threshold: Optional[float] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        """
+        Hybrid search returning the fused results and per-leg timings.
+
+        The sparse (BM25 + text search) and dense (embedding + vector query)
+        legs run concurrently on separate pooled connections. A leg that
+        misses its deadline is dropped and the search degrades to the
+        results of the leg that finished.
+
+        Args:
+            sparse_deadline_ms: Deadline of the sparse leg
+                (default: vector_store.additional_params.sparse_deadline_ms)
+            dense_deadline_ms: Deadline of the dense leg
+                (default: vector_store.additional_params.dense_deadline_ms)
+            hybrid_mode: "client" fuses the legs in Python, "server" runs
+                ranking and RRF in a single SQL statement
+                (default: vector_store.additional_params.hybrid_mode)
+            ef_search: HNSW candidate list size, raised to at least dense_k
+                (default: vector_store.additional_params.hnsw_ef_search)
+            iterative_scan: "off", "strict_order" or "relaxed_order"
+                (default: vector_store.additional_params.hnsw_iterative_scan)
+            exact_fallback: Re-run the dense query as an exact scan when the
+                ANN result is short
+                (default: vector_store.additional_params.ann_exact_fallback)
+            quantization: "none", "halfvec" or "binary"; quantized modes run
+                the ANN pass on the compact index and re-rank
+                top_k * rerank_multiple candidates on the exact vectors
+                (default: vector_store.additional_params.quantization)
+            with_scores: Return the vector distance ("distance"), text rank
+                ("text_rank") and fused score ("rrf_score") in the metadata
+            diversify: Collapse near-duplicate chunks and re-order the rest
+                with Maximal Marginal Relevance, using the stored embeddings
+                (default: vector_store.additional_params.diversify)
+            diversify_k: Number of chunks kept after diversification
+                (default: vector_store.additional_params.diversify_k, else top_k)
+            mmr_lambda: MMR trade-off, 1 is pure relevance, 0 pure diversity
+                (default: vector_store.additional_params.mmr_lambda)
+            dedup_threshold: Cosine similarity at which chunks are duplicates
+                (default: vector_store.additional_params.dedup_threshold)
+            Other arguments are the same as similarity_search.
+
+        Returns:
+            Tuple of (documents, timings). Timings hold the wall time of each
+            leg and its steps in milliseconds, the legs that timed out or
+            failed, under "ann" the HNSW settings used and whether the
+            exact fallback ran, and the diversification time if enabled.
+        """
+        start = time.perf_counter()
+        diversify_options = self._diversify_options(
+            top_k, diversify, diversify_k, mmr_lambda, dedup_threshold
+        )
+        # Embedded once for the dense leg and MMR
+        query_embedding, embed_ms = None, None
+        if diversify_options:
+            embed_start = time.perf_counter()
+            query_embedding = self.embeddings.embed_query(query)
+            embed_ms = _elapsed_ms(embed_start)
+        results, timings = self._hybrid_search_with_timings(
+            query,
+            user_id=user_id,
+            top_k=top_k,
+            bm25_k=bm25_k,
+            dense_k=dense_k,
+            use_bm25_first_pass=use_bm25_first_pass,
+            language=language,
+            organization_id=organization_id,
+            sparse_deadline_ms=sparse_deadline_ms,
+            dense_deadline_ms=dense_deadline_ms,
+            hybrid_mode=hybrid_mode,
+            ef_search=ef_search,
+            iterative_scan=iterative_scan,
+            exact_fallback=exact_fallback,
+            quantization=quantization,
+            with_scores=with_scores,
+            query_embedding=query_embedding,
+        )
+        if embed_ms is not None:
+            timings["embed_ms"] = embed_ms
+        if diversify_options and results:
+            diversify_start = time.perf_counter()
+            sql, params = self._embeddings_sql(results, user_id, organization_id)
+            with self._cursor() as cur:
+                cur.execute(sql, params)
+                vectors = {row["id"]: row["embedding"] for row in cur.fetchall()}
+            timings["diversified_from"] = len(results)
+            results = self._diversify(
+                results, query_embedding, vectors, diversify_options
+            )
+            timings["diversify_ms"] = _elapsed_ms(diversify_start)
+            timings["total_ms"] = _elapsed_ms(start)
+        return results, timings
+
+    def _hybrid_search_with_timings(
+        self,
+        query: str,
+        user_id: str = "1",
+        top_k: int = 200,
+        bm25_k: int = 100,
+        dense_k: int = 100,
+        use_bm25_first_pass: bool = True,
+        language: str = "french",
+        organization_id: Optional[str] = None,
+        sparse_deadline_ms: Optional[int] = None,
+        dense_deadline_ms: Optional[int] = None,
+        hybrid_mode: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        exact_fallback: Optional[bool] = None,
+        quantization: Optional[str] = None,
+        with_scores: bool = False,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        """
+        Hybrid search without diversification, see similarity_search_with_timings.
+        query_embedding skips embedding the query when already computed.
+        """
+        start = time.perf_counter()
+        sparse_deadline_ms = sparse_deadline_ms or self._param(
+            "sparse_deadline_ms", 2000
+        )
+        dense_deadline_ms = dense_deadline_ms or self._param("dense_deadline_ms", 5000)
+        hybrid_mode = hybrid_mode or self._param("hybrid_mode", "client")
+        ann_options = self._ann_options(
+            dense_k,
+            ef_search=ef_search,
+            iterative_scan=iterative_scan,
+            exact_fallback=exact_fallback,
+            quantization=quantization,
+        )
+
+        if hybrid_mode == "server":
+            return self._server_hybrid_search(
+                query,
+                user_id=user_id,
+                top_k=top_k,
+                sparse_k=bm25_k,
+                dense_k=dense_k,
+                use_text_search=use_bm25_first_pass,
+                language=language,
+                organization_id=organization_id,
+                deadline_ms=max(sparse_deadline_ms, dense_deadline_ms),
+                ann_options=ann_options,
+                with_scores=with_scores,
+                query_embedding=query_embedding,
+            )
+        if hybrid_mode != "client":
+            raise ValueError(f"Unsupported hybrid mode: {hybrid_mode}")
+
+        executor = self._get_search_executor()
+        ann_report: Dict[str, Any] = {}
+
+        legs = {}
         if use_bm25_first_pass:
-            # Get document IDs from BM25
-            bm25_doc_ids = self._retrieve_with_bm25(query, user_id, bm25_k)
-            # Get actual documents from database with text search ranking
-            sparse_results = self._retrieve_with_text_search(
-                query=query,
+            legs["sparse"] = (
+                executor.submit(
+                    self._sparse_leg,
+                    query,
+                    user_id,
+                    bm25_k,
+                    language,
+                    organization_id,
+                    start + sparse_deadline_ms / 1000,
+                    with_scores,
+                ),
+                start + sparse_deadline_ms / 1000,
+            )
+        legs["dense"] = (
+            executor.submit(
+                self._dense_leg,
+                query,
+                user_id,
+                dense_k,
+                organization_id,
+                start + dense_deadline_ms / 1000,
+                ann_options,
+                ann_report,
+                with_scores,
+                query_embedding,
+            ),
+            start + dense_deadline_ms / 1000,
+        )
+
+        timings: Dict[str, Any] = {
+            "timed_out": [],
+            "failed": [],
+            "mode": "client",
+            "ann": ann_report,
+        }
+        results: Dict[str, List[Document]] = {}
+        for name, (future, deadline) in legs.items():
+            try:
+                docs, leg_timings = future.result(
+                    timeout=max(0.0, deadline - time.perf_counter())
+                )
+                results[name] = docs
+                timings.update(leg_timings)
+                timings[f"{name}_ms"] = sum(leg_timings.values())
+            except FutureTimeoutError:
+                future.cancel()
+                timings["timed_out"].append(name)
+                logger.warning(f"{name} retrieval leg missed its deadline")
+            except Exception as e:
+                timings["failed"].append(name)
+                logger.error(f"{name} retrieval leg failed: {e}")
+
+        if not results and timings["failed"] and not timings["timed_out"]:
+            raise RuntimeError(f"All retrieval legs failed for query: {query[:50]}")
+
+        # Fuse results using RRF
+        fusion_start = time.perf_counter()
+        fused_results = self._fuse_legs(results, top_k, with_scores)
+        timings["fusion_ms"] = _elapsed_ms(fusion_start)
+        timings["total_ms"] = _elapsed_ms(start)
+
+        return fused_results, timings
+
+    def _diversify_options(
+        self,
+        top_k: int,
+        diversify: Optional[bool] = None,
+        diversify_k: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
+        dedup_threshold: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Resolve diversification settings, None when it is disabled."""
+        if diversify is None:
+            diversify = self._param("diversify", False)
+        if not diversify:
+            return None
+        if mmr_lambda is None:
+            mmr_lambda = self._param("mmr_lambda", 0.7)
+        if dedup_threshold is None:
+            dedup_threshold = self._param("dedup_threshold", 0.95)
+        return {
+            "k": int(diversify_k or self._param("diversify_k") or top_k),
+            "lambda": float(mmr_lambda),
+            "dedup_threshold": float(dedup_threshold),
+        }
+
+    def _embeddings_sql(
+        self,
+        documents: List[Document],
+        user_id: str,
+        organization_id: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """Fetch the stored embeddings of retrieved chunks as float arrays."""
+        where, params = self._scope_filter(user_id, organization_id)
+        sql = f"""
+            SELECT id, embedding::real[] AS embedding
+            FROM chunks_embeddings
+            WHERE {where} AND id = ANY(%s)
+        """
+        return sql, [*params, [doc.metadata["id"] for doc in documents]]
+
+    @staticmethod
+    def _diversify(
+        documents: List[Document],
+        query_embedding: List[float],
+        vectors: Dict[str, List[float]],
+        options: Dict[str, Any],
+    ) -> List[Document]:
+        """
+        Collapse near-duplicates, then pick options["k"] chunks with MMR.
+
+        Args:
+            documents: Retrieved chunks in rank order
+            query_embedding: Embedding of the query
+            vectors: Stored embedding of each chunk, by chunk id
+            options: See _diversify_options
+        """
+        # Chunks deleted since retrieval have no vector anymore
+        documents = [doc for doc in documents if doc.metadata["id"] in vectors]
+        if not documents:
+            return []
+        matrix = np.asarray(
+            [vectors[doc.metadata["id"]] for doc in documents], dtype=np.float32
+        )
+
+        if options["dedup_threshold"] < 1:
+            kept = collapse_near_duplicates(matrix, options["dedup_threshold"])
+            documents = [documents[i] for i in kept]
+            matrix = matrix[kept]
+
+        selected = mmr_select(query_embedding, matrix, options["k"], options["lambda"])
+        return [documents[i] for i in selected]
+
+    def _fuse_legs(
+        self,
+        results: Dict[str, List[Document]],
+        top_k: int,
+        with_scores: bool = False,
+    ) -> List[Document]:
+        """Fuse the sparse and dense leg results, or keep the one that answered."""
+        sparse_results = results.get("sparse", [])
+        dense_results = results.get("dense", [])
+        if sparse_results and dense_results:
+            return self._fuse_results_rrf(
+                sparse_results,
+                dense_results,
+                k=60,
+                top_k=top_k,
+                with_scores=with_scores,
+            )
+        # Only one leg answered in time (or BM25 is disabled)
+        return (dense_results or sparse_results)[:top_k]
+
+    def _server_hybrid_search(
+        self,
+        query: str,
+        user_id: str,
+        top_k: int,
+        sparse_k: int,
+        dense_k: int,
+        use_text_search: bool,
+        language: str,
+        organization_id: Optional[str],
+        deadline_ms: int,
+        ann_options: Dict[str, Any],
+        with_scores: bool = False,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Tuple[List[Document], Dict[str, Any]]:
+        """Single round trip hybrid search, see _retrieve_with_server_rrf."""
+        start = time.perf_counter()
+        deadline = start + deadline_ms / 1000
+        ann_report: Dict[str, Any] = {}
+        timings: Dict[str, Any] = {
+            "timed_out": [],
+            "failed": [],
+            "mode": "server",
+            "ann": ann_report,
+        }
+
+        if query_embedding is None:
+            query_embedding = self.embeddings.embed_query(query)
+            timings["embed_ms"] = _elapsed_ms(start)
+
+        query_start = time.perf_counter()
+        try:
+            results = self._retrieve_with_server_rrf(
+                query,
                 user_id=user_id,
-                top_k=bm25_k,
-                document_ids=bm25_doc_ids,
+                top_k=top_k,
+                sparse_k=sparse_k,
+                dense_k=dense_k,
+                query_embedding=query_embedding,
                 language=language,
+                organization_id=organization_id,
+                use_text_search=use_text_search,
+                statement_timeout_ms=_remaining_ms(deadline),
+                ann_options=ann_options,
+                ann_report=ann_report,
+                with_scores=with_scores,
             )
+        except QueryCanceled:
+            logger.warning("Server-side hybrid query missed its deadline")
+            timings["timed_out"].append("hybrid")
+            results = []
+        timings["hybrid_query_ms"] = _elapsed_ms(query_start)
+        timings["total_ms"] = _elapsed_ms(start)
+        return results, timings
 
-        # Step 2: Dense vector retrieval
-        dense_results = self._retrieve_with_dense_vector(
-            query=query,
-            user_id=user_id,
-            top_k=dense_k,
-            document_ids=None,  # Don't filter by BM25 results for pure dense retrieval
+    def measure_recall(
+        self,
+        queries: List[str],
+        user_id: str,
+        top_k: int = 10,
+        organization_id: Optional[str] = None,
+        quantization: Optional[str] = None,
+        ef_search: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recall@top_k of the ANN path against an exact float32 scan.
+
+        Each query runs through the dense leg as configured (quantized or
+        not, without exact fallback) and as an exact scan with index scans
+        disabled. Recall is the share of exact neighbours the ANN path found.
+
+        Args:
+            queries: Representative queries of the tenant
+            user_id: User whose chunks are searched
+            top_k: Number of neighbours compared
+            organization_id: Search the organization's chunks instead of the user's
+            quantization: Mode to evaluate (default: configured mode)
+            ef_search: HNSW candidate list size to evaluate
+
+        Returns:
+            Dict with the mean and per-query recall, the settings used and the
+            mean latency of both paths in milliseconds
+        """
+        options = self._ann_options(
+            top_k,
+            ef_search=ef_search,
+            exact_fallback=False,
+            quantization=quantization,
         )
+        recalls, ann_ms, exact_ms = [], [], []
+        for query in queries:
+            query_embedding = self.embeddings.embed_query(query)
 
-        # Step 3: Fuse results using RRF
-        if use_bm25_first_pass and sparse_results:
-            fused_results = self._fuse_results_rrf(
-                sparse_results, dense_results, k=60, top_k=top_k
+            start = time.perf_counter()
+            approx = self._retrieve_with_dense_vector(
+                query,
+                user_id=user_id,
+                top_k=top_k,
+                organization_id=organization_id,
+                query_embedding=query_embedding,
+                ann_options=options,
             )
-        else:
-            # If no BM25, just use dense results
-            fused_results = dense_results[:top_k]
+            ann_ms.append(_elapsed_ms(start))
 
-        # Return fused results
-        return fused_results
+            sql, params = self._dense_sql(
+                query_embedding, user_id, top_k, organization_id=organization_id
+            )
+            start = time.perf_counter()
+            with self._cursor() as cur:
+                cur.execute("SET LOCAL enable_indexscan = off")
+                cur.execute(sql, params)
+                exact_ids = {row["id"] for row in cur.fetchall()}
+            exact_ms.append(_elapsed_ms(start))
+
+            approx_ids = {doc.metadata["id"] for doc in approx}
+            recalls.append(
+                len(approx_ids & exact_ids) / len(exact_ids) if exact_ids else 1.0
+            )
+
+        count = len(recalls) or 1
+        return {
+            "recall": sum(recalls) / count,
+            "recalls": recalls,
+            "top_k": top_k,
+            "quantization": options["quantization"],
+            "candidates": options["candidates"],
+            "ef_search": options["ef_search"],
+            "ann_ms": sum(ann_ms) / count,
+            "exact_ms": sum(exact_ms) / count,
+        }
 
     def from_texts(
         self,
@@ -592,36 +2079,26 @@ class PGVectorStore(VectorStore):
             embedding: Optional embedding function (will use self.embeddings if not provided)
             metadatas: Optional list of metadatas associated with the texts
             ids: Optional list of IDs to associate with the texts
-            **kwargs: Additional arguments (must include document_id)
+            **kwargs: Additional arguments (must include document_id, may
+                include upsert)
 
         Returns:
             List of IDs of the added texts
         """
-        session = None
         try:
-            session = self._Session()
-
             # Get document_id from kwargs
             document_id = kwargs.get("document_id")
             if not document_id:
                 raise ValueError("document_id is required in kwargs")
 
-            # Check if document exists
-            existing_doc = (
-                session.query(SQLDocument).filter(
-                    SQLDocument.id == document_id).first()
-            )
-            if not existing_doc:
-                raise ValueError(f"Parent document {document_id} not found")
-
-            # Get user_id from the document
-            user_id = existing_doc.user_id
+            # Get user_id from the parent document
+            user_id = self._get_document_owner(document_id)
 
             # Use provided embeddings or default to self.embeddings
             embeddings_func = embedding or self.embeddings
 
             # Generate embeddings
-            embeddings = embeddings_func.embed_documents(texts)
+            embeddings = embed_documents_cached(embeddings_func, texts)
 
             # Handle metadata
             if not metadatas:
@@ -631,23 +2108,23 @@ class PGVectorStore(VectorStore):
             if not ids:
                 ids = [str(uuid.uuid4()) for _ in texts]
 
-            # Create chunk objects
-            chunk_objects = []
-            for text, metadata, embedding_vector, chunk_id in zip(
-                texts, metadatas, embeddings, ids
-            ):
-                chunk = ChunkEmbedding(
-                    id=chunk_id,
-                    document_id=document_id,
-                    user_id=user_id,
-                    data={"page_content": text, "metadata": metadata},
-                    embedding=embedding_vector,
-                )
-                chunk_objects.append(chunk)
-
-            # Add all chunks to session
-            session.add_all(chunk_objects)
-            session.commit()
+            self._write_chunks(
+                document_id,
+                user_id,
+                ids=ids,
+                texts=texts,
+                metadatas=metadatas,
+                embeddings=embeddings,
+                upsert=kwargs.get("upsert", False),
+            )
+            self._notify_chunks_added(
+                document_id,
+                user_id,
+                [
+                    Document(id=chunk_id, page_content=text, metadata=metadata)
+                    for text, metadata, chunk_id in zip(texts, metadatas, ids)
+                ],
+            )
 
             logger.info(
                 f"Successfully added {len(texts)} texts for document {document_id}"
@@ -655,17 +2132,13 @@ class PGVectorStore(VectorStore):
             return ids
 
         except Exception as e:
-            if session:
-                session.rollback()
             logger.error(f"Failed to add texts: {e}")
             raise
-        finally:
-            if session:
-                session.close()
 
     def delete_documents(self, doc_id: str) -> bool:
         session = None
         try:
+            session = self._Session()
             user_id = supabase.auth.get_user().user.id
             doc = session.query(SQLDocument).filter(
                 SQLDocument.id == doc_id, SQLDocument.user_id == user_id).first()
@@ -677,6 +2150,8 @@ class PGVectorStore(VectorStore):
             deleted_count = query.delete(synchronize_session=False)
             session.commit()
 
+            self._bm25_cache.remove_document(doc_id)
+
             logger.info(f"Successfully deleted {deleted_count} chunks")
             return True
         except Exception as e:
@@ -0,0 +1,123 @@
+"""
+SQLite docstore for the FAISS backend.
+
+Chunk text and metadata live in a SQLite file instead of a pickled
+InMemoryDocstore, so only the FAISS index is resident and LangChain's FAISS
+store fetches the rows of the top-k hits on demand. Rows are written when
+chunks are added, the file is opened in WAL mode so several processes can
+read it while one writes.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Union
+
+from langchain.docstore.document import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are not shared across fork()ed workers
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    id TEXT PRIMARY KEY,
+                    page_content TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+                """
+            )
+            connection.commit()
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Insert or replace documents keyed by docstore id."""
+        rows = [
+            (doc_id, doc.page_content, json.dumps(doc.metadata, default=str))
+            for doc_id, doc in texts.items()
+        ]
+        if not rows:
+            return
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO documents (id, page_content, metadata) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            connection.commit()
+
+    def delete(self, ids: List) -> None:
+        if not ids:
+            return
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "DELETE FROM documents WHERE id = ?", [(doc_id,) for doc_id in ids]
+            )
+            connection.commit()
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT page_content, metadata FROM documents WHERE id = ?",
+                    (search,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def mget(self, ids: Iterable[str]) -> Dict[str, Document]:
+        """Documents for several ids in one query (missing ids are left out)."""
+        ids = list(ids)
+        if not ids:
+            return {}
+        documents = {}
+        with self._lock:
+            connection = self._connect()
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(ids), 900):
+                batch = ids[start:start + 900]
+                placeholders = ",".join("?" * len(batch))
+                for doc_id, page_content, metadata in connection.execute(
+                    "SELECT id, page_content, metadata FROM documents "
+                    f"WHERE id IN ({placeholders})",
+                    batch,
+                ):
+                    documents[doc_id] = Document(
+                        id=doc_id, page_content=page_content, metadata=json.loads(metadata)
+                    )
+        return documents
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
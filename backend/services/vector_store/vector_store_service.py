@@ -1,6 +1,12 @@
+import bisect
+import fcntl
+import json
 import logging
 import os
-from typing import List, Optional, Union
+import pickle
+import threading
+import uuid
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import faiss
 from langchain.docstore.document import Document
@@ -10,17 +16,72 @@ from langchain_community.retrievers import BM25Retriever
 from langchain_community.vectorstores import FAISS, Chroma
 
 from core.config import settings
-from core.factories.embeddings_factory import get_embeddings
+from core.factories.embeddings_factory import embed_documents_cached, get_embeddings
+from services.vector_store.faiss_index import (
+    FaissIndexConfig,
+    apply_search_params,
+    build_index,
+    ensure_id_mapped,
+    index_type_of,
+    migrate_index,
+    read_index,
+    writable_copy,
+)
+from services.vector_store.id_mapped_faiss import IdMappedFAISS
+from services.vector_store.sqlite_docstore import SQLiteDocstore
+from services.vector_store.faiss_persistence import (
+    MutationLog,
+    WriteBehindPersister,
+    replay_mutations,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class VectorStoreService:
     def __init__(self, store=None, embeddings=None):
-        self.store = store
+        if not embeddings:
+            raise ValueError("Embeddings must be provided")
         self.embeddings = embeddings
-        if not store or not embeddings:
-            raise ValueError("Both store and embeddings must be provided")
+        self.index_config = FaissIndexConfig.from_params(
+            settings.vector_store.additional_params
+        )
+        # Guards index swaps (training/migration) against concurrent searches
+        self._index_lock = threading.RLock()
+        # Memory-mapped indexes are shared read-only between processes and
+        # copied into this process on its first write
+        self._mmap = bool(settings.vector_store.additional_params.get("faiss_mmap", False))
+        self._index_mmapped = False
+        # Set when loading converted the snapshot (docstore, id layout)
+        self._snapshot_outdated = False
+        self._snapshot_mtime: Optional[int] = None
+        self._compact_ratio = float(
+            settings.vector_store.additional_params.get("faiss_compact_ratio", 0.2)
+        )
+        # "memory" pickles an InMemoryDocstore with the index, "sqlite" keeps
+        # chunks in docstore.sqlite and only loads the top-k hits
+        self._docstore_kind = settings.vector_store.additional_params.get(
+            "faiss_docstore", "memory"
+        )
+        self.store = store or self._initialize_faiss()
+        # Reverse of index_to_docstore_id, for O(1) chunk_in_store
+        self._chunk_ids = set(self.store.index_to_docstore_id.values())
+        # Parent document_id -> chunk ids, built on the first document delete
+        self._chunks_by_document: Optional[Dict[str, Set[str]]] = None
+        self._document_of: Dict[str, str] = {}
+
+        # "sync" snapshots the whole store after every mutation,
+        # "write_behind" logs mutations and snapshots in the background
+        params = settings.vector_store.additional_params
+        self._persister: Optional[WriteBehindPersister] = None
+        if params.get("faiss_persistence", "sync") == "write_behind":
+            self._persister = WriteBehindPersister(
+                settings.paths.faiss_index_dir,
+                self.save,
+                lock=self._index_lock,
+                flush_interval_s=params.get("faiss_flush_interval_s", 30),
+                flush_max_mutations=params.get("faiss_flush_max_mutations", 1000),
+            )
 
     def _initialize_store(self):
         # Clear existing store when changing providers
@@ -33,8 +94,164 @@ class VectorStoreService:
         return self.store.as_retriever(**kwargs)
 
     def save(self):
-        os.makedirs(settings.paths.faiss_index_dir, exist_ok=True)
-        self.store.save_local(settings.paths.faiss_index_dir)
+        directory = settings.paths.faiss_index_dir
+        os.makedirs(directory, exist_ok=True)
+        # Per process, so concurrent saves never write into each other's files
+        staging = f"{directory}.tmp.{os.getpid()}"
+        with self._index_lock:
+            # Rebuild an HNSW graph once enough of it is deleted vectors
+            if self.store.compact(self._compact_ratio):
+                self._index_mmapped = False
+            self._write_snapshot(staging)
+            # Replaced by rename, never rewritten in place: processes mapping
+            # the previous snapshot keep reading their (unlinked) file.
+            # index.faiss goes last, its mtime is what readers reload on, and
+            # the file lock keeps two processes' renames from interleaving.
+            names = sorted(os.listdir(staging), key=lambda name: name == "index.faiss")
+            with open(os.path.join(directory, ".save.lock"), "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                for name in names:
+                    os.replace(os.path.join(staging, name), os.path.join(directory, name))
+                # The other docstore's mapping would be stale from now on
+                stale = (
+                    "index.pkl"
+                    if isinstance(self.store.docstore, SQLiteDocstore)
+                    else "index_to_docstore_id.json"
+                )
+                if os.path.exists(os.path.join(directory, stale)):
+                    os.remove(os.path.join(directory, stale))
+            os.rmdir(staging)
+            self._snapshot_mtime = self._index_file_mtime()
+
+    def _write_snapshot(self, directory: str):
+        if not isinstance(self.store.docstore, SQLiteDocstore):
+            self.store.save_local(directory)
+            return
+        # The docstore is already on disk, only the index and the position
+        # to docstore id mapping are written (without pickle)
+        os.makedirs(directory, exist_ok=True)
+        faiss.write_index(self.store.index, os.path.join(directory, "index.faiss"))
+        with open(os.path.join(directory, "index_to_docstore_id.json"), "w") as f:
+            json.dump(
+                {str(i): doc_id for i, doc_id in self.store.index_to_docstore_id.items()},
+                f,
+            )
+
+    def _new_docstore(self):
+        if self._docstore_kind == "sqlite":
+            return SQLiteDocstore(
+                os.path.join(settings.paths.faiss_index_dir, "docstore.sqlite")
+            )
+        return InMemoryDocstore()
+
+    @staticmethod
+    def _index_file_path() -> str:
+        return os.path.join(settings.paths.faiss_index_dir, "index.faiss")
+
+    def _index_file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self._index_file_path()).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_store(self) -> IdMappedFAISS:
+        """Load the snapshot, memory-mapping the index when faiss_mmap is set."""
+        loaded, self._index_mmapped = read_index(self._index_file_path(), self._mmap)
+        index, converted = ensure_id_mapped(loaded, self.index_config)
+        if converted:
+            self._snapshot_outdated = True
+            # Flat/HNSW conversion re-adds the vectors into process memory
+            if not isinstance(index, faiss.IndexIVF):
+                self._index_mmapped = False
+        # A snapshot has one mapping file, for the docstore it was saved with
+        ids_path = os.path.join(settings.paths.faiss_index_dir, "index_to_docstore_id.json")
+        if os.path.exists(ids_path):
+            with open(ids_path) as f:
+                index_to_docstore_id = {int(i): doc_id for i, doc_id in json.load(f).items()}
+            docstore = SQLiteDocstore(
+                os.path.join(settings.paths.faiss_index_dir, "docstore.sqlite")
+            )
+            if self._docstore_kind != "sqlite":
+                docstore = self._docstore_to_memory(docstore, index_to_docstore_id)
+        else:
+            with open(
+                os.path.join(settings.paths.faiss_index_dir, "index.pkl"), "rb"
+            ) as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+            if self._docstore_kind == "sqlite":
+                docstore = self._migrate_docstore(docstore, index_to_docstore_id)
+        self._snapshot_mtime = self._index_file_mtime()
+        apply_search_params(index, self.index_config.nprobe, self.index_config.ef_search)
+        return IdMappedFAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+
+    def _migrate_docstore(self, docstore, index_to_docstore_id) -> SQLiteDocstore:
+        """Copy a pickled InMemoryDocstore into SQLite (first sqlite load)."""
+        target = self._new_docstore()
+        ids = list(index_to_docstore_id.values())
+        for start in range(0, len(ids), 1000):
+            batch = {}
+            for doc_id in ids[start:start + 1000]:
+                doc = docstore.search(doc_id)
+                if isinstance(doc, Document):
+                    batch[doc_id] = doc
+            target.add(batch)
+        logger.info(f"Migrated {len(ids)} chunks to {target.path}")
+        self._snapshot_outdated = True
+        return target
+
+    def _docstore_to_memory(self, docstore, index_to_docstore_id) -> InMemoryDocstore:
+        """Load a SQLite docstore into an InMemoryDocstore (back to "memory")."""
+        documents = docstore.mget(index_to_docstore_id.values())
+        docstore.close()
+        logger.info(f"Loaded {len(documents)} chunks from SQLite into memory")
+        self._snapshot_outdated = True
+        return InMemoryDocstore(documents)
+
+    def _make_writable(self, store=None):
+        """Copy a memory-mapped index into process memory before mutating it."""
+        store = store or self.store
+        if self._index_mmapped:
+            store.index = writable_copy(store.index)
+            apply_search_params(
+                store.index, self.index_config.nprobe, self.index_config.ef_search
+            )
+            self._index_mmapped = False
+
+    def _reload_if_stale(self):
+        """
+        Pick up a snapshot saved by another process.
+
+        Only read-only (still mapped) indexes are reloaded, a process that
+        wrote to its copy keeps it until it saves.
+        """
+        if not self._index_mmapped:
+            return
+        mtime = self._index_file_mtime()
+        if mtime is None or mtime == self._snapshot_mtime:
+            return
+        with self._index_lock:
+            if mtime == self._snapshot_mtime:
+                return
+            logger.info("FAISS snapshot changed on disk, reloading")
+            self.store = self._load_store()
+            self._chunk_ids = set(self.store.index_to_docstore_id.values())
+            self._chunks_by_document = None
+
+    def flush(self) -> bool:
+        """Write pending write-behind mutations to the snapshot now."""
+        if self._persister:
+            return self._persister.flush()
+        return False
+
+    def close(self):
+        """Flush and stop the write-behind timer."""
+        if self._persister:
+            self._persister.close()
 
     def get_document(self, document_id: str) -> Optional[Document]:
         try:
@@ -52,8 +269,8 @@ class VectorStoreService:
         try:
             if newDocument:
                 newDocument.metadata["id"] = document_id
-                self.delete_documents([document_id])
-                self.add_documents([newDocument])
+                newDocument.id = document_id
+                self.add_documents_batch([newDocument], on_duplicate="update")
             return True
         except Exception as e:
             logger.error(f"Error updating document {document_id}: {e}")
@@ -63,6 +280,14 @@ class VectorStoreService:
         docstore = self.store.docstore
         index_to_docstore_id = self.store.index_to_docstore_id
 
+        if isinstance(docstore, SQLiteDocstore):
+            documents = docstore.mget(index_to_docstore_id.values())
+            return [
+                documents[doc_id]
+                for doc_id in index_to_docstore_id.values()
+                if doc_id in documents
+            ]
+
         # Retrieve all documents
         all_documents = []
         for index, doc_id in index_to_docstore_id.items():
@@ -72,19 +297,140 @@ class VectorStoreService:
 
         return all_documents
 
-    def add_documents(self, documents: List[Document]) -> bool:
-        """Add documents with proper synchronization"""
+    def get_documents_page(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = 100,
+        after_id: Optional[str] = None,
+        organization_id: Optional[str] = None,
+    ) -> Tuple[List[Document], Optional[str]]:
+        """
+        Chunks ordered by chunk id, limit at a time (as PGVectorStore's).
+
+        The FAISS store is a single local collection, user_id and
+        organization_id are accepted for interface parity and not used.
+
+        Returns:
+            Tuple of (documents, cursor of the next page or None on the last page)
+        """
+        with self._index_lock:
+            chunk_ids = sorted(self._chunk_ids)
+            docstore = self.store.docstore
+        start = bisect.bisect_right(chunk_ids, after_id) if after_id is not None else 0
+        page_ids = chunk_ids[start:start + limit]
+
+        if isinstance(docstore, SQLiteDocstore):
+            found = docstore.mget(page_ids)
+        else:
+            found = {chunk_id: docstore.search(chunk_id) for chunk_id in page_ids}
+        documents = [
+            found[chunk_id] for chunk_id in page_ids
+            if isinstance(found.get(chunk_id), Document)
+        ]
+        next_cursor = page_ids[-1] if len(page_ids) == limit else None
+        return documents, next_cursor
+
+    def add_documents(
+        self, documents: List[Document], document_id: Optional[str] = None
+    ) -> bool:
+        """
+        Add chunks, skipping the ones already in the store.
+
+        Returns:
+            True if at least one chunk was added
+        """
+        counts = self.add_documents_batch(documents, document_id=document_id)
+        return counts["added"] > 0
+
+    def add_documents_batch(
+        self,
+        documents: List[Document],
+        on_duplicate: str = "skip",
+        document_id: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """
+        Add chunks, handling the ones already in the store per chunk.
+
+        Only new and updated chunks are embedded, so re-ingesting unchanged
+        chunks costs one set lookup each.
+
+        Args:
+            documents: Chunks to add, identified by doc.id (a uuid if missing)
+            on_duplicate: "skip" keeps the stored chunk, "update" replaces it
+            document_id: Parent document id stored in each chunk's metadata
+
+        Returns:
+            Counts of "added", "updated" and "skipped" chunks
+        """
+        if on_duplicate not in ("skip", "update"):
+            raise ValueError(f"Unsupported on_duplicate mode: {on_duplicate}")
         try:
+            counts = {"added": 0, "updated": 0, "skipped": 0}
+            batch: Dict[str, Document] = {}
             for doc in documents:
-                if self.chunk_in_store(doc.id):
-                    print(f"Document {doc.id} already in store")
-                    return False
-                else:
-                    print(f"Adding {doc.id} to store")
+                chunk_id = doc.id or str(uuid.uuid4())
+                if chunk_id in batch:
+                    # Repeated within the batch, the first occurrence wins
+                    counts["skipped"] += 1
+                    continue
+                if on_duplicate == "skip" and self.chunk_in_store(chunk_id):
+                    counts["skipped"] += 1
+                    continue
+                if document_id:
+                    doc.metadata["document_id"] = document_id
+                batch[chunk_id] = doc
 
-            self.store.add_documents(documents)
-            self.save()
-            return True
+            if batch:
+                ids = list(batch)
+                texts = [doc.page_content for doc in batch.values()]
+                metadatas = [doc.metadata for doc in batch.values()]
+                # Embedded here rather than in store.add_documents so the
+                # vectors can go to the mutation log
+                vectors = embed_documents_cached(self.embeddings, texts)
+
+                with self._index_lock:
+                    # Checked again under the lock: another writer may have
+                    # added or deleted some of these chunks meanwhile
+                    stored = [self.chunk_in_store(chunk_id) for chunk_id in ids]
+                    if on_duplicate == "skip" and any(stored):
+                        counts["skipped"] += sum(stored)
+                        keep = [i for i, in_store in enumerate(stored) if not in_store]
+                        ids = [ids[i] for i in keep]
+                        texts = [texts[i] for i in keep]
+                        metadatas = [metadatas[i] for i in keep]
+                        vectors = [vectors[i] for i in keep]
+                        stored = [False] * len(keep)
+                    replaced = [chunk_id for chunk_id, in_store in zip(ids, stored) if in_store]
+                    counts["updated"] = len(replaced)
+                    counts["added"] = len(ids) - len(replaced)
+                    if not ids:
+                        return counts
+                    self._make_writable()
+                    if replaced:
+                        self.store.delete(replaced)
+                        self._forget_document_chunks(replaced)
+                    self.store.add_embeddings(
+                        list(zip(texts, vectors)), metadatas=metadatas, ids=ids
+                    )
+                    self._chunk_ids.update(ids)
+                    if self._chunks_by_document is not None:
+                        self._index_document_chunks(ids, metadatas)
+                    self._maybe_migrate_index()
+                    # Logged under the same lock that applied the mutation,
+                    # see WriteBehindPersister
+                    if self._persister:
+                        if replaced:
+                            self._persister.record_delete(replaced)
+                        self._persister.record_add(ids, texts, metadatas, vectors)
+
+                if not self._persister:
+                    self.save()
+
+            logger.info(
+                f"Added {counts['added']}, updated {counts['updated']}, "
+                f"skipped {counts['skipped']} chunks"
+            )
+            return counts
         except Exception as e:
             logger.error(f"Error adding documents: {e}")
             raise e
@@ -122,42 +468,200 @@ class VectorStoreService:
                 f"Fallback: Using computed embedding dimension: {embedding_dim}"
             )
 
-        if (
-            os.path.exists(settings.paths.faiss_index_dir)
-            and len(os.listdir(settings.paths.faiss_index_dir)) > 0
-        ):
+        if os.path.exists(os.path.join(settings.paths.faiss_index_dir, "index.faiss")):
             logging.info("Loading existing FAISS vector store")
-            store = FAISS.load_local(
-                settings.paths.faiss_index_dir,
-                self.embeddings,
-                allow_dangerous_deserialization=True,
-            )
+            store = self._load_store()
             # Verify dimension match
             if store.index.d != embedding_dim:
                 raise ValueError(
                     f"Embedding dimension mismatch: Index has {store.index.d}D vs Model has {embedding_dim}D"
                 )
+            # Mutations logged by write-behind mode after the last snapshot
+            log = MutationLog(settings.paths.faiss_index_dir)
+            if not log.is_empty():
+                self._make_writable(store)
+            replayed = replay_mutations(store, log)
+            if self._maybe_migrate_index(store) or replayed or self._snapshot_outdated:
+                self._index_mmapped = False
+                self.store = store
+                self.save()
+                log.truncate()
         else:
             logging.info(f"Initializing new FAISS index with dimension {embedding_dim}")
-            index = faiss.IndexFlatL2(embedding_dim)
-            store = FAISS(
+            # Trained index types start flat and are migrated once enough
+            # vectors exist to train them
+            index = build_index(FaissIndexConfig(), embedding_dim)
+            store = IdMappedFAISS(
                 embedding_function=self.embeddings,
                 index=index,
-                docstore=InMemoryDocstore(),
+                docstore=self._new_docstore(),
                 index_to_docstore_id={},
             )
-            store.save_local(settings.paths.faiss_index_dir)
+            self._maybe_migrate_index(store)
+            self.store = store
+            self.save()
         return store
 
+    def _maybe_migrate_index(self, store=None) -> bool:
+        """
+        Move a flat index to the configured index type when it is due.
+
+        HNSW is built right away, IVF types once the flat index holds enough
+        vectors to train them (faiss_train_min_vectors, 39 * nlist by default).
+        """
+        store = store or self.store
+        migrated = migrate_index(store.index, self.index_config)
+        if migrated is None:
+            return False
+        store.index = migrated
+        return True
+
+    def similarity_search(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        **kwargs,
+    ) -> List[Document]:
+        """
+        Nearest chunks to the query.
+
+        The FAISS store is a single local collection, user_id is accepted for
+        interface parity with PGVectorStore and not used for filtering.
+        nprobe (IVF) and ef_search (HNSW) override the configured values for
+        this call.
+        """
+        self._reload_if_stale()
+        # Only the model call runs outside the lock: writers change the index,
+        # label mapping and docstore in place
+        embedding = self.store._embed_query(query)
+        with self._index_lock:
+            return self.store.similarity_search_by_vector(
+                embedding, k=top_k, nprobe=nprobe, ef_search=ef_search
+            )
+
+    def index_info(self) -> dict:
+        """Type, size and training state of the current index."""
+        index = self.store.index
+        return {
+            "index_type": index_type_of(index),
+            "configured_type": self.index_config.index_type,
+            "ntotal": index.ntotal,
+            "is_trained": index.is_trained,
+            "deleted_pending_compaction": self.store.tombstones,
+            "train_size": (
+                self.index_config.train_size if self.index_config.needs_training else None
+            ),
+        }
+
     def chunk_in_store(self, chunk_id: str) -> bool:
-        index_to_docstore_id = self.store.index_to_docstore_id
-        return chunk_id in index_to_docstore_id.values()
+        return chunk_id in self._chunk_ids
+
+    def _document_chunks(self) -> Dict[str, Set[str]]:
+        """Chunk ids per parent document_id (chunk metadata), built once."""
+        if self._chunks_by_document is None:
+            self._chunks_by_document = {}
+            self._document_of = {}
+            chunk_ids = list(self.store.index_to_docstore_id.values())
+            docstore = self.store.docstore
+            if isinstance(docstore, SQLiteDocstore):
+                documents = docstore.mget(chunk_ids)
+            else:
+                documents = {chunk_id: docstore.search(chunk_id) for chunk_id in chunk_ids}
+            self._index_document_chunks(
+                [chunk_id for chunk_id, doc in documents.items() if isinstance(doc, Document)],
+                [doc.metadata for doc in documents.values() if isinstance(doc, Document)],
+            )
+        return self._chunks_by_document
+
+    def _index_document_chunks(self, chunk_ids: List[str], metadatas: List[dict]):
+        for chunk_id, metadata in zip(chunk_ids, metadatas):
+            document_id = metadata.get("document_id")
+            if document_id:
+                self._chunks_by_document.setdefault(document_id, set()).add(chunk_id)
+                self._document_of[chunk_id] = document_id
+
+    def _forget_document_chunks(self, chunk_ids: List[str]):
+        if self._chunks_by_document is None:
+            return
+        for chunk_id in chunk_ids:
+            document_id = self._document_of.pop(chunk_id, None)
+            if document_id is None:
+                continue
+            siblings = self._chunks_by_document[document_id]
+            siblings.discard(chunk_id)
+            if not siblings:
+                del self._chunks_by_document[document_id]
+
+    def delete_documents_by_document_id(self, document_ids: List[str]) -> int:
+        """
+        Delete every chunk of the given parent documents in one batch.
 
-    def delete_documents(self, uids: List[str]) -> bool:
+        Returns:
+            Number of chunks deleted
+        """
+        with self._index_lock:
+            by_document = self._document_chunks()
+            chunk_ids = [
+                chunk_id
+                for document_id in document_ids
+                for chunk_id in by_document.get(document_id, ())
+            ]
+        if chunk_ids:
+            self.delete_documents(chunk_ids)
+        logger.info(f"Deleted {len(chunk_ids)} chunks of {len(document_ids)} documents")
+        return len(chunk_ids)
+
+    def replace_documents(self, documents: List[Document], document_id: str) -> bool:
+        """
+        Replace all chunks of a parent document.
+
+        The new chunks are added first and the document's other chunks
+        deleted afterwards, so the document keeps its old chunks if
+        embedding fails (as PGVectorStore.replace_documents).
+        """
+        for doc in documents:
+            if not doc.id:
+                doc.id = str(uuid.uuid4())
+        if documents:
+            self.add_documents_batch(
+                documents, on_duplicate="update", document_id=document_id
+            )
+        new_ids = {doc.id for doc in documents}
+        with self._index_lock:
+            stale = [
+                chunk_id
+                for chunk_id in self._document_chunks().get(document_id, ())
+                if chunk_id not in new_ids
+            ]
+        if stale:
+            self.delete_documents(stale)
+        return True
+
+    def delete_documents(self, uids: Union[List[str], str]) -> bool:
+        """
+        Delete chunks by chunk id.
+
+        A single string is a parent document id, as PGVectorStore.delete_documents
+        takes, and deletes all of that document's chunks.
+        """
+        if isinstance(uids, str):
+            self.delete_documents_by_document_id([uids])
+            return True
         try:
-            logger.info(f"Deleting documents: {uids}")
-            self.store.delete(uids)
-            self.save()
+            logger.info(f"Deleting {len(uids)} chunks")
+            with self._index_lock:
+                self._make_writable()
+                self.store.delete(uids)
+                self._chunk_ids.difference_update(uids)
+                self._forget_document_chunks(uids)
+                if self._persister:
+                    self._persister.record_delete(uids)
+
+            if not self._persister:
+                self.save()
 
             return True
         except Exception as e:
@@ -0,0 +1,37 @@
+-- =============================================================
+-- Section 19: Stored tsvector for full-text search on chunks
+-- =============================================================
+
+-- The sparse leg of hybrid search used to compute
+--   to_tsvector(<language>, data->>'page_content')
+-- for every candidate row at query time, which forces a sequential scan over
+-- all of a user's chunks. We persist the tsvector as a generated column (one
+-- per configured text search language) and index it with GIN so queries can
+-- filter with @@ before ranking.
+--
+-- Backfill: adding a STORED generated column rewrites the table and computes
+-- the value for every existing row, so no separate UPDATE is needed. The
+-- rewrite holds an ACCESS EXCLUSIVE lock; on very large tables run this
+-- migration in a maintenance window.
+--
+-- Additional languages: PGVectorStore.ensure_text_search_index(<language>)
+-- creates tsv_<language> and its index on demand, or copy the two statements
+-- below replacing 'french'. Columns must be named tsv_<language> to be picked
+-- up by the vector store.
+
+ALTER TABLE chunks_embeddings
+    ADD COLUMN IF NOT EXISTS tsv_french tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('french'::regconfig, coalesce(data->>'page_content', ''))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_chunks_embeddings_tsv_french
+    ON chunks_embeddings USING GIN (tsv_french);
+
+-- Keep planner statistics fresh after the rewrite
+ANALYZE chunks_embeddings;
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Stored tsvector column and GIN index added to chunks_embeddings';
+END $$;
@@ -0,0 +1,41 @@
+-- =============================================================
+-- Section 20: Quantized HNSW indexes on chunk embeddings
+-- =============================================================
+
+-- The HNSW index built in section 5 stores full float32 vectors. Two compact
+-- expression indexes over the same column can serve the ANN pass instead
+-- (no extra column is stored; the exact vectors stay in
+-- chunks_embeddings.embedding):
+--
+--   halfvec: embedding::halfvec(<dim>)               (2 bytes per dimension)
+--   binary:  binary_quantize(embedding)::bit(<dim>)  (1 bit per dimension)
+--
+-- With vector_store.additional_params.quantization set to "halfvec" or
+-- "binary", the ANN pass runs on the matching index and fetches
+-- top_k * rerank_multiple candidates, which are re-ranked with the exact
+-- cosine distance on the float32 vectors.
+--
+-- Nothing is built here: quantization defaults to "none", and each index is
+-- a full HNSW build. PGVectorStore creates only the configured one, with
+-- CREATE INDEX CONCURRENTLY, on startup (PGVectorStore.ensure_quantized_index).
+-- To build it ahead of time instead (pgvector 0.7+, <dim> being the
+-- embedding dimension):
+--
+--   CREATE INDEX CONCURRENTLY idx_chunks_embeddings_embedding_halfvec_hnsw
+--       ON chunks_embeddings
+--       USING hnsw ((embedding::halfvec(<dim>)) halfvec_cosine_ops)
+--       WITH (m = 16, ef_construction = 64);
+--
+--   CREATE INDEX CONCURRENTLY idx_chunks_embeddings_embedding_bit_hnsw
+--       ON chunks_embeddings
+--       USING hnsw ((binary_quantize(embedding)::bit(<dim>)) bit_hamming_ops)
+--       WITH (m = 16, ef_construction = 64);
+--
+-- Once recall has been checked with PGVectorStore.measure_recall(), the
+-- float32 index can be dropped to reclaim its memory:
+--   DROP INDEX CONCURRENTLY idx_chunks_embeddings_embedding_hnsw;
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Quantized HNSW indexes are built on demand, see section 20';
+END $$;
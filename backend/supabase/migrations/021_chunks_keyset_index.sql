@@ -0,0 +1,16 @@
+-- =============================================================
+-- Section 21: Keyset pagination index on chunks_embeddings
+-- =============================================================
+
+-- PGVectorStore.get_documents_page() pages through a user's chunks with
+--   WHERE user_id = $1 AND id > $2 ORDER BY id LIMIT $3
+-- This composite index serves that query as an index range scan, so the
+-- cost of a page does not grow with its offset or the size of the tenant.
+
+CREATE INDEX IF NOT EXISTS idx_chunks_user_id_id
+    ON chunks_embeddings (user_id, id);
+
+DO $$
+BEGIN
+    RAISE NOTICE 'Keyset pagination index added to chunks_embeddings';
+END $$;
@@ -0,0 +1,31 @@
+-- =============================================================
+-- Section 22: Content-hash embedding cache
+-- =============================================================
+
+-- Chunk embeddings keyed by (provider, model, sha256 of the normalized chunk
+-- text). Ingestion looks chunks up here before calling the embedding model,
+-- so re-uploading or re-parsing unchanged documents does not re-embed them.
+--
+-- Embeddings are stored as real[] rather than vector(n): one table serves
+-- every model regardless of its dimension, and the cache is only read by
+-- primary key, never searched.
+--
+-- Rows are content-addressed and shared by all tenants. The backend reads and
+-- writes them with its own connection; RLS is enabled without policies so
+-- the table is not reachable through the public API roles.
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    embedding REAL[] NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (provider, model, content_hash)
+);
+
+ALTER TABLE embedding_cache ENABLE ROW LEVEL SECURITY;
+
+DO $$
+BEGIN
+    RAISE NOTICE 'embedding_cache table created';
+END $$;
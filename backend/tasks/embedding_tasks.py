@@ -0,0 +1,30 @@
+import logging
+
+from core.celery_config import celery_app as celery
+from services.embeddings.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(name="embed_all_documents", bind=True)
+def embed_all_documents_task(self, batch_size: int = 50):
+    """
+    Incrementally embed new and changed documents, reporting progress.
+
+    Progress is published as the PROGRESS state's meta. Documents are
+    checkpointed one by one, so a run cut short (e.g. by the task time limit)
+    continues where it stopped when queued again.
+    """
+    logger.info("Starting incremental embedding of all documents")
+    try:
+        embedding_service = EmbeddingService()
+        summary = embedding_service.embed_all_documents(
+            batch_size=batch_size,
+            progress_callback=lambda progress: self.update_state(
+                state="PROGRESS", meta=progress
+            ),
+        )
+        return {"status": "success", **summary}
+    except Exception as e:
+        logger.error(f"Embedding all documents failed: {str(e)}", exc_info=True)
+        return {"status": "error", "error": str(e)}
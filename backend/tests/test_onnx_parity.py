@@ -0,0 +1,56 @@
+"""
+Parity of the huggingface-onnx provider with the PyTorch sentence-transformers model.
+
+Needs onnxruntime, torch, transformers and langchain_huggingface, and the
+model from the HuggingFace hub (or its local cache); skipped otherwise.
+"""
+
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("langchain_huggingface")
+
+from services.embeddings.onnx_embeddings import ONNXEmbeddings  # noqa: E402
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# (min cosine, max absolute difference) against the PyTorch vectors
+BOUNDS = {
+    False: (0.9999, 1e-4),
+    True: (0.99, 0.05),
+}
+
+
+@pytest.fixture(scope="module")
+def onnx_cache_dir(tmp_path_factory):
+    from huggingface_hub import snapshot_download
+
+    try:
+        snapshot_download(MODEL)
+    except Exception as e:
+        pytest.skip(f"{MODEL} is not available: {e}")
+    return tmp_path_factory.mktemp("onnx")
+
+
+@pytest.mark.parametrize("quantize", [False, True], ids=["fp32", "int8"])
+def test_onnx_matches_pytorch(onnx_cache_dir, quantize):
+    embeddings = ONNXEmbeddings(MODEL, quantize=quantize, cache_dir=str(onnx_cache_dir))
+    min_cosine, max_abs_diff = BOUNDS[quantize]
+
+    result = embeddings.parity_check(min_cosine=min_cosine)
+
+    assert result["passed"], result
+    assert result["min_cosine"] >= min_cosine
+    assert result["max_abs_diff"] <= max_abs_diff
+
+
+def test_query_matches_documents(onnx_cache_dir):
+    embeddings = ONNXEmbeddings(MODEL, cache_dir=str(onnx_cache_dir))
+    text = "What is the refund policy for annual subscriptions?"
+
+    query = embeddings.embed_query(text)
+    document = embeddings.embed_documents([text, "a much longer padding companion " * 8])[0]
+
+    assert query == pytest.approx(document, abs=1e-4)